@@ -0,0 +1,183 @@
+import sys
+import time
+import queue
+import threading
+from collections import namedtuple
+
+# Event-driven button input.
+# Replaces the polling threads that checked button.is_pressed every 100 ms and then
+# blocked for 300 ms in sample_button(). gpiozero edge callbacks timestamp every
+# press and release; a small state machine per button turns them into short
+# presses, long presses and auto-repeat, and one timer thread sleeps until the next
+# long-press/repeat deadline (or indefinitely when nothing is held). Events reach
+# the render loop through a queue that it drains once per frame, so a press is seen
+# on the next frame instead of up to 400 ms later.
+
+LONG_PRESS = 0.5  # Seconds held before a press counts as long
+REPEAT_DELAY = 1.0  # Seconds held before auto-repeat starts
+REPEAT_INTERVAL = 0.25  # Seconds between repeats while held
+BOUNCE_TIME = 0.02  # Debounce handled by gpiozero
+
+# kind is one of "press", "release", "short", "long", "repeat"
+ButtonEvent = namedtuple("ButtonEvent", ["timestamp", "name", "kind"])
+
+
+class ButtonStateMachine:
+    """
+    Short/long press and auto-repeat for one button, driven by timestamped edges.
+    A release before LONG_PRESS is a short press; holding emits one long press and,
+    if repeat is enabled, a repeat every REPEAT_INTERVAL after REPEAT_DELAY.
+    """
+
+    def __init__(self, name, long_press=LONG_PRESS, repeat=False, repeat_delay=REPEAT_DELAY,
+                 repeat_interval=REPEAT_INTERVAL):
+        self.name = name
+        self.long_press = long_press
+        self.repeat = repeat
+        self.repeat_delay = repeat_delay
+        self.repeat_interval = repeat_interval
+        self.pressed_at = None
+        self.long_sent = False
+        self.next_repeat = None
+
+    def press(self, timestamp):
+        if self.pressed_at is not None:
+            return []
+        self.pressed_at = timestamp
+        self.long_sent = False
+        self.next_repeat = timestamp + self.repeat_delay if self.repeat else None
+        return [ButtonEvent(timestamp, self.name, "press")]
+
+    def release(self, timestamp):
+        if self.pressed_at is None:
+            return []
+        events = self.due(timestamp)
+        if not self.long_sent:
+            events.append(ButtonEvent(timestamp, self.name, "short"))
+        events.append(ButtonEvent(timestamp, self.name, "release"))
+        self.pressed_at = None
+        self.next_repeat = None
+        return events
+
+    def deadline(self):
+        """Time of the next long-press or repeat event, or None when idle."""
+        if self.pressed_at is None:
+            return None
+        if not self.long_sent:
+            return self.pressed_at + self.long_press
+        return self.next_repeat
+
+    def due(self, now):
+        """Long-press and repeat events whose deadlines have passed by now."""
+        events = []
+        if self.pressed_at is None:
+            return events
+        if not self.long_sent and now >= self.pressed_at + self.long_press:
+            self.long_sent = True
+            events.append(ButtonEvent(self.pressed_at + self.long_press, self.name, "long"))
+        while self.next_repeat is not None and self.long_sent and now >= self.next_repeat:
+            events.append(ButtonEvent(self.next_repeat, self.name, "repeat"))
+            self.next_repeat += self.repeat_interval
+        return events
+
+
+class ButtonInput:
+    """
+    gpiozero buttons feeding a queue of ButtonEvents.
+    pins maps a name to a GPIO pin; names in `repeat` auto-repeat while held.
+    pin_factory can be a gpiozero MockFactory to drive the buttons without hardware.
+    """
+
+    def __init__(self, pins, repeat=(), long_press=LONG_PRESS, pin_factory=None, clock=time.monotonic):
+        from gpiozero import Button
+
+        self.clock = clock
+        self.queue = queue.Queue()
+        self.condition = threading.Condition()
+        self.machines = {}
+        self.buttons = {}
+        for name, pin in pins.items():
+            self.machines[name] = ButtonStateMachine(name, long_press, repeat=name in repeat)
+            button = Button(pin, bounce_time=BOUNCE_TIME, pin_factory=pin_factory)
+            button.when_pressed = lambda name=name: self.edge(name, True)
+            button.when_released = lambda name=name: self.edge(name, False)
+            self.buttons[name] = button
+
+        self.running = True
+        self.timer = threading.Thread(target=self.run_timers, daemon=True)
+        self.timer.start()
+
+    def edge(self, name, pressed):
+        timestamp = self.clock()
+        with self.condition:
+            machine = self.machines[name]
+            events = machine.press(timestamp) if pressed else machine.release(timestamp)
+            for event in events:
+                self.queue.put(event)
+            self.condition.notify()
+
+    def run_timers(self):
+        with self.condition:
+            while self.running:
+                deadlines = [d for d in (m.deadline() for m in self.machines.values()) if d is not None]
+                timeout = max(0.0, min(deadlines) - self.clock()) if deadlines else None
+                self.condition.wait(timeout)
+                now = self.clock()
+                for machine in self.machines.values():
+                    for event in machine.due(now):
+                        self.queue.put(event)
+
+    def events(self):
+        """Drain every pending event without blocking; call once per frame."""
+        events = []
+        while True:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def close(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.timer.join()
+        for button in self.buttons.values():
+            button.close()
+
+
+def main():
+    """--mock drives the buttons through gpiozero's MockFactory and prints the events."""
+    pin_factory = None
+    if "--mock" in sys.argv:
+        from gpiozero.pins.mock import MockFactory
+        pin_factory = MockFactory()
+
+    buttons = ButtonInput({"up": 22, "down": 27, "limit": 17}, repeat=("up", "down"), pin_factory=pin_factory)
+    start = time.monotonic()
+    try:
+        if pin_factory is not None:
+            up = pin_factory.pin(22)
+            limit = pin_factory.pin(17)
+            # Short press, then a 1.6 s hold with auto-repeat (buttons pull up: pressed is low)
+            for pin, hold in ((limit, 0.1), (up, 1.6)):
+                pin.drive_low()
+                time.sleep(hold)
+                pin.drive_high()
+                time.sleep(0.1)
+            for event in buttons.events():
+                print(f"{event.timestamp - start:6.3f} s  {event.name:>5}  {event.kind}")
+            return
+
+        print("Press the buttons... Press Ctrl+C to stop.")
+        while True:
+            for event in buttons.events():
+                print(f"{event.timestamp - start:6.3f} s  {event.name:>5}  {event.kind}")
+            time.sleep(0.05)
+    except KeyboardInterrupt:
+        print("Exiting...")
+    finally:
+        buttons.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
 import gpiod
-import spidev
 import time
 import numpy as np
 import cv2
 
+from RFBurstSampler import BurstSampler, open_spi
+from RFCalibration import load_calibration
+from RFRobustGrid import RobustRFScanGrid
+from RFScanGrid import GridAxes
+from RFSettle import SettleDetector, SettleLog
+from ServoTrajectory import TrajectoryMover
+
 import os
 os.environ["QT_QPA_PLATFORM"] = "xcb"
 
@@ -20,51 +26,15 @@ MICRO_SERVO_PIN = 18
 MICRO_START_ANGLE = 140  # Start at 140°
 MICRO_END_ANGLE = 80  # End at 80°
 
-# Servo timing (50Hz)
-PWM_FREQUENCY = 50  # 50Hz
-MIN_PULSE_WIDTH = 0.5  # milliseconds (0° position)
-MAX_PULSE_WIDTH = 2.5  # milliseconds (180° position)
-PERIOD = 20  # milliseconds (1/Frequency = 20ms for 50Hz)
-
-# RF Power Measurement Constants
-SPI_BUS = 0
-SPI_CS = 0  # Chip Select CE0 (GPIO 8)
-SPI_SPEED_HZ = 1600000000  # 1 MHz SPI speed
-SPI_MODE = 1  # MCP3201 works in SPI mode 0 or 1
-ADC_RESOLUTION = 4095  # 12-bit ADC
-V_REF = 2.5  # Reference voltage
-DEFAULT_SLOPE = -0.025  # V/dB
-DEFAULT_INTERCEPT = 20.0  # dBm
-
-# Setup SPI for RF Power Measurement
-spi = spidev.SpiDev()
-spi.open(SPI_BUS, SPI_CS)
-spi.max_speed_hz = SPI_SPEED_HZ
-spi.mode = SPI_MODE
-
-def read_adc_mcp3201():
-    """Read raw 12-bit value from MCP3201 ADC via SPI."""
-    bytes_in = spi.xfer2([0x00, 0x00])  # Send dummy bytes to receive data
-    raw16 = (bytes_in[0] << 8) | bytes_in[1]
-    adc_value = (raw16 >> 3) & 0x0FFF  # Extract the 12-bit ADC result
-    return adc_value
+# Setup SPI for RF Power Measurement (benchmarked settings from spi_config.json)
+spi = open_spi()
+
+# Bursts of ADC codes converted through the versioned AD8318 calibration (calibrations/ad8318_v<N>.json)
+sampler = BurstSampler(spi, oversample=8, convert=load_calibration().to_dbm)
 
 def get_rf_power_dbm():
-    """Convert ADC raw value to RF power in dBm with increased sensitivity for weak signals."""
-    adc_val = read_adc_mcp3201()
-    voltage = (adc_val / ADC_RESOLUTION) * V_REF
-    idle_adc_val = read_adc_mcp3201()
-    idle_voltage = (idle_adc_val / ADC_RESOLUTION) * V_REF
-    adjusted_intercept = - (idle_voltage / DEFAULT_SLOPE)
-    power_dbm = adjusted_intercept + (voltage / DEFAULT_SLOPE)
-    
-    # Increase sensitivity further for weak signals
-    if power_dbm < -40:
-        power_dbm += 8  # Increase sensitivity more aggressively
-    elif power_dbm < -30:
-        power_dbm += 5  # Moderate boost for weak signals
-    
-    return power_dbm
+    """Mean RF power in dBm of one burst of conversions."""
+    return sampler.sample().mean
 
 # Setup GPIO for Servos
 chip = gpiod.Chip(CHIP)
@@ -73,65 +43,64 @@ micro_servo = chip.get_line(MICRO_SERVO_PIN)
 primary_servo.request(consumer="primary_servo", type=gpiod.LINE_REQ_DIR_OUT)
 micro_servo.request(consumer="micro_servo", type=gpiod.LINE_REQ_DIR_OUT)
 
-# Generate software PWM
-def set_servo_angle(servo, angle):
-    duty_cycle = (MIN_PULSE_WIDTH + (angle / 180.0) * (MAX_PULSE_WIDTH - MIN_PULSE_WIDTH)) / PERIOD * 100
-    high_time = (duty_cycle / 100) * PERIOD  # Convert to time in ms
-    low_time = PERIOD - high_time  # Remaining time for a full cycle
+# Both servos follow planned S-curves, one shared PWM period per setpoint
+mover = TrajectoryMover(primary_servo, micro_servo, (PRIMARY_START_ANGLE, MICRO_START_ANGLE))
+
+# Readings are taken once the ADC has settled; each one runs in the low time of a PWM
+# period holding the target, so the servos stay pulsed without a second thread
+settle = SettleDetector(mover.held(get_rf_power_dbm))
+settle_log = SettleLog()
 
-    for _ in range(25):  # Reduce iterations for faster response
-        servo.set_value(1)
-        time.sleep(high_time / 1000)  # Convert ms to seconds
-        servo.set_value(0)
-        time.sleep(low_time / 1000)
+def measure_at(pan, tilt):
+    """Move to (pan, tilt) and return the settled RF power in dBm."""
+    size = max(abs(pan - mover.position[0]), abs(tilt - mover.position[1]))
+    mover.move_to(pan, tilt)
+    result = settle.wait()
+    settle_log.record(pan, tilt, size, result)
+    if not result.settled:
+        print(f"Reading did not settle within {result.settle_time:.2f}s")
+    return result.value
 
-# Initialize RF power matrix
-rf_data = []
+# Per-cell RF statistics; forward and reverse passes are reconciled by angle and spikes rejected
+rf_grid = RobustRFScanGrid(GridAxes.regular((PRIMARY_START_ANGLE, PRIMARY_END_ANGLE),
+                                            (MICRO_END_ANGLE, MICRO_START_ANGLE), 10, 10))
 
 try:
-    # Initialize micro servo at 140°
+    # Park both servos at the start (primary 0°, micro 140°)
     print(f"Initializing micro servo to {MICRO_START_ANGLE}°...")
-    set_servo_angle(micro_servo, MICRO_START_ANGLE)
-    time.sleep(0.5)
+    mover.hold(25)
 
     micro_angle = MICRO_START_ANGLE  # Start position of micro servo
 
     while micro_angle >= MICRO_END_ANGLE:
         print(f"Starting new scan cycle. Micro Servo: {micro_angle}°")
-        rf_row = []  # Start a new row in the matrix
 
         print("Moving primary servo from 0° to 90°...")
         for angle in range(PRIMARY_START_ANGLE, PRIMARY_END_ANGLE + 1, 10):
-            set_servo_angle(primary_servo, angle)
-            rf_power = get_rf_power_dbm()
+            rf_power = measure_at(angle, micro_angle)
             print(f"Primary {angle}° | Micro {micro_angle}° | RF Power: {rf_power:.2f} dBm")
-            rf_row.append(rf_power)
-        
-        rf_data.append(rf_row)  # Store the row
+            rf_grid.add(angle, micro_angle, rf_power, time.time())
         
         print("Moving micro servo down by 10°...")
         micro_angle -= 10
         if micro_angle < MICRO_END_ANGLE:
             break  # Stop movement when reaching 80°
-        set_servo_angle(micro_servo, micro_angle)
+        mover.move_to(mover.position[0], micro_angle)
         
         print("Moving primary servo from 90° to 0°...")
-        reverse_rf_row = []
         for angle in range(PRIMARY_END_ANGLE, PRIMARY_START_ANGLE - 1, -10):
-            set_servo_angle(primary_servo, angle)
-            rf_power = get_rf_power_dbm()
+            rf_power = measure_at(angle, micro_angle)
             print(f"Primary {angle}° | Micro {micro_angle}° | RF Power: {rf_power:.2f} dBm")
-            reverse_rf_row.append(rf_power)
-        
-        rf_data.append(reverse_rf_row)  # Store the row
+            rf_grid.add(angle, micro_angle, rf_power, time.time())
 
         print("Moving micro servo down by 10° after reverse sweep...")
         micro_angle -= 10
         if micro_angle < MICRO_END_ANGLE:
             break  # Stop movement when reaching 80°
-        set_servo_angle(micro_servo, micro_angle)
+        mover.move_to(mover.position[0], micro_angle)
 
     print("Servo movement complete. All sweeps completed.")
+    print(f"Rejected {rf_grid.rejected.sum()} outlier readings")
 
 except KeyboardInterrupt:
     print("Interrupted!")
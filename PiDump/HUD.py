@@ -0,0 +1,147 @@
+import time
+import numpy as np
+import cv2
+
+# HUD compositor for the camera display.
+# draw_crosshair_with_temp() copied the whole 640x480 frame to blend four short
+# lines and every label was re-rasterised each frame. Here each HUD element is a
+# small premultiplied BGRA sprite that is rendered once and re-rendered only when
+# its text or style changes. Drawing blends the sprite into its bounding ROI only:
+# roi * (1 - alpha) + premultiplied colour, on a few hundred pixels per element.
+
+FONT = cv2.FONT_HERSHEY_PLAIN
+
+
+class Sprite:
+    """Premultiplied colour and inverse alpha of a small HUD element, drawn relative to an anchor."""
+
+    __slots__ = ("color", "inverse_alpha", "offset")
+
+    def __init__(self, mask, color, opacity=1.0, offset=(0, 0)):
+        alpha = mask.astype(np.float32) * (opacity / 255.0)
+        self.color = np.clip(alpha[..., None] * np.asarray(color, dtype=np.float32), 0, 255).astype(np.uint8)
+        self.inverse_alpha = np.repeat(np.rint(255 * (1 - alpha)).astype(np.uint8)[..., None], 3, axis=2)
+        self.offset = offset  # Top-left corner relative to the anchor point
+
+    @property
+    def shape(self):
+        return self.color.shape[:2]
+
+    def blend(self, frame, x, y):
+        """Blend into frame (in place) with the anchor at (x, y), clipped to the frame."""
+        height, width = self.shape
+        left, top = x + self.offset[0], y + self.offset[1]
+        x0, y0 = max(left, 0), max(top, 0)
+        x1, y1 = min(left + width, frame.shape[1]), min(top + height, frame.shape[0])
+        if x0 >= x1 or y0 >= y1:
+            return
+        roi = frame[y0:y1, x0:x1]
+        sx, sy = x0 - left, y0 - top
+        window = (slice(sy, sy + y1 - y0), slice(sx, sx + x1 - x0))
+        cv2.multiply(roi, self.inverse_alpha[window], dst=roi, scale=1 / 255.0)
+        cv2.add(roi, self.color[window], dst=roi)
+
+
+def text_sprite(text, font=FONT, font_scale=1, color=(255, 255, 255), thickness=1, opacity=1.0):
+    """Sprite of a label anchored at its baseline origin, as cv2.putText positions text."""
+    (width, height), baseline = cv2.getTextSize(text, font, font_scale, thickness)
+    pad = thickness + 1
+    mask = np.zeros((height + baseline + 2 * pad, width + 2 * pad), dtype=np.uint8)
+    cv2.putText(mask, text, (pad, pad + height), font, font_scale, 255, thickness, cv2.LINE_AA)
+    return Sprite(mask, color, opacity, offset=(-pad, -pad - height))
+
+
+def crosshair_sprite(gap=10, size=20, color=(0, 255, 255), thickness=2, opacity=1.0):
+    """Sprite of the four-line crosshair, anchored at its centre."""
+    half = size + thickness
+    c = half
+    mask = np.zeros((2 * half + 1, 2 * half + 1), dtype=np.uint8)
+    cv2.line(mask, (c - size, c), (c - gap, c), 255, thickness)
+    cv2.line(mask, (c + gap, c), (c + size, c), 255, thickness)
+    cv2.line(mask, (c, c - size), (c, c - gap), 255, thickness)
+    cv2.line(mask, (c, c + gap), (c, c + size), 255, thickness)
+    return Sprite(mask, color, opacity, offset=(-half, -half))
+
+
+class HudCompositor:
+    """
+    Named HUD elements drawn in insertion order. Setting an element to the same
+    content and style as before is free; only changed elements are re-rendered.
+    """
+
+    def __init__(self):
+        self.elements = {}  # name -> [key, sprite, position, visible]
+
+    def set(self, name, key, factory, position):
+        """Show element `name` at position; factory() builds its sprite when key changes."""
+        element = self.elements.get(name)
+        if element is None:
+            self.elements[name] = [key, factory(), position, True]
+            return
+        if element[0] != key:
+            element[0] = key
+            element[1] = factory()
+        element[2] = position
+        element[3] = True
+
+    def text(self, name, text, position, font=FONT, font_scale=1, color=(255, 255, 255), thickness=1, opacity=1.0):
+        key = (text, font, font_scale, color, thickness, opacity)
+        self.set(name, key, lambda: text_sprite(text, font, font_scale, color, thickness, opacity), position)
+
+    def crosshair(self, name, position, gap=10, size=20, color=(0, 255, 255), thickness=2, opacity=1.0):
+        key = (gap, size, color, thickness, opacity)
+        self.set(name, key, lambda: crosshair_sprite(gap, size, color, thickness, opacity), position)
+
+    def hide(self, name):
+        if name in self.elements:
+            self.elements[name][3] = False
+
+    def draw(self, frame):
+        for _, sprite, (x, y), visible in self.elements.values():
+            if visible:
+                sprite.blend(frame, x, y)
+        return frame
+
+
+def setup_window(name, fullscreen=False, size=(640, 480)):
+    """Create the display window once, before the render loop."""
+    if fullscreen:
+        cv2.namedWindow(name, cv2.WND_PROP_FULLSCREEN)
+        cv2.setWindowProperty(name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+    else:
+        cv2.namedWindow(name, cv2.WINDOW_NORMAL)
+        cv2.resizeWindow(name, *size)
+
+
+def main():
+    frame = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    hud = HudCompositor()
+    iterations = 2000
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        temp = 30.0 + (i // 50) * 0.1  # Changes every 50 frames, like a real reading
+        hud.crosshair("crosshair", (320, 240))
+        hud.text("temp", f"{temp:.1f}C", (330, 230), font_scale=1.0, color=(0, 255, 255), thickness=2)
+        hud.text("set", "Set: 40C", (10, 20))
+        hud.text("mode", "Normal", (500, 20))
+        hud.draw(frame)
+    hud_time = (time.perf_counter() - start) / iterations
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        overlay = frame.copy()
+        for p0, p1 in (((300, 240), (310, 240)), ((330, 240), (340, 240)),
+                       ((320, 220), (320, 230)), ((320, 250), (320, 260))):
+            cv2.line(overlay, p0, p1, (0, 255, 255), 2)
+        cv2.addWeighted(overlay, 1.0, frame, 0.0, 0, frame)
+        cv2.putText(frame, "30.0C", (330, 230), FONT, 1.0, (0, 255, 255), 2, cv2.LINE_AA)
+        cv2.putText(frame, "Set: 40C", (10, 20), FONT, 1, (255, 255, 255), 1, cv2.LINE_AA)
+        cv2.putText(frame, "Normal", (500, 20), FONT, 1, (255, 255, 255), 1, cv2.LINE_AA)
+    old_time = (time.perf_counter() - start) / iterations
+
+    print(f"HUD per frame: {hud_time * 1e6:.0f} us (compositor) vs {old_time * 1e6:.0f} us (full-frame copy + putText)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import sys
+import time
+import threading
+import numpy as np
+import cv2
+
+# MJPEG/HTTP live stream of the composited display output.
+# The render loop publishes each finished frame to a FrameBroadcaster, which only
+# stores a reference and wakes the waiting clients, so the loop never waits on the
+# network. The frame is JPEG-encoded at most once per quality level, by whichever
+# client asks for it first, and every other client at that quality sends the same
+# bytes. Each client always takes the newest frame, so a slow client skips frames
+# instead of queueing them or holding anything up.
+
+HOST = "0.0.0.0"
+PORT = 8000
+QUALITIES = (50, 70, 90)  # JPEG quality levels offered; requests snap to the nearest
+DEFAULT_QUALITY = 70
+BOUNDARY = "frame"
+
+
+class FrameBroadcaster:
+    """Latest frame plus its JPEG encodings, shared by every stream client."""
+
+    def __init__(self, qualities=QUALITIES):
+        self.qualities = qualities
+        self.condition = threading.Condition()
+        self.frame = None
+        self.sequence = 0
+        self.timestamp = 0.0
+        self.encoded = {}  # quality -> (sequence, jpeg bytes)
+        self.encode_locks = {quality: threading.Lock() for quality in qualities}
+        self.encodes = 0
+
+    def publish(self, frame):
+        """Hand over a new BGR frame; the caller must not modify it afterwards."""
+        with self.condition:
+            self.frame = frame
+            self.sequence += 1
+            self.timestamp = time.time()
+            self.condition.notify_all()
+
+    def quality(self, requested):
+        return min(self.qualities, key=lambda q: abs(q - requested))
+
+    def wait(self, last_sequence, timeout=5.0):
+        """Block until a frame newer than last_sequence exists; returns its sequence or None."""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.sequence > last_sequence, timeout):
+                return None
+            return self.sequence
+
+    def jpeg(self, quality):
+        """(sequence, bytes) of the newest frame at this quality, encoding it if nobody has yet."""
+        with self.encode_locks[quality]:
+            with self.condition:
+                frame, sequence = self.frame, self.sequence
+            cached = self.encoded.get(quality)
+            if cached is not None and cached[0] == sequence:
+                return cached
+            ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if not ok:
+                raise RuntimeError("JPEG encoding failed")
+            self.encoded[quality] = (sequence, buffer.tobytes())
+            self.encodes += 1
+            return self.encoded[quality]
+
+    def stream(self, quality):
+        """Generator of multipart MJPEG chunks, newest frame each time."""
+        quality = self.quality(quality)
+        sequence = 0
+        while True:
+            if self.wait(sequence) is None:
+                continue  # No new frame yet; keep the connection open
+            sequence, data = self.jpeg(quality)
+            yield (f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(data)}\r\n\r\n".encode()
+                   + data + b"\r\n")
+
+
+def create_app(broadcaster):
+    from flask import Flask, Response, request
+
+    app = Flask(__name__)
+
+    @app.route("/")
+    def index():
+        links = " | ".join(f'<a href="/?quality={q}">{q}</a>' for q in broadcaster.qualities)
+        quality = request.args.get("quality", DEFAULT_QUALITY, type=int)
+        return (f"<html><body style='margin:0;background:#000;color:#ccc'>Quality: {links}<br>"
+                f"<img src='/stream.mjpg?quality={quality}' style='max-width:100%'></body></html>")
+
+    @app.route("/stream.mjpg")
+    def stream():
+        quality = request.args.get("quality", DEFAULT_QUALITY, type=int)
+        return Response(broadcaster.stream(quality), mimetype=f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+
+    @app.route("/snapshot.jpg")
+    def snapshot():
+        if broadcaster.wait(0, timeout=2.0) is None:
+            return Response("No frame yet", status=503)
+        quality = broadcaster.quality(request.args.get("quality", DEFAULT_QUALITY, type=int))
+        _, data = broadcaster.jpeg(quality)
+        return Response(data, mimetype="image/jpeg")
+
+    return app
+
+
+class StreamServer:
+    """Serves a FrameBroadcaster over HTTP from a background thread."""
+
+    def __init__(self, broadcaster, host=HOST, port=PORT):
+        from werkzeug.serving import make_server
+
+        self.server = make_server(host, port, create_app(broadcaster), threaded=True)
+        self.port = self.server.port
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.thread.join()
+
+
+def read_stream(url, duration, delay=0.0, counts=None, key=None):
+    """Client used by the demo: counts JPEG frames received, optionally reading slowly."""
+    from urllib.request import urlopen
+
+    frames = 0
+    end = time.monotonic() + duration
+    with urlopen(url, timeout=5) as response:
+        while time.monotonic() < end:
+            line = response.readline()
+            if line.startswith(b"Content-Length:"):
+                length = int(line.split(b":")[1])
+                response.readline()
+                response.read(length)
+                frames += 1
+                if delay:
+                    time.sleep(delay)
+    if counts is not None:
+        counts[key] = frames
+    return frames
+
+
+def main():
+    """--demo publishes synthetic 30 fps frames and reads them back with several local clients."""
+    broadcaster = FrameBroadcaster()
+    server = StreamServer(broadcaster, port=int(sys.argv[sys.argv.index("--port") + 1]) if "--port" in sys.argv else PORT)
+    server.start()
+    print(f"Streaming on http://localhost:{server.port}/")
+
+    if "--demo" not in sys.argv:
+        print("Use StreamServer(broadcaster).start() and broadcaster.publish(frame) from the display loop.")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("Exiting...")
+        finally:
+            server.stop()
+        return
+
+    duration = 5.0
+    counts = {}
+    clients = [(f"fast q{q} #{i}", q, 0.0) for q in (50, 90) for i in range(3)] + [("slow q70", 70, 0.2)]
+    threads = [threading.Thread(target=read_stream, args=(f"http://localhost:{server.port}/stream.mjpg?quality={q}",
+                                                          duration, delay, counts, name), daemon=True)
+               for name, q, delay in clients]
+    for thread in threads:
+        thread.start()
+
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    published = 0
+    publish_time = 0.0
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        frame = frame.copy()
+        cv2.putText(frame, f"{published}", (40, 240), cv2.FONT_HERSHEY_SIMPLEX, 3, (255, 255, 255), 4)
+        start = time.perf_counter()
+        broadcaster.publish(frame)
+        publish_time += time.perf_counter() - start
+        published += 1
+        time.sleep(1 / 30)
+    for thread in threads:
+        thread.join()
+    server.stop()
+
+    print(f"Published {published} frames ({publish_time / published * 1e6:.0f} us per publish), "
+          f"{broadcaster.encodes} JPEG encodes for {len(clients)} clients")
+    for name, _, _ in clients:
+        print(f"{name:>14}: {counts.get(name, 0)} frames")
+
+
+if __name__ == "__main__":
+    main()
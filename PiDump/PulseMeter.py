@@ -0,0 +1,179 @@
+import os
+import sys
+import time
+import threading
+from collections import deque
+import numpy as np
+
+# Interrupt-timed pulse-width measurement.
+# potTest.py spun on GPIO.input() with time.time() in two tight loops, pinning a
+# core and measuring with Python-loop resolution. Here the kernel timestamps every
+# edge on the line (gpiod edge events) and the reader thread sleeps in
+# event_wait() between them. Rising/falling pairs give the high time, rising/rising
+# pairs the period, and a rolling window of pulses gives the averages. The latest
+# reading is published to a small shared-memory record so other processes can read
+# it without touching the GPIO line.
+
+CHIP = "/dev/gpiochip4"  # GPIO chip for Raspberry Pi 5
+PULSE_PIN = 18  # GPIO18 (Physical pin 12)
+WINDOW = 32  # Pulses in the rolling average
+SHARED_PATH = "/dev/shm/pulse_meter"
+
+READING_DTYPE = np.dtype([
+    ("sequence", "<u8"),  # Odd while the writer is updating
+    ("timestamp_ns", "<i8"),  # Kernel timestamp of the last falling edge
+    ("width", "<f8"),  # Seconds, last pulse
+    ("period", "<f8"),  # Seconds, last rising-to-rising
+    ("duty", "<f8"),
+    ("mean_width", "<f8"),  # Rolling-window averages
+    ("mean_period", "<f8"),
+    ("mean_duty", "<f8"),
+    ("pulses", "<u8"),
+])
+
+
+class PulseWidthMeter:
+    """Pulse width, period and duty cycle from timestamped edges (nanoseconds)."""
+
+    def __init__(self, window=WINDOW):
+        self.widths = deque(maxlen=window)
+        self.periods = deque(maxlen=window)
+        self.last_rising = None
+        self.width = np.nan
+        self.period = np.nan
+        self.pulses = 0
+        self.timestamp_ns = 0
+
+    def edge(self, timestamp_ns, rising):
+        """Feed one edge; returns True when it completed a pulse."""
+        if rising:
+            if self.last_rising is not None:
+                self.period = (timestamp_ns - self.last_rising) * 1e-9
+                self.periods.append(self.period)
+            self.last_rising = timestamp_ns
+            return False
+        if self.last_rising is None:
+            return False  # Started in the middle of a pulse
+        self.width = (timestamp_ns - self.last_rising) * 1e-9
+        self.widths.append(self.width)
+        self.pulses += 1
+        self.timestamp_ns = timestamp_ns
+        return True
+
+    @property
+    def duty(self):
+        return self.width / self.period if self.period > 0 else np.nan
+
+    @property
+    def mean_width(self):
+        return float(np.mean(self.widths)) if self.widths else np.nan
+
+    @property
+    def mean_period(self):
+        return float(np.mean(self.periods)) if self.periods else np.nan
+
+    @property
+    def mean_duty(self):
+        return self.mean_width / self.mean_period if self.periods else np.nan
+
+
+class SharedReading:
+    """
+    Latest PulseWidthMeter reading in shared memory, guarded by a sequence counter:
+    the writer makes it odd while updating, readers retry until they see the same
+    even value before and after copying.
+    """
+
+    def __init__(self, path=SHARED_PATH, create=False):
+        if create and (not os.path.exists(path) or os.path.getsize(path) != READING_DTYPE.itemsize):
+            np.zeros(1, dtype=READING_DTYPE).tofile(path)
+        self.record = np.memmap(path, dtype=READING_DTYPE, mode="r+" if create else "r", shape=(1,))
+
+    def publish(self, meter):
+        record = self.record
+        record["sequence"] += 1
+        record["timestamp_ns"] = meter.timestamp_ns
+        record["width"] = meter.width
+        record["period"] = meter.period
+        record["duty"] = meter.duty
+        record["mean_width"] = meter.mean_width
+        record["mean_period"] = meter.mean_period
+        record["mean_duty"] = meter.mean_duty
+        record["pulses"] = meter.pulses
+        record["sequence"] += 1
+
+    def read(self):
+        """Consistent copy of the latest reading as a numpy record."""
+        while True:
+            before = int(self.record["sequence"][0])
+            copy = self.record[0].copy()
+            if before % 2 == 0 and int(self.record["sequence"][0]) == before:
+                return copy
+            time.sleep(0)
+
+
+class PulseMeterThread(threading.Thread):
+    """Reads both-edge events from a gpiod line and updates a meter and the shared reading."""
+
+    def __init__(self, pin=PULSE_PIN, chip=CHIP, window=WINDOW, shared_path=SHARED_PATH):
+        super().__init__(daemon=True)
+        import gpiod
+
+        self.gpiod = gpiod
+        self.chip = gpiod.Chip(chip)
+        self.line = self.chip.get_line(pin)
+        self.line.request(consumer="pulse_meter", type=gpiod.LINE_REQ_EV_BOTH_EDGES)
+        self.meter = PulseWidthMeter(window)
+        self.shared = SharedReading(shared_path, create=True) if shared_path else None
+        self.running = threading.Event()
+
+    def run(self):
+        self.running.set()
+        rising_edge = self.gpiod.LineEvent.RISING_EDGE
+        while self.running.is_set():
+            # Blocks in the kernel until an edge arrives; the timeout only lets stop() through
+            if not self.line.event_wait(sec=1):
+                continue
+            completed = False
+            for event in self.line.event_read_multiple():
+                timestamp_ns = event.sec * 1000000000 + event.nsec
+                completed |= self.meter.edge(timestamp_ns, event.type == rising_edge)
+            if completed and self.shared is not None:
+                self.shared.publish(self.meter)
+
+    def stop(self):
+        self.running.clear()
+        self.join()
+        self.line.release()
+
+
+def main():
+    """Measure the pulse on PULSE_PIN; --read prints the reading published by another process."""
+    if "--read" in sys.argv:
+        shared = SharedReading()
+        try:
+            while True:
+                reading = shared.read()
+                print(f"Pulse Width: {reading['width']:.6f} s | mean {reading['mean_width']:.6f} s | "
+                      f"duty {reading['mean_duty'] * 100:5.1f}% | {reading['pulses']} pulses")
+                time.sleep(0.1)
+        except KeyboardInterrupt:
+            print("Exiting...")
+        return
+
+    meter_thread = PulseMeterThread()
+    meter_thread.start()
+    meter = meter_thread.meter
+    try:
+        while True:
+            time.sleep(0.1)
+            print(f"Pulse Width: {meter.width:.6f} s | mean {meter.mean_width:.6f} s | "
+                  f"period {meter.mean_period * 1000:.3f} ms | duty {meter.mean_duty * 100:5.1f}%")
+    except KeyboardInterrupt:
+        print("Exiting...")
+    finally:
+        meter_thread.stop()
+
+
+if __name__ == "__main__":
+    main()
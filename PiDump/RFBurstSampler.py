@@ -0,0 +1,182 @@
+import os
+import json
+import time
+from collections import namedtuple
+import numpy as np
+
+# Burst sampler for the MCP3201 on the RF Meter click.
+# Each point is taken as a burst of N conversions collected into one byte buffer
+# and decoded with vectorised numpy bit operations, instead of one xfer2 per
+# reading wrapped in millisecond sleeps. The burst statistics replace the
+# "idle reference" second read.
+#
+# The MCP3201 only starts a conversion on the falling edge of CS, and spidev
+# holds CS low for the whole of a single xfer2/readbytes call, so a burst is
+# still one 2-byte frame per conversion. The frames go back-to-back with no
+# sleeps and no per-sample Python bit twiddling.
+
+# RF Power Measurement Constants
+SPI_BUS = 0
+SPI_CS = 0  # Chip Select CE0 (GPIO 8)
+SPI_SPEED_HZ = 1000000  # 1 MHz SPI speed
+SPI_MODE = 0  # MCP3201 works in SPI mode 0 or 1
+RFMETER_FILTER_USEFULL_DATA = 0x1FFE  # Null bit + 12 data bits, LSB dropped
+FRAME_BYTES = 2  # 16 clocks per conversion
+
+# Sampling settings
+OVERSAMPLE = 32  # Conversions averaged per point
+
+# Written by SPIBenchmark.py; overrides the speed/mode/block defaults above when present
+SPI_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "spi_config.json")
+DEFAULT_SPI_CONFIG = {"speed_hz": SPI_SPEED_HZ, "mode": SPI_MODE, "block": OVERSAMPLE}
+
+BurstStats = namedtuple("BurstStats", ["mean", "median", "std", "min", "max", "count"])
+
+
+def decode_mcp3201(buffer):
+    """Decode a byte buffer of 2-byte MCP3201 frames into an array of 12-bit codes."""
+    frames = np.frombuffer(bytes(buffer), dtype=">u2")
+    return (frames & RFMETER_FILTER_USEFULL_DATA) >> 1
+
+
+def encode_mcp3201(codes):
+    """Build the byte stream the MCP3201 would send for the given 12-bit codes."""
+    codes = np.asarray(codes, dtype=np.uint16) & 0x0FFF
+    return ((codes << 1).astype(">u2")).tobytes()
+
+
+def burst_stats(values):
+    """Summary statistics of one burst."""
+    values = np.asarray(values, dtype=np.float64)
+    return BurstStats(float(values.mean()), float(np.median(values)), float(values.std()),
+                      float(values.min()), float(values.max()), len(values))
+
+
+class FakeSpiDev:
+    """
+    Stand-in for spidev.SpiDev that replays a recorded byte stream.
+    The stream wraps around when exhausted so tests can run any number of bursts.
+    """
+
+    def __init__(self, stream):
+        self.stream = bytes(stream)
+        self.position = 0
+        self.max_speed_hz = SPI_SPEED_HZ
+        self.mode = SPI_MODE
+        self.transfers = 0
+
+    @classmethod
+    def from_codes(cls, codes):
+        return cls(encode_mcp3201(codes))
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def open(self, bus, device):
+        pass
+
+    def close(self):
+        pass
+
+    def readbytes(self, length):
+        self.transfers += 1
+        out = bytearray()
+        while len(out) < length:
+            chunk = self.stream[self.position:self.position + length - len(out)]
+            out += chunk
+            self.position = (self.position + len(chunk)) % len(self.stream)
+        return list(out)
+
+    def xfer2(self, data):
+        return self.readbytes(len(data))
+
+
+class BurstSampler:
+    """
+    Reads bursts of conversions from the MCP3201.
+    convert, if given, maps an array of ADC codes to the output unit (e.g. dBm);
+    otherwise the statistics are in raw ADC codes.
+    """
+
+    def __init__(self, spi, oversample=OVERSAMPLE, convert=None):
+        self.spi = spi
+        self.oversample = oversample
+        self.convert = convert
+        self.buffer = bytearray(FRAME_BYTES * oversample)
+
+    def read_codes(self, count=None):
+        """Read count conversions back-to-back and return the decoded codes."""
+        count = count or self.oversample
+        if len(self.buffer) != FRAME_BYTES * count:
+            self.buffer = bytearray(FRAME_BYTES * count)
+        xfer2 = self.spi.xfer2
+        dummy = [0x00] * FRAME_BYTES
+        buffer = self.buffer
+        for i in range(0, FRAME_BYTES * count, FRAME_BYTES):
+            buffer[i:i + FRAME_BYTES] = bytes(xfer2(dummy))
+        return decode_mcp3201(buffer)
+
+    def read_values(self, count=None):
+        codes = self.read_codes(count)
+        if self.convert is None:
+            return codes
+        return self.convert(codes)
+
+    def sample(self, count=None):
+        """Take one point: a burst of conversions reduced to BurstStats."""
+        return burst_stats(self.read_values(count))
+
+
+def load_spi_config(path=SPI_CONFIG_FILE):
+    """SPI settings from the benchmark's config file, falling back to the defaults."""
+    config = dict(DEFAULT_SPI_CONFIG)
+    if os.path.exists(path):
+        with open(path) as f:
+            config.update({key: value for key, value in json.load(f).items() if key in config})
+    return config
+
+
+def open_spi(config=None):
+    """Open the RF Meter's SPI device with the benchmarked (or default) settings."""
+    import spidev
+
+    config = config or load_spi_config()
+    spi = spidev.SpiDev()
+    spi.open(SPI_BUS, SPI_CS)
+    spi.max_speed_hz = config["speed_hz"]
+    spi.mode = config["mode"]
+    return spi
+
+
+def record_stream(spi, conversions, path):
+    """Record raw MCP3201 frames to a file that FakeSpiDev.from_file can replay."""
+    sampler = BurstSampler(spi, oversample=conversions)
+    sampler.read_codes()
+    with open(path, "wb") as f:
+        f.write(bytes(sampler.buffer))
+
+
+def main():
+    config = load_spi_config()
+    spi = open_spi(config)
+    sampler = BurstSampler(spi, oversample=config["block"])
+
+    print("Reading RF bursts... Press Ctrl+C to stop.")
+    try:
+        while True:
+            start = time.perf_counter()
+            stats = sampler.sample()
+            elapsed = time.perf_counter() - start
+            print(f"ADC mean {stats.mean:7.1f} | median {stats.median:6.0f} | std {stats.std:5.1f} | "
+                  f"range {stats.min:.0f}-{stats.max:.0f} | {stats.count / elapsed:.0f} samples/s")
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        print("Exiting...")
+    finally:
+        spi.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import os
+import sys
+import json
+import time
+import numpy as np
+
+# AD8318 calibration for the RF Meter click.
+# A calibration is a set of reference points (detector voltage, dBm) measured
+# against a known source. The points are fitted with a piecewise-linear or
+# monotone spline curve and baked into a 4096-entry ADC-code -> dBm lookup table,
+# so a whole burst is converted with a single numpy take. This replaces the
+# per-script intercept/slope tweaks, "idle" re-reads and +8/+5 dB boosts.
+#
+# Calibrations live in versioned JSON files (ad8318_v<N>.json); the highest
+# version in CALIBRATION_DIR is loaded at startup.
+
+# ADC constants
+RFMETER_ADC_RESOLUTION = 4096
+RFMETER_DEF_VREF = 2.5
+
+# Datasheet defaults used when no calibration file exists
+RFMETER_DEF_SLOPE = -0.025  # V/dB
+RFMETER_DEF_INTERCEPT = 20.0  # dBm
+RFMETER_DEF_LIMIT_HIGH = 2.0  # V
+RFMETER_DEF_LIMIT_LOW = 0.5  # V
+
+CALIBRATION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calibrations")
+CALIBRATION_PREFIX = "ad8318_v"
+FORMAT_VERSION = 1
+METHODS = ("linear", "pchip")
+
+
+def code_to_voltage(codes):
+    """ADC code(s) to detector voltage."""
+    return np.asarray(codes, dtype=np.float64) * RFMETER_DEF_VREF / RFMETER_ADC_RESOLUTION
+
+
+class Calibration:
+    """A fitted AD8318 curve and its ADC-code lookup table."""
+
+    def __init__(self, voltages, dbm, method="linear", version=0, name="", created=None):
+        if method not in METHODS:
+            raise ValueError(f"Unknown calibration method '{method}', expected one of {METHODS}")
+        voltages = np.asarray(voltages, dtype=np.float64)
+        dbm = np.asarray(dbm, dtype=np.float64)
+        if voltages.shape != dbm.shape or len(voltages) < 2:
+            raise ValueError("Calibration needs at least two (voltage, dBm) reference points")
+
+        # Sort by voltage and average repeated measurements of the same voltage
+        unique_v, inverse = np.unique(voltages, return_inverse=True)
+        counts = np.bincount(inverse)
+        self.voltages = unique_v
+        self.dbm = np.bincount(inverse, weights=dbm) / counts
+        if len(self.voltages) < 2:
+            raise ValueError("Calibration needs at least two distinct reference voltages")
+
+        self.method = method
+        self.version = version
+        self.name = name
+        self.created = created or time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.lut = self.build_lut()
+
+    def curve(self, voltages):
+        """Evaluate the fitted curve, clamped to the calibrated voltage range."""
+        voltages = np.clip(voltages, self.voltages[0], self.voltages[-1])
+        if self.method == "pchip":
+            from scipy.interpolate import PchipInterpolator
+            return PchipInterpolator(self.voltages, self.dbm)(voltages)
+        return np.interp(voltages, self.voltages, self.dbm)
+
+    def build_lut(self):
+        codes = np.arange(RFMETER_ADC_RESOLUTION)
+        return self.curve(code_to_voltage(codes)).astype(np.float32)
+
+    def to_dbm(self, codes):
+        """Convert ADC code(s) to dBm with a single table lookup."""
+        return np.take(self.lut, codes)
+
+    def to_dict(self):
+        return {
+            "format": FORMAT_VERSION,
+            "version": self.version,
+            "name": self.name,
+            "created": self.created,
+            "method": self.method,
+            "points": [[float(v), float(d)] for v, d in zip(self.voltages, self.dbm)],
+        }
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported calibration format {data.get('format')}")
+        points = np.asarray(data["points"], dtype=np.float64)
+        return cls(points[:, 0], points[:, 1], data.get("method", "linear"), data.get("version", 0),
+                   data.get("name", ""), data.get("created"))
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def default_calibration():
+    """Straight datasheet line clamped to 0.5-2.0 V, matching RfMeter.get_signal_strength."""
+    voltages = np.array([RFMETER_DEF_LIMIT_LOW, RFMETER_DEF_LIMIT_HIGH])
+    dbm = voltages / RFMETER_DEF_SLOPE + RFMETER_DEF_INTERCEPT
+    return Calibration(voltages, dbm, "linear", version=0, name="AD8318 datasheet default")
+
+
+def calibration_files(directory=CALIBRATION_DIR):
+    """Return [(version, path)] of calibration files in directory, oldest first."""
+    if not os.path.isdir(directory):
+        return []
+    found = []
+    for filename in os.listdir(directory):
+        if filename.startswith(CALIBRATION_PREFIX) and filename.endswith(".json"):
+            version = filename[len(CALIBRATION_PREFIX):-len(".json")]
+            if version.isdigit():
+                found.append((int(version), os.path.join(directory, filename)))
+    return sorted(found)
+
+
+def load_calibration(directory=CALIBRATION_DIR):
+    """Load the newest calibration in directory, or the datasheet default if there is none."""
+    files = calibration_files(directory)
+    if not files:
+        print("No RF calibration found, using AD8318 datasheet defaults")
+        return default_calibration()
+    version, path = files[-1]
+    calibration = Calibration.load(path)
+    print(f"Loaded RF calibration v{version}: {calibration.name}")
+    return calibration
+
+
+def save_new_calibration(calibration, directory=CALIBRATION_DIR):
+    """Save calibration as the next version in directory and return its path."""
+    os.makedirs(directory, exist_ok=True)
+    files = calibration_files(directory)
+    calibration.version = files[-1][0] + 1 if files else 1
+    path = os.path.join(directory, f"{CALIBRATION_PREFIX}{calibration.version}.json")
+    calibration.save(path)
+    return path
+
+
+def fit_from_csv(path, method="linear"):
+    """
+    Fit a calibration from a CSV of reference measurements.
+    Each row is either "voltage,dBm" or "adc_code,dBm" (codes are whole numbers above VREF).
+    """
+    data = np.loadtxt(path, delimiter=",", ndmin=2, comments="#")
+    x, dbm = data[:, 0], data[:, 1]
+    voltages = code_to_voltage(x) if x.max() > RFMETER_DEF_VREF else x
+    return Calibration(voltages, dbm, method, name=os.path.basename(path))
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python RFCalibration.py measurements.csv [linear|pchip]")
+        calibration = load_calibration()
+        for code in (0, 819, 1638, 2458, 3277, 4095):
+            print(f"ADC {code:4d} | {code_to_voltage(code):.3f} V | {calibration.to_dbm(code):7.2f} dBm")
+        return
+
+    method = sys.argv[2] if len(sys.argv) > 2 else "linear"
+    calibration = fit_from_csv(sys.argv[1], method)
+    path = save_new_calibration(calibration)
+    print(f"Saved calibration v{calibration.version} ({len(calibration.voltages)} points, {method}) to {path}")
+
+
+if __name__ == "__main__":
+    main()
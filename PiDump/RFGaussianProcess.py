@@ -0,0 +1,165 @@
+import time
+import numpy as np
+from scipy.linalg import solve_triangular
+
+from RFSweepScan import PRIMARY_START_ANGLE, PRIMARY_END_ANGLE, MICRO_START_ANGLE, MICRO_END_ANGLE
+from ServoTrajectory import move_cost
+
+# Gaussian-process RF field model with active sampling.
+# Instead of a uniform grid the scanner keeps a GP posterior of dBm over
+# (pan, tilt) and moves next to where the posterior variance is largest, discounted
+# by how long the servos take to get there. Adding a sample only appends a row to
+# the Cholesky factor, and the posterior over the candidate grid is kept as
+# V = L^-1 K(X, grid) and z = L^-1 (y - prior), so each new sample updates the mean
+# and variance maps in O(n m) and each decision stays in the millisecond range.
+
+# Kernel hyperparameters (squared exponential)
+LENGTH_SCALE = 12.0  # Degrees
+SIGNAL_STD = 12.0  # dB
+NOISE_STD = 1.0  # dB
+PRIOR_MEAN = -50.0  # dBm
+
+# Active sampling settings
+GRID_STEP = 2.0  # Candidate grid resolution in degrees
+TRAVEL_WEIGHT = 4.0  # Per second of servo travel, variance is divided by (1 + weight * time)
+TARGET_STD = 2.0  # Stop once the largest posterior std is below this (dB)
+MAX_SAMPLES = 200
+
+
+def sq_exp(a, b, length_scale=LENGTH_SCALE, signal_std=SIGNAL_STD):
+    """Squared-exponential kernel between point sets a (n, 2) and b (m, 2)."""
+    d2 = ((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=-1)
+    return signal_std ** 2 * np.exp(-0.5 * d2 / length_scale ** 2)
+
+
+class IncrementalGP:
+    """GP posterior on a fixed candidate grid, updated one sample at a time."""
+
+    def __init__(self, grid_points, capacity=MAX_SAMPLES, length_scale=LENGTH_SCALE,
+                 signal_std=SIGNAL_STD, noise_std=NOISE_STD, prior_mean=PRIOR_MEAN):
+        self.grid = np.asarray(grid_points, dtype=np.float64)
+        self.length_scale = length_scale
+        self.signal_std = signal_std
+        self.noise_var = noise_std ** 2
+        self.prior_mean = prior_mean
+        self.capacity = capacity
+
+        m = len(self.grid)
+        self.n = 0
+        self.X = np.zeros((capacity, 2))
+        self.y = np.zeros(capacity)
+        self.L = np.zeros((capacity, capacity))
+        self.z = np.zeros(capacity)
+        self.V = np.zeros((capacity, m))
+        self.mean = np.full(m, float(prior_mean))
+        self.var = np.full(m, signal_std ** 2)
+
+    def kernel(self, a, b):
+        return sq_exp(a, b, self.length_scale, self.signal_std)
+
+    def add(self, point, value):
+        """Append one observation: rank-one extension of the Cholesky factor and the grid posterior."""
+        if self.n >= self.capacity:
+            raise RuntimeError("IncrementalGP capacity reached")
+        n = self.n
+        x = np.asarray(point, dtype=np.float64).reshape(1, 2)
+        k_new = self.kernel(self.X[:n], x)[:, 0]
+        if n:
+            l = solve_triangular(self.L[:n, :n], k_new, lower=True, check_finite=False)
+        else:
+            l = np.zeros(0)
+        d = np.sqrt(max(self.signal_std ** 2 + self.noise_var - l @ l, 1e-12))
+
+        self.L[n, :n] = l
+        self.L[n, n] = d
+        self.X[n] = x
+        self.y[n] = value
+        self.z[n] = (value - self.prior_mean - l @ self.z[:n]) / d
+
+        v = (self.kernel(x, self.grid)[0] - l @ self.V[:n]) / d
+        self.V[n] = v
+        self.mean += v * self.z[n]
+        self.var -= v ** 2
+        np.maximum(self.var, 0, out=self.var)
+        self.n += 1
+
+    def std(self):
+        return np.sqrt(self.var)
+
+    def predict(self, points):
+        """Posterior mean and variance at arbitrary points (full solve, for checking)."""
+        points = np.asarray(points, dtype=np.float64)
+        n = self.n
+        ks = self.kernel(self.X[:n], points)
+        v = solve_triangular(self.L[:n, :n], ks, lower=True, check_finite=False)
+        mean = self.prior_mean + v.T @ self.z[:n]
+        var = self.signal_std ** 2 - (v ** 2).sum(axis=0)
+        return mean, var
+
+
+class ActiveRFScanner:
+    """
+    Picks waypoints by posterior variance / (1 + TRAVEL_WEIGHT * travel time).
+    measure(pan, tilt) moves the servos and returns dBm.
+    """
+
+    def __init__(self, measure, grid_step=GRID_STEP, travel_weight=TRAVEL_WEIGHT, target_std=TARGET_STD,
+                 max_samples=MAX_SAMPLES, start=(PRIMARY_START_ANGLE, MICRO_START_ANGLE)):
+        self.measure = measure
+        self.pan = np.arange(PRIMARY_START_ANGLE, PRIMARY_END_ANGLE + grid_step / 2, grid_step)
+        self.tilt = np.arange(MICRO_END_ANGLE, MICRO_START_ANGLE + grid_step / 2, grid_step)
+        grid_pan, grid_tilt = np.meshgrid(self.pan, self.tilt)
+        self.grid = np.column_stack([grid_pan.ravel(), grid_tilt.ravel()])
+        self.gp = IncrementalGP(self.grid, capacity=max_samples)
+        self.travel_weight = travel_weight
+        self.target_std = target_std
+        self.max_samples = max_samples
+        self.position = np.asarray(start, dtype=np.float64)
+        self.decision_times = []
+
+    def next_waypoint(self):
+        travel = move_cost(self.position, self.grid)
+        score = self.gp.var / (1 + self.travel_weight * travel)
+        return self.grid[int(np.argmax(score))]
+
+    def step(self):
+        start = time.perf_counter()
+        target = self.next_waypoint()
+        self.decision_times.append(time.perf_counter() - start)
+        value = self.measure(*target)
+        start = time.perf_counter()
+        self.gp.add(target, value)
+        self.decision_times[-1] += time.perf_counter() - start
+        self.position = target
+        return target, value
+
+    def run(self):
+        while self.gp.n < self.max_samples and np.sqrt(self.gp.var.max()) > self.target_std:
+            self.step()
+        return self.maps()
+
+    def maps(self):
+        """(mean_map, std_map) with row 0 at the lowest tilt."""
+        shape = (len(self.tilt), len(self.pan))
+        return self.gp.mean.reshape(shape), self.gp.std().reshape(shape)
+
+
+def main():
+    from RFTracker import SimulatedEmitterField
+
+    field = SimulatedEmitterField(70.0, 120.0, width=15.0, noise=0.5)
+    scanner = ActiveRFScanner(field.measure)
+    mean_map, std_map = scanner.run()
+
+    grid_pan, grid_tilt = np.meshgrid(scanner.pan, scanner.tilt)
+    field.noise = 0.0
+    truth = np.array([field.measure(p, t) for p, t in zip(grid_pan.ravel(), grid_tilt.ravel())]).reshape(mean_map.shape)
+    print(f"{scanner.gp.n} samples (uniform 10° grid: 117) | max std {std_map.max():.2f} dB | "
+          f"RMS map error {np.sqrt(np.mean((mean_map - truth) ** 2)):.2f} dB")
+    times = np.array(scanner.decision_times) * 1000
+    print(f"Decision + update time: median {np.median(times):.2f} ms, max {times.max():.2f} ms "
+          f"over a {len(scanner.grid)}-point candidate grid")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import hashlib
+import numpy as np
+import cv2
+from scipy import sparse
+from scipy.sparse.linalg import splu
+from scipy.spatial import Delaunay, cKDTree
+
+# Scattered-data RF map interpolation.
+# Takes arbitrary (pan, tilt, dBm) samples and renders them onto any output raster.
+# All the geometry (triangulation, barycentric weights, neighbour lists, RBF
+# system) depends only on where the samples were taken, so it is built once per
+# sample layout and cached as a sparse matrix. Re-rendering with new dBm values or
+# a different colormap is then a single sparse matrix-vector product.
+# Samples repeated at the same (pan, tilt), such as the forward and reverse passes
+# of one scan, are averaged into a single point before any weights are built.
+
+METHODS = ("linear", "idw", "rbf")
+
+# IDW settings
+IDW_NEIGHBOURS = 8
+IDW_POWER = 2.0
+
+# RBF settings (compactly supported Wendland C2 kernel keeps the query matrix sparse)
+RBF_RADIUS = 25.0  # Degrees
+RBF_SMOOTHING = 0.01  # Nugget relative to the kernel peak, absorbs reading noise between nearby samples
+
+CACHE_SIZE = 8
+_cache = {}
+
+
+def wendland(r, radius):
+    """Wendland C2 kernel: positive definite, zero beyond radius."""
+    q = np.clip(r / radius, 0.0, 1.0)
+    return (1 - q) ** 4 * (4 * q + 1)
+
+
+def samples_from_rows(rf_data, pan_angles, tilt_angles):
+    """
+    Flatten the boustrophedon rf_data rows into (pan, tilt, dBm) arrays.
+    Odd rows were swept in reverse, so they are paired with the reversed pan angles.
+    """
+    pan, tilt, dbm = [], [], []
+    for row_index, row in enumerate(rf_data):
+        angles = pan_angles if row_index % 2 == 0 else pan_angles[::-1]
+        pan.extend(angles[:len(row)])
+        tilt.extend([tilt_angles[row_index]] * len(row))
+        dbm.extend(row)
+    return np.array(pan, dtype=np.float64), np.array(tilt, dtype=np.float64), np.array(dbm, dtype=np.float64)
+
+
+class RFInterpolator:
+    """
+    Precomputed interpolation from a fixed sample layout to a fixed output raster.
+    pan_out/tilt_out are the 1-D pixel-centre angles of the output columns/rows.
+    """
+
+    def __init__(self, pan, tilt, pan_out, tilt_out, method="linear"):
+        if method not in METHODS:
+            raise ValueError(f"Unknown interpolation method '{method}', expected one of {METHODS}")
+        points = np.column_stack([pan, tilt]).astype(np.float64)
+        self.points, inverse, counts = np.unique(points, axis=0, return_inverse=True, return_counts=True)
+        inverse = inverse.ravel()
+        # Sample values -> mean value at each distinct point
+        self.average = sparse.csr_matrix((1.0 / counts[inverse], (inverse, np.arange(len(points)))),
+                                         shape=(len(self.points), len(points)))
+        self.shape = (len(tilt_out), len(pan_out))
+        self.method = method
+        grid_pan, grid_tilt = np.meshgrid(pan_out, tilt_out)
+        queries = np.column_stack([grid_pan.ravel(), grid_tilt.ravel()])
+
+        self.rbf_lu = None
+        if method == "linear":
+            self.weights = self.linear_weights(queries)
+        elif method == "idw":
+            self.weights = self.idw_weights(queries)
+        else:
+            self.weights = self.rbf_weights(queries)
+
+    def linear_weights(self, queries):
+        """Barycentric weights on the Delaunay triangulation, nearest sample outside the hull."""
+        n_queries, n_samples = len(queries), len(self.points)
+        centred = self.points - self.points.mean(axis=0)
+        if n_samples < 3 or np.linalg.matrix_rank(centred) < 2:
+            # Collinear samples (e.g. a scan interrupted during its first row) have no triangulation
+            return self.line_weights(queries, centred)
+        triangulation = Delaunay(self.points)
+        simplex = triangulation.find_simplex(queries)
+        inside = simplex >= 0
+
+        transform = triangulation.transform[simplex[inside]]
+        delta = queries[inside] - transform[:, 2]
+        bary = np.einsum("ijk,ik->ij", transform[:, :2], delta)
+        bary = np.column_stack([bary, 1 - bary.sum(axis=1)])
+        vertices = triangulation.simplices[simplex[inside]]
+
+        rows_inside = np.repeat(np.flatnonzero(inside), 3)
+        outside = np.flatnonzero(~inside)
+        _, nearest = cKDTree(self.points).query(queries[outside])
+
+        rows = np.concatenate([rows_inside, outside])
+        cols = np.concatenate([vertices.ravel(), nearest])
+        data = np.concatenate([bary.ravel(), np.ones(len(outside))])
+        return sparse.csr_matrix((data, (rows, cols)), shape=(n_queries, n_samples))
+
+    def line_weights(self, queries, centred):
+        """1-D linear interpolation along the line the samples lie on, held constant past the ends."""
+        n_queries, n_samples = len(queries), len(self.points)
+        if n_samples == 1 or not centred.any():
+            return sparse.csr_matrix((np.ones(n_queries), (np.arange(n_queries), np.zeros(n_queries, dtype=int))),
+                                     shape=(n_queries, n_samples))
+        direction = np.linalg.svd(centred, full_matrices=False)[2][0]
+        position = centred @ direction
+        order = np.argsort(position)
+        position = position[order]
+        query = np.clip((queries - self.points.mean(axis=0)) @ direction, position[0], position[-1])
+        right = np.clip(np.searchsorted(position, query), 1, n_samples - 1)
+        left = right - 1
+        fraction = (query - position[left]) / (position[right] - position[left])
+        rows = np.repeat(np.arange(n_queries), 2)
+        cols = np.column_stack([order[left], order[right]]).ravel()
+        data = np.column_stack([1 - fraction, fraction]).ravel()
+        return sparse.csr_matrix((data, (rows, cols)), shape=(n_queries, n_samples))
+
+    def idw_weights(self, queries):
+        """Inverse-distance weights over the k nearest samples."""
+        n_queries, n_samples = len(queries), len(self.points)
+        k = min(IDW_NEIGHBOURS, n_samples)
+        distance, index = cKDTree(self.points).query(queries, k=k)
+        distance = distance.reshape(n_queries, k)
+        index = index.reshape(n_queries, k)
+        with np.errstate(divide="ignore"):
+            weights = 1.0 / distance ** IDW_POWER
+        # A query sitting exactly on a sample takes that sample's value
+        exact = np.isinf(weights)
+        weights[exact.any(axis=1)] = exact[exact.any(axis=1)].astype(np.float64)
+        weights /= weights.sum(axis=1, keepdims=True)
+        rows = np.repeat(np.arange(n_queries), k)
+        return sparse.csr_matrix((weights.ravel(), (rows, index.ravel())), shape=(n_queries, n_samples))
+
+    def rbf_weights(self, queries):
+        """
+        Sparse kernel matrix from queries to the distinct sample points. The
+        sample-to-sample system is sparse too (compact kernel), so it is LU-factored
+        once here and render() only does the two triangular solves.
+        """
+        tree = cKDTree(self.points)
+        # Points are distinct, so the only zero distances (which sparse_distance_matrix
+        # drops) are on the diagonal, where the kernel is 1 plus the nugget
+        system = tree.sparse_distance_matrix(tree, RBF_RADIUS, output_type="coo_matrix")
+        kernel = sparse.csc_matrix((wendland(system.data, RBF_RADIUS), (system.row, system.col)),
+                                   shape=system.shape)
+        kernel = kernel + sparse.identity(len(self.points), format="csc") * (1.0 + RBF_SMOOTHING)
+        self.rbf_lu = splu(kernel.tocsc())
+
+        query_tree = cKDTree(queries)
+        distances = query_tree.sparse_distance_matrix(tree, RBF_RADIUS, output_type="coo_matrix")
+        data = wendland(distances.data, RBF_RADIUS)
+        # sparse_distance_matrix drops exact zero distances, add those back with weight 1
+        _, nearest = tree.query(queries)
+        on_sample = np.flatnonzero(np.linalg.norm(queries - self.points[nearest], axis=1) == 0)
+        rows = np.concatenate([distances.row, on_sample])
+        cols = np.concatenate([distances.col, nearest[on_sample]])
+        data = np.concatenate([data, np.ones(len(on_sample))])
+        return sparse.csr_matrix((data, (rows, cols)), shape=(len(queries), len(self.points)))
+
+    def render(self, values):
+        """Interpolate sample values onto the output raster (row 0 is the first tilt_out)."""
+        values = self.average @ np.asarray(values, dtype=np.float64)
+        if self.rbf_lu is not None:
+            mean = values.mean()
+            coefficients = self.rbf_lu.solve(values - mean)
+            return (self.weights @ coefficients + mean).reshape(self.shape)
+        return (self.weights @ values).reshape(self.shape)
+
+
+def layout_key(pan, tilt, pan_out, tilt_out, method):
+    digest = hashlib.sha1()
+    for array in (pan, tilt, pan_out, tilt_out):
+        digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+        digest.update(b"|")
+    digest.update(method.encode())
+    return digest.hexdigest()
+
+
+def get_interpolator(pan, tilt, pan_out, tilt_out, method="linear"):
+    """Return a cached RFInterpolator for this sample layout and output raster."""
+    key = layout_key(pan, tilt, pan_out, tilt_out, method)
+    interpolator = _cache.pop(key, None)
+    if interpolator is None:
+        interpolator = RFInterpolator(pan, tilt, pan_out, tilt_out, method)
+    _cache[key] = interpolator  # Re-insert so the dict order tracks recent use
+    while len(_cache) > CACHE_SIZE:
+        del _cache[next(iter(_cache))]
+    return interpolator
+
+
+def render_rf_map(pan, tilt, dbm, width, height, pan_range=None, tilt_range=None, method="linear"):
+    """
+    Render samples to a width x height float image covering pan_range x tilt_range.
+    The top image row is the highest tilt, matching how the scans are displayed.
+    """
+    pan_range = pan_range or (np.min(pan), np.max(pan))
+    tilt_range = tilt_range or (np.min(tilt), np.max(tilt))
+    pan_out = np.linspace(pan_range[0], pan_range[1], width)
+    tilt_out = np.linspace(tilt_range[1], tilt_range[0], height)
+    return get_interpolator(pan, tilt, pan_out, tilt_out, method).render(dbm)
+
+
+def colorize(rf_image, min_val=-60, max_val=0, colormap=None):
+    """Map a dBm image to a BGR heatmap, strongest signal red."""
+    colormap = cv2.COLORMAP_JET if colormap is None else colormap
+    normalized = np.clip((rf_image - min_val) / (max_val - min_val), 0, 1) * 255
+    return cv2.applyColorMap(normalized.astype(np.uint8), colormap)
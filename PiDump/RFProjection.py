@@ -0,0 +1,218 @@
+import os
+import sys
+import json
+import numpy as np
+import cv2
+
+# Pan/tilt -> camera pixel projection for RF overlays.
+# The RF antenna is steered by the servos while the camera stays fixed, so a
+# servo direction (pan, tilt) is turned into a unit ray in the camera frame via
+# the mount offset rotation and then projected with the pinhole intrinsics.
+# For overlays the inverse is precomputed once: every camera pixel gets the
+# (pan, tilt) it looks along, baked into cv2.remap maps, so placing an RF image on
+# a live frame is a single remap.
+#
+# Calibrate with known-emitter fixes: scan an emitter at a few positions, note the
+# servo angles where the RF peaked and the pixel where the emitter shows in the
+# camera, then run: python RFProjection.py fixes.csv [width height]
+
+# Servo angle that points the antenna along the camera's optical axis
+PAN_CENTER = 60.0
+TILT_CENTER = 120.0
+PAN_SIGN = -1.0  # Increasing pan angle turns the antenna to the left in the image
+TILT_SIGN = 1.0  # Increasing tilt angle raises the antenna
+
+# Pi Camera v2 field of view, used when no intrinsics are calibrated
+CAMERA_HFOV = 62.2
+CAMERA_VFOV = 48.8
+
+PROJECTION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calibrations", "rf_projection.json")
+
+
+def rotation_matrix(yaw, pitch, roll):
+    """Rotation (degrees) applied to mount rays to express them in the camera frame."""
+    yaw, pitch, roll = np.radians([yaw, pitch, roll])
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    cr, sr = np.cos(roll), np.sin(roll)
+    r_yaw = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+    r_pitch = np.array([[1, 0, 0], [0, cp, -sp], [0, sp, cp]])
+    r_roll = np.array([[cr, -sr, 0], [sr, cr, 0], [0, 0, 1]])
+    return r_roll @ r_pitch @ r_yaw
+
+
+def intrinsics_from_fov(width, height, hfov=CAMERA_HFOV, vfov=CAMERA_VFOV):
+    """Pinhole camera matrix for an undistorted camera with the given field of view."""
+    fx = (width / 2) / np.tan(np.radians(hfov) / 2)
+    fy = (height / 2) / np.tan(np.radians(vfov) / 2)
+    return np.array([[fx, 0, width / 2], [0, fy, height / 2], [0, 0, 1]], dtype=np.float64)
+
+
+class PanTiltProjection:
+    """Maps servo angles to camera pixels and back."""
+
+    def __init__(self, camera_matrix, yaw=0.0, pitch=0.0, roll=0.0, pan_center=PAN_CENTER,
+                 tilt_center=TILT_CENTER, pan_sign=PAN_SIGN, tilt_sign=TILT_SIGN):
+        self.camera_matrix = np.asarray(camera_matrix, dtype=np.float64)
+        self.yaw, self.pitch, self.roll = yaw, pitch, roll
+        self.pan_center = pan_center
+        self.tilt_center = tilt_center
+        self.pan_sign = pan_sign
+        self.tilt_sign = tilt_sign
+        self.rotation = rotation_matrix(yaw, pitch, roll)
+
+    def rays(self, pan, tilt):
+        """Unit rays in the camera frame (x right, y down, z forward) for servo angles."""
+        azimuth = np.radians(self.pan_sign * (np.asarray(pan, dtype=np.float64) - self.pan_center))
+        elevation = np.radians(self.tilt_sign * (np.asarray(tilt, dtype=np.float64) - self.tilt_center))
+        mount = np.stack([np.cos(elevation) * np.sin(azimuth),
+                          -np.sin(elevation),
+                          np.cos(elevation) * np.cos(azimuth)], axis=-1)
+        return mount @ self.rotation.T
+
+    def project(self, pan, tilt):
+        """Pixel coordinates (u, v) for servo angles; NaN for directions behind the camera."""
+        rays = self.rays(pan, tilt)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(rays[..., 2] > 1e-6, rays[..., 2], np.nan)
+            u = self.camera_matrix[0, 0] * rays[..., 0] / z + self.camera_matrix[0, 2]
+            v = self.camera_matrix[1, 1] * rays[..., 1] / z + self.camera_matrix[1, 2]
+        return u, v
+
+    def unproject(self, u, v):
+        """Servo angles (pan, tilt) that look along the ray through pixel (u, v)."""
+        x = (np.asarray(u, dtype=np.float64) - self.camera_matrix[0, 2]) / self.camera_matrix[0, 0]
+        y = (np.asarray(v, dtype=np.float64) - self.camera_matrix[1, 2]) / self.camera_matrix[1, 1]
+        rays = np.stack([x, y, np.ones_like(x)], axis=-1)
+        rays /= np.linalg.norm(rays, axis=-1, keepdims=True)
+        mount = rays @ self.rotation  # Inverse rotation
+        azimuth = np.degrees(np.arctan2(mount[..., 0], mount[..., 2]))
+        elevation = np.degrees(np.arcsin(np.clip(-mount[..., 1], -1, 1)))
+        return (self.pan_center + self.pan_sign * azimuth,
+                self.tilt_center + self.tilt_sign * elevation)
+
+    def to_dict(self):
+        return {"camera_matrix": self.camera_matrix.tolist(), "yaw": self.yaw, "pitch": self.pitch,
+                "roll": self.roll, "pan_center": self.pan_center, "tilt_center": self.tilt_center,
+                "pan_sign": self.pan_sign, "tilt_sign": self.tilt_sign}
+
+    def save(self, path=PROJECTION_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path=PROJECTION_FILE):
+        with open(path) as f:
+            return cls(**json.load(f))
+
+
+def load_projection(width, height, path=PROJECTION_FILE):
+    """Load the saved projection, or an uncalibrated one derived from the camera FOV."""
+    if os.path.exists(path):
+        return PanTiltProjection.load(path)
+    print("No RF projection calibration found, assuming the mount is aligned with the camera")
+    return PanTiltProjection(intrinsics_from_fov(width, height))
+
+
+def calibrate_projection(observations, camera_matrix, pan_center=PAN_CENTER, tilt_center=TILT_CENTER,
+                         pan_sign=PAN_SIGN, tilt_sign=TILT_SIGN):
+    """
+    Fit the mount offset from a known emitter seen at several positions.
+    observations is a list of (peak_pan, peak_tilt, pixel_u, pixel_v): the servo angles
+    where the RF scan peaked and the pixel where the emitter appears in the camera.
+    With one observation only yaw and pitch are fitted; two or more also fit roll.
+    """
+    from scipy.optimize import least_squares
+
+    observations = np.asarray(observations, dtype=np.float64).reshape(-1, 4)
+    pan, tilt, u, v = observations.T
+    fit_roll = len(observations) >= 2
+
+    def residuals(params):
+        yaw, pitch = params[:2]
+        roll = params[2] if fit_roll else 0.0
+        projection = PanTiltProjection(camera_matrix, yaw, pitch, roll, pan_center, tilt_center,
+                                       pan_sign, tilt_sign)
+        pu, pv = projection.project(pan, tilt)
+        return np.nan_to_num(np.concatenate([pu - u, pv - v]), nan=1e6)
+
+    start = np.zeros(3 if fit_roll else 2)
+    result = least_squares(residuals, start)
+    yaw, pitch = result.x[:2]
+    roll = result.x[2] if fit_roll else 0.0
+    error = np.sqrt(np.mean(result.fun ** 2))
+    print(f"Mount offset: yaw {yaw:.2f}°, pitch {pitch:.2f}°, roll {roll:.2f}° (RMS error {error:.1f} px)")
+    return PanTiltProjection(camera_matrix, yaw, pitch, roll, pan_center, tilt_center, pan_sign, tilt_sign)
+
+
+class RFOverlay:
+    """
+    Cached camera-pixel -> RF-grid lookup for one projection, RF grid layout and frame size.
+    The RF image is indexed [row, col] with row 0 at tilt_range[1] (top) and col 0 at pan_range[0].
+    """
+
+    def __init__(self, projection, width, height, pan_range, tilt_range, rf_shape):
+        self.width = width
+        self.height = height
+        self.rf_shape = rf_shape
+        u, v = np.meshgrid(np.arange(width, dtype=np.float64), np.arange(height, dtype=np.float64))
+        pan, tilt = projection.unproject(u, v)
+
+        rows, cols = rf_shape
+        col = (pan - pan_range[0]) / (pan_range[1] - pan_range[0]) * (cols - 1)
+        row = (tilt_range[1] - tilt) / (tilt_range[1] - tilt_range[0]) * (rows - 1)
+        self.mask = (col >= 0) & (col <= cols - 1) & (row >= 0) & (row <= rows - 1)
+        self.covered = self.mask[..., None]
+        # Fixed-point maps make the per-frame remap considerably faster
+        self.map1, self.map2 = cv2.convertMaps(col.astype(np.float32), row.astype(np.float32),
+                                               cv2.CV_16SC2)
+
+    def warp(self, rf_image):
+        """Resample an RF image (dBm or colour) into camera pixel space."""
+        return cv2.remap(rf_image, self.map1, self.map2, cv2.INTER_LINEAR,
+                         borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+
+    def blend(self, frame, rf_colormap, alpha=0.5):
+        """Blend a coloured RF map onto a camera frame where the scan covers it."""
+        warped = self.warp(rf_colormap)
+        out = frame.copy()
+        blended = cv2.addWeighted(frame, 1 - alpha, warped, alpha, 0)
+        np.copyto(out, blended, where=self.covered)
+        return out
+
+
+def splat_samples(projection, pan, tilt):
+    """Integer pixel positions of sample directions, for drawing sample markers."""
+    u, v = projection.project(pan, tilt)
+    valid = np.isfinite(u) & np.isfinite(v)
+    return np.round(u[valid]).astype(np.int32), np.round(v[valid]).astype(np.int32), valid
+
+
+def fit_from_csv(path, width, height):
+    """
+    Fit the projection from a CSV of known-emitter fixes, one "peak_pan,peak_tilt,pixel_u,pixel_v"
+    per row. The camera matrix is kept from the saved projection if there is one.
+    """
+    observations = np.loadtxt(path, delimiter=",", ndmin=2, comments="#")
+    camera_matrix = load_projection(width, height).camera_matrix
+    return calibrate_projection(observations, camera_matrix)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python RFProjection.py fixes.csv [width height]")
+        projection = load_projection(640, 480)
+        for pan, tilt in ((PAN_CENTER, TILT_CENTER), (PAN_CENTER - 20, TILT_CENTER), (PAN_CENTER, TILT_CENTER + 15)):
+            u, v = projection.project(pan, tilt)
+            print(f"Pan {pan:5.1f}° | Tilt {tilt:5.1f}° -> pixel ({float(u):6.1f}, {float(v):6.1f})")
+        return
+
+    width, height = (int(sys.argv[2]), int(sys.argv[3])) if len(sys.argv) > 3 else (640, 480)
+    projection = fit_from_csv(sys.argv[1], width, height)
+    projection.save()
+    print(f"Saved RF projection to {PROJECTION_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import numpy as np
+
+from RFScanGrid import RFScanGrid, GridAxes, PAN_STEP, TILT_STEP
+from RFSweepScan import PRIMARY_START_ANGLE, PRIMARY_END_ANGLE, MICRO_START_ANGLE, MICRO_END_ANGLE
+
+# Robust per-cell statistics for repeated RF passes.
+# Multipath spikes (RFReflections.png, RFSpotty.png) land straight in the heatmap
+# when every reading is averaged in. Each cell here also keeps its newest WINDOW raw
+# readings; a new reading is compared with the window median and MAD (Hampel
+# filter) as it arrives, and only inliers reach the Welford mean/variance of the
+# underlying RFScanGrid. Every reading still enters the window, so a genuine
+# change of level takes over after half a window instead of being rejected forever.
+# Batches and whole passes are merged cell-wise with array operations, so the
+# noise-reduced map is ready as soon as the scan ends.
+
+WINDOW = 9  # Raw readings kept per cell for the running median
+HAMPEL_SIGMAS = 3.0  # Reject readings further than this many robust sigmas from the median
+MIN_SIGMA = 0.5  # dB, floor on the robust sigma so a quiet cell doesn't reject its own noise
+MIN_HISTORY = 3  # Readings needed in the window before anything is rejected
+MAD_TO_SIGMA = 1.4826  # MAD of a normal distribution -> standard deviation
+
+
+class RobustRFScanGrid(RFScanGrid):
+    """RFScanGrid whose mean/variance only include readings that pass a per-cell Hampel filter."""
+
+    def __init__(self, axes, window=WINDOW, sigmas=HAMPEL_SIGMAS, min_sigma=MIN_SIGMA, min_history=MIN_HISTORY):
+        super().__init__(axes)
+        self.sigmas = sigmas
+        self.min_sigma = min_sigma
+        self.min_history = min_history
+        # Chronological per cell: NaN padding first, newest reading last
+        self.window = np.full(axes.shape + (window,), np.nan)
+        self.rejected = np.zeros(axes.shape, dtype=np.int64)
+
+    @classmethod
+    def for_scan(cls, pan_step=PAN_STEP, tilt_step=TILT_STEP, **kwargs):
+        return cls(GridAxes.regular((PRIMARY_START_ANGLE, PRIMARY_END_ANGLE),
+                                    (MICRO_END_ANGLE, MICRO_START_ANGLE), pan_step, tilt_step), **kwargs)
+
+    def inliers(self, flat, values):
+        """Hampel test of values against the windows of the flat cell indices."""
+        window = self.window.reshape(-1, self.window.shape[-1])[flat]
+        history = np.count_nonzero(~np.isnan(window), axis=1)
+        inlier = history < self.min_history
+        ready = ~inlier
+        if ready.any():
+            median = np.nanmedian(window[ready], axis=1)
+            sigma = MAD_TO_SIGMA * np.nanmedian(np.abs(window[ready] - median[:, None]), axis=1)
+            inlier[ready] = np.abs(values[ready] - median) <= self.sigmas * np.maximum(sigma, self.min_sigma)
+        return inlier
+
+    def push(self, flat, values):
+        """Append one reading to each of the (distinct) flat cells' windows."""
+        window = self.window.reshape(-1, self.window.shape[-1])
+        window[flat, :-1] = window[flat, 1:]
+        window[flat, -1] = values
+
+    def add(self, pan, tilt, value, timestamp=0.0):
+        """Filter and add a single reading; returns False if it was off the grid or rejected."""
+        row, col = self.axes.index(pan, tilt)
+        if row < 0:
+            return False
+        flat = np.array([row * self.axes.shape[1] + col])
+        value = np.array([value], dtype=np.float64)
+        inlier = bool(self.inliers(flat, value)[0])
+        self.push(flat, value)
+        if not inlier:
+            self.rejected.reshape(-1)[flat] += 1
+            return False
+        return super().add(pan, tilt, value[0], timestamp)
+
+    def add_many(self, pan, tilt, values, timestamps=None):
+        """
+        Filter and merge a batch. Readings of the same cell are taken in arrival order:
+        round k handles the k-th reading of every cell at once, so each is tested
+        against a window that includes the ones before it.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        row, col = self.axes.index(pan, tilt)
+        valid = (row >= 0) & np.isfinite(values)
+        flat = (row * self.axes.shape[1] + col)[valid]
+        values = values[valid]
+        if not len(flat):
+            return
+        timestamps = None if timestamps is None else np.asarray(timestamps, dtype=np.float64)[valid]
+
+        # Rank of each reading among the readings of its cell, preserving arrival order
+        order = np.argsort(flat, kind="stable")
+        sorted_flat = flat[order]
+        starts = np.flatnonzero(np.r_[True, sorted_flat[1:] != sorted_flat[:-1]])
+        counts = np.diff(np.r_[starts, len(flat)])
+        rank = np.empty(len(flat), dtype=np.intp)
+        rank[order] = np.arange(len(flat)) - np.repeat(starts, counts)
+
+        accepted = np.zeros(len(flat), dtype=bool)
+        for k in range(int(rank.max()) + 1):
+            batch = np.flatnonzero(rank == k)
+            accepted[batch] = self.inliers(flat[batch], values[batch])
+            self.push(flat[batch], values[batch])
+        np.add.at(self.rejected.reshape(-1), flat[~accepted], 1)
+
+        cols = self.axes.pan[flat % self.axes.shape[1]]
+        rows = self.axes.tilt[flat // self.axes.shape[1]]
+        super().add_many(cols[accepted], rows[accepted], values[accepted],
+                         None if timestamps is None else timestamps[accepted])
+
+    def merge(self, other):
+        """Merge another pass cell-wise; windows keep the newest readings, this grid's first."""
+        super().merge(other)
+        self.rejected += other.rejected
+        combined = np.concatenate([self.window, other.window], axis=-1)
+        # Stable sort moves NaN padding to the front and keeps the readings in order
+        order = np.argsort(~np.isnan(combined), axis=-1, kind="stable")
+        combined = np.take_along_axis(combined, order, axis=-1)
+        self.window[:] = combined[..., -self.window.shape[-1]:]
+
+    def median(self, empty=np.nan):
+        """Running median of the raw readings per cell."""
+        history = np.count_nonzero(~np.isnan(self.window), axis=-1)
+        filled = np.where(np.isnan(self.window), np.inf, self.window)
+        filled.sort(axis=-1)
+        # Median of the first `history` sorted values of every cell
+        low = np.take_along_axis(filled, np.maximum((history - 1) // 2, 0)[..., None], axis=-1)[..., 0]
+        high = np.take_along_axis(filled, (history // 2)[..., None], axis=-1)[..., 0]
+        return np.where(history > 0, (low + high) / 2, empty)
+
+    def reset(self):
+        super().reset()
+        self.window.fill(np.nan)
+        self.rejected.fill(0)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    grid = RobustRFScanGrid.for_scan()
+    plain = RFScanGrid.for_scan()
+    pan, tilt = np.meshgrid(grid.axes.pan, grid.axes.tilt)
+    truth = -60 + 40 * np.exp(-((pan - 60) ** 2 + (tilt - 120) ** 2) / (2 * 20 ** 2))
+
+    # Forward and reverse passes over every cell, with 5% multipath spikes
+    for _ in range(8):
+        readings = truth + rng.normal(0, 1.0, truth.shape)
+        spikes = rng.random(truth.shape) < 0.05
+        readings[spikes] += rng.uniform(10, 25, spikes.sum())
+        grid.add_many(pan.ravel(), tilt.ravel(), readings.ravel())
+        plain.add_many(pan.ravel(), tilt.ravel(), readings.ravel())
+
+    print(f"Rejected {grid.rejected.sum()} of {grid.count.sum() + grid.rejected.sum()} readings")
+    print(f"RMS error: plain mean {np.sqrt(np.mean((plain.values() - truth) ** 2)):.2f} dB | "
+          f"Hampel mean {np.sqrt(np.mean((grid.values() - truth) ** 2)):.2f} dB | "
+          f"running median {np.sqrt(np.mean((grid.median() - truth) ** 2)):.2f} dB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import sys
+import time
+import threading
+import numpy as np
+
+from RFBurstSampler import BurstSampler, FakeSpiDev, load_spi_config, open_spi
+
+# Continuous MCP3201 sampler thread.
+# A dedicated thread reads the ADC as fast as the SPI bus allows, in small blocks,
+# into a preallocated ring buffer of (timestamp, ADC code). The buffer is mirrored:
+# every sample is written at i and i + capacity, so any window of up to `capacity`
+# samples is one contiguous numpy view and consumers (scanner, live plot, logger)
+# never copy. There is a single writer and it publishes the sample count only
+# after the data is in place, so readers need no lock. An optional spill thread
+# streams everything to a binary file so kHz transients are kept.
+
+CAPACITY = 1 << 16  # Samples kept in memory (~30 s at 2 kS/s)
+BLOCK = 32  # Conversions read per loop iteration
+
+SAMPLE_DTYPE = np.dtype([("timestamp", "<f8"), ("code", "<u2")])
+
+
+class RingBuffer:
+    """Single-producer mirrored ring buffer of timestamps and ADC codes."""
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.timestamps = np.zeros(2 * capacity, dtype=np.float64)
+        self.codes = np.zeros(2 * capacity, dtype=np.uint16)
+        self.written = 0  # Total samples ever written; the only shared state
+
+    def write(self, timestamps, codes):
+        n = len(codes)
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        for offset in (start, start + self.capacity):
+            self.timestamps[offset:offset + first] = timestamps[:first]
+            self.codes[offset:offset + first] = codes[:first]
+        if first < n:
+            rest = n - first
+            for offset in (0, self.capacity):
+                self.timestamps[offset:offset + rest] = timestamps[first:]
+                self.codes[offset:offset + rest] = codes[first:]
+        self.written += n  # Publish after the data is in place
+
+    def view(self, first, last):
+        """Views of samples [first, last) by absolute sequence number."""
+        start = first % self.capacity
+        end = start + (last - first)
+        return self.timestamps[start:end], self.codes[start:end]
+
+    def latest(self, count):
+        """Views of the newest `count` samples."""
+        written = self.written
+        count = min(count, written, self.capacity)
+        return self.view(written - count, written)
+
+    def since(self, sequence, limit=None):
+        """
+        Views of samples written after `sequence`, plus the new sequence and how many
+        samples were lost because the reader fell more than `capacity` behind.
+        """
+        written = self.written
+        lost = max(0, written - self.capacity - sequence)
+        first = sequence + lost
+        last = written if limit is None else min(written, first + limit)
+        times, codes = self.view(first, last)
+        return times, codes, last, lost
+
+
+class SamplerThread(threading.Thread):
+    """Reads blocks of conversions into a RingBuffer until stopped."""
+
+    def __init__(self, sampler, ring=None, block=BLOCK):
+        super().__init__(daemon=True)
+        self.sampler = sampler
+        self.ring = ring or RingBuffer()
+        self.block = block
+        self.running = threading.Event()
+        self.ramp = np.arange(1, block + 1, dtype=np.float64) / block
+
+    def run(self):
+        self.running.set()
+        previous = time.monotonic()
+        while self.running.is_set():
+            codes = self.sampler.read_codes(self.block)
+            now = time.monotonic()
+            # Spread the block's conversions evenly over the time it took to read
+            timestamps = previous + (now - previous) * self.ramp
+            self.ring.write(timestamps, codes)
+            previous = now
+
+    def stop(self):
+        self.running.clear()
+        self.join()
+
+    def rate(self, window=4096):
+        """Samples per second over the most recent window."""
+        times, _ = self.ring.latest(window)
+        if len(times) < 2 or times[-1] == times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+
+class SpillWriter(threading.Thread):
+    """Appends every sample in the ring buffer to a binary file of SAMPLE_DTYPE records."""
+
+    def __init__(self, ring, path, interval=0.2):
+        super().__init__(daemon=True)
+        self.ring = ring
+        self.path = path
+        self.interval = interval
+        self.sequence = ring.written
+        self.lost = 0
+        self.running = threading.Event()
+
+    def run(self):
+        self.running.set()
+        with open(self.path, "ab") as f:
+            while self.running.is_set():
+                time.sleep(self.interval)
+                self.flush(f)
+            self.flush(f)
+
+    def flush(self, f):
+        times, codes, self.sequence, lost = self.ring.since(self.sequence)
+        self.lost += lost
+        if len(codes):
+            records = np.empty(len(codes), dtype=SAMPLE_DTYPE)
+            records["timestamp"] = times
+            records["code"] = codes
+            records.tofile(f)
+
+    def stop(self):
+        self.running.clear()
+        self.join()
+
+
+def load_spill(path):
+    """Memory-map a spill file written by SpillWriter."""
+    return np.memmap(path, dtype=SAMPLE_DTYPE, mode="r")
+
+
+def main():
+    config = load_spi_config()
+    if "--fake" in sys.argv:
+        codes = (2048 + 200 * np.sin(np.linspace(0, 20 * np.pi, 4000))).astype(np.uint16)
+        spi = FakeSpiDev.from_codes(codes)
+    else:
+        spi = open_spi(config)
+
+    sampler_thread = SamplerThread(BurstSampler(spi), block=config["block"])
+    writer = SpillWriter(sampler_thread.ring, "rf_samples.bin")
+    sampler_thread.start()
+    writer.start()
+
+    print("Sampling RF... Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+            _, codes = sampler_thread.ring.latest(1000)
+            print(f"{sampler_thread.rate():8.0f} samples/s | last 1000: mean {codes.mean():7.1f}, "
+                  f"min {codes.min()}, max {codes.max()} | spill lost {writer.lost}")
+    except KeyboardInterrupt:
+        print("Exiting...")
+    finally:
+        sampler_thread.stop()
+        writer.stop()
+        spi.close()
+
+
+if __name__ == "__main__":
+    main()
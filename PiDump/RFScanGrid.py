@@ -0,0 +1,168 @@
+import numpy as np
+
+from RFSweepScan import PRIMARY_START_ANGLE, PRIMARY_END_ANGLE, MICRO_START_ANGLE, MICRO_END_ANGLE
+
+# Array-backed RF scan grid.
+# Replaces the rf_data list-of-lists (rf_row / reverse_rf_row) with preallocated
+# numpy arrays holding the running mean, sample count, Welford M2 and last
+# timestamp of every cell, indexed by angle rather than by sweep order. Repeated
+# passes are merged in place, slicing by angle returns views, and the mean array
+# can be handed straight to the renderer.
+
+PAN_STEP = 10
+TILT_STEP = 10
+
+
+class GridAxes:
+    """Angle axes of a grid. Row 0 is the lowest tilt, column 0 the lowest pan."""
+
+    __slots__ = ("pan", "tilt", "pan_step", "tilt_step")
+
+    def __init__(self, pan, tilt):
+        self.pan = np.asarray(pan, dtype=np.float64)
+        self.tilt = np.asarray(tilt, dtype=np.float64)
+        self.pan_step = float(self.pan[1] - self.pan[0]) if len(self.pan) > 1 else 1.0
+        self.tilt_step = float(self.tilt[1] - self.tilt[0]) if len(self.tilt) > 1 else 1.0
+
+    @classmethod
+    def regular(cls, pan_range, tilt_range, pan_step=PAN_STEP, tilt_step=TILT_STEP):
+        pan_low, pan_high = min(pan_range), max(pan_range)
+        tilt_low, tilt_high = min(tilt_range), max(tilt_range)
+        pan = np.arange(pan_low, pan_high + pan_step / 2, pan_step)
+        tilt = np.arange(tilt_low, tilt_high + tilt_step / 2, tilt_step)
+        return cls(pan, tilt)
+
+    @property
+    def shape(self):
+        return len(self.tilt), len(self.pan)
+
+    def index(self, pan, tilt):
+        """Nearest (row, col) for angle(s); -1 where the angle is off the grid."""
+        col = np.rint((np.asarray(pan, dtype=np.float64) - self.pan[0]) / self.pan_step).astype(np.intp)
+        row = np.rint((np.asarray(tilt, dtype=np.float64) - self.tilt[0]) / self.tilt_step).astype(np.intp)
+        off = (col < 0) | (col >= len(self.pan)) | (row < 0) | (row >= len(self.tilt))
+        return np.where(off, -1, row), np.where(off, -1, col)
+
+    def __repr__(self):
+        return (f"GridAxes(pan={self.pan[0]:g}..{self.pan[-1]:g} step {self.pan_step:g}, "
+                f"tilt={self.tilt[0]:g}..{self.tilt[-1]:g} step {self.tilt_step:g})")
+
+
+class RFScanGrid:
+    """Per-cell running statistics of RF readings on a fixed angle grid."""
+
+    def __init__(self, axes, mean=None, count=None, m2=None, timestamp=None):
+        self.axes = axes
+        shape = axes.shape
+        self.mean = np.zeros(shape, dtype=np.float64) if mean is None else mean
+        self.count = np.zeros(shape, dtype=np.int64) if count is None else count
+        self.m2 = np.zeros(shape, dtype=np.float64) if m2 is None else m2
+        self.timestamp = np.zeros(shape, dtype=np.float64) if timestamp is None else timestamp
+
+    @classmethod
+    def for_scan(cls, pan_step=PAN_STEP, tilt_step=TILT_STEP):
+        """Grid covering the servo scan ranges used by the scanners."""
+        return cls(GridAxes.regular((PRIMARY_START_ANGLE, PRIMARY_END_ANGLE),
+                                    (MICRO_END_ANGLE, MICRO_START_ANGLE), pan_step, tilt_step))
+
+    def add(self, pan, tilt, value, timestamp=0.0):
+        """Welford update of a single cell."""
+        row, col = self.axes.index(pan, tilt)
+        if row < 0:
+            return False
+        n = self.count[row, col] + 1
+        delta = value - self.mean[row, col]
+        self.mean[row, col] += delta / n
+        self.m2[row, col] += delta * (value - self.mean[row, col])
+        self.count[row, col] = n
+        self.timestamp[row, col] = max(self.timestamp[row, col], timestamp)
+        return True
+
+    def add_many(self, pan, tilt, values, timestamps=None):
+        """
+        Merge a batch of samples in place: per-cell batch statistics are computed with
+        bincount and combined with the existing cells using the parallel Welford formula.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        row, col = self.axes.index(pan, tilt)
+        valid = (row >= 0) & np.isfinite(values)
+        size = self.mean.size
+        flat = row[valid] * self.axes.shape[1] + col[valid]
+        values = values[valid]
+
+        n_b = np.bincount(flat, minlength=size)
+        touched = n_b > 0
+        sum_b = np.bincount(flat, weights=values, minlength=size)
+        mean_b = np.zeros(size)
+        mean_b[touched] = sum_b[touched] / n_b[touched]
+        m2_b = np.bincount(flat, weights=(values - mean_b[flat]) ** 2, minlength=size)
+
+        mean = self.mean.reshape(-1)
+        count = self.count.reshape(-1)
+        m2 = self.m2.reshape(-1)
+        n_a = count[touched]
+        n = n_a + n_b[touched]
+        delta = mean_b[touched] - mean[touched]
+        mean[touched] += delta * n_b[touched] / n
+        m2[touched] += m2_b[touched] + delta ** 2 * n_a * n_b[touched] / n
+        count[touched] = n
+
+        if timestamps is not None:
+            timestamps = np.asarray(timestamps, dtype=np.float64)[valid]
+            np.maximum.at(self.timestamp.reshape(-1), flat, timestamps)
+
+    def merge(self, other):
+        """Merge another grid with the same axes into this one, cell-wise."""
+        n_a, n_b = self.count, other.count
+        n = n_a + n_b
+        touched = n_b > 0
+        delta = other.mean - self.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.mean[touched] += (delta * n_b / n)[touched]
+            self.m2[touched] += (other.m2 + delta ** 2 * n_a * n_b / n)[touched]
+        self.count[:] = n
+        np.maximum(self.timestamp, other.timestamp, out=self.timestamp)
+
+    @property
+    def variance(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 1, self.m2 / (self.count - 1), np.nan)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def values(self, empty=np.nan):
+        """Mean per cell, empty cells filled with `empty` (a copy only if there are empty cells)."""
+        if self.count.all():
+            return self.mean
+        return np.where(self.count > 0, self.mean, empty)
+
+    def select(self, pan=None, tilt=None):
+        """Sub-grid covering pan=(low, high) / tilt=(low, high); the arrays are views."""
+        cols = slice(None)
+        rows = slice(None)
+        if pan is not None:
+            cols = slice(int(np.searchsorted(self.axes.pan, min(pan), "left")),
+                         int(np.searchsorted(self.axes.pan, max(pan), "right")))
+        if tilt is not None:
+            rows = slice(int(np.searchsorted(self.axes.tilt, min(tilt), "left")),
+                         int(np.searchsorted(self.axes.tilt, max(tilt), "right")))
+        axes = GridAxes(self.axes.pan[cols], self.axes.tilt[rows])
+        return RFScanGrid(axes, self.mean[rows, cols], self.count[rows, cols], self.m2[rows, cols],
+                          self.timestamp[rows, cols])
+
+    def image(self):
+        """Mean grid with the highest tilt on top, as the heatmaps are displayed (a view)."""
+        return self.mean[::-1]
+
+    def samples(self):
+        """(pan, tilt, dBm) of every populated cell, for RFInterpolate."""
+        rows, cols = np.nonzero(self.count)
+        return self.axes.pan[cols], self.axes.tilt[rows], self.mean[rows, cols]
+
+    def reset(self):
+        self.mean.fill(0)
+        self.count.fill(0)
+        self.m2.fill(0)
+        self.timestamp.fill(0)
@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import time
+import struct
+import numpy as np
+
+from RFBurstSampler import burst_stats
+
+# Append-only binary log of RF scan samples.
+# Every sample is written straight to disk as a fixed-size record so an
+# interrupted scan loses nothing, can be resumed from the last completed waypoint,
+# and can be re-rendered later by memory-mapping the file instead of parsing it.
+#
+# File layout: 8-byte magic, 4-byte little-endian header length, JSON header
+# (scan metadata and waypoint list) padded to a 64-byte boundary, then records.
+
+MAGIC = b"RFSCAN01"
+HEADER_ALIGN = 64
+FSYNC_EVERY = 32  # Records between fsyncs
+FSYNC_INTERVAL = 2.0  # Seconds between fsyncs, whichever comes first
+
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("waypoint", "<u4"),
+    ("pan", "<f4"),
+    ("tilt", "<f4"),
+    ("adc_mean", "<f4"),
+    ("adc_std", "<f4"),
+    ("adc_min", "<u2"),
+    ("adc_max", "<u2"),
+    ("count", "<u2"),
+    ("flags", "<u2"),
+    ("dbm", "<f4"),
+])
+
+
+def encode_header(metadata):
+    body = json.dumps(metadata).encode()
+    total = len(MAGIC) + 4 + len(body)
+    padding = (-total) % HEADER_ALIGN
+    return MAGIC + struct.pack("<I", len(body) + padding) + body + b" " * padding
+
+
+def read_header(f):
+    """Return (metadata, record_offset) for an open log file."""
+    magic = f.read(len(MAGIC))
+    if magic != MAGIC:
+        raise ValueError("Not an RF scan log")
+    (length,) = struct.unpack("<I", f.read(4))
+    metadata = json.loads(f.read(length).decode())
+    return metadata, len(MAGIC) + 4 + length
+
+
+class ScanLog:
+    """
+    Appends fixed-size records to a scan log.
+    Opening an existing log keeps its header and appends after the last whole record.
+    """
+
+    def __init__(self, path, metadata=None):
+        self.path = path
+        self.record = np.zeros(1, dtype=RECORD_DTYPE)
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                self.metadata, self.offset = read_header(f)
+            # Drop a partial record left behind by a crash mid-write
+            size = os.path.getsize(path)
+            whole = (size - self.offset) // RECORD_DTYPE.itemsize
+            self.file = open(path, "r+b")
+            self.file.truncate(self.offset + whole * RECORD_DTYPE.itemsize)
+            self.file.seek(0, os.SEEK_END)
+        else:
+            self.metadata = metadata or {}
+            header = encode_header(self.metadata)
+            self.offset = len(header)
+            self.file = open(path, "wb")
+            self.file.write(header)
+            self.sync()
+
+    def append(self, waypoint, pan, tilt, stats, dbm, flags=0):
+        """Write one sample; stats is a BurstStats in ADC codes."""
+        record = self.record[0]
+        record["timestamp"] = time.time()
+        record["waypoint"] = waypoint
+        record["pan"] = pan
+        record["tilt"] = tilt
+        record["adc_mean"] = stats.mean
+        record["adc_std"] = stats.std
+        record["adc_min"] = stats.min
+        record["adc_max"] = stats.max
+        record["count"] = stats.count
+        record["flags"] = flags
+        record["dbm"] = dbm
+        self.file.write(self.record.tobytes())
+        self.unsynced += 1
+        if self.unsynced >= FSYNC_EVERY or time.monotonic() - self.last_sync >= FSYNC_INTERVAL:
+            self.sync()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_log(path):
+    """Memory-map a scan log. Returns (metadata, records) without reading the records."""
+    with open(path, "rb") as f:
+        metadata, offset = read_header(f)
+    count = (os.path.getsize(path) - offset) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return metadata, np.zeros(0, dtype=RECORD_DTYPE)
+    return metadata, np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=offset, shape=(count,))
+
+
+def last_completed_waypoint(path):
+    """Index of the last waypoint with a record in the log, or -1."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return -1
+    _, records = load_log(path)
+    return int(records["waypoint"].max()) if len(records) else -1
+
+
+def resumable_scan(path, waypoints, move_to, read_codes, to_dbm, metadata=None):
+    """
+    Visit waypoints, logging each sample, skipping those already in the log at path.
+    read_codes() returns one burst of ADC codes; the ADC statistics are logged as they are
+    and the dBm value is the mean of the per-conversion dBm (the calibration is nonlinear,
+    so converting the mean code would bias it), like every other scanner.
+    """
+    metadata = dict(metadata or {})
+    metadata["waypoints"] = [list(map(float, point)) for point in waypoints]
+    resume_from = last_completed_waypoint(path) + 1
+    with ScanLog(path, metadata) as log:
+        if log.metadata.get("waypoints") != metadata["waypoints"]:
+            raise ValueError(f"{path} was recorded with a different scan plan")
+        if resume_from:
+            print(f"Resuming scan at waypoint {resume_from}/{len(waypoints)}")
+        for index in range(resume_from, len(waypoints)):
+            pan, tilt = waypoints[index]
+            move_to(pan, tilt)
+            codes = read_codes()
+            stats = burst_stats(codes)
+            dbm = float(np.mean(to_dbm(codes)))
+            log.append(index, pan, tilt, stats, dbm)
+            print(f"[{index + 1}/{len(waypoints)}] Primary {pan}° | Micro {tilt}° | RF Power: {dbm:.2f} dBm")
+    return load_log(path)
+
+
+def hardware_scan(path):
+    """Run (or resume) the boustrophedon grid on the hardware, logging to path."""
+    from RFBurstSampler import BurstSampler, open_spi
+    from RFCalibration import load_calibration
+    from ScanOrchestrator import ScanDefinition, hardware_servos
+
+    # RF-only scan: just the servos and the RF Meter, no thermal camera or Picamera2
+    mover = hardware_servos()
+    calibration = load_calibration()
+    waypoints = ScanDefinition.boustrophedon().waypoints
+    spi = None
+    try:
+        spi = open_spi()
+        sampler = BurstSampler(spi)  # Raw ADC codes; resumable_scan converts each one to dBm
+        # Bursts are read in the PWM low time so the servos stay pulsed at the waypoint
+        resumable_scan(path, waypoints, mover.move_to, mover.held(sampler.read_codes), calibration.to_dbm,
+                       {"calibration": calibration.version})
+    except KeyboardInterrupt:
+        print("Interrupted! Run again with the same log to resume.")
+    finally:
+        mover.primary_servo.release()
+        mover.micro_servo.release()
+        if spi is not None:
+            spi.close()
+
+
+def main():
+    import cv2
+    from RFInterpolate import render_rf_map, colorize
+
+    if len(sys.argv) < 2:
+        print("Usage: python RFScanLog.py scan.rflog [scan]")
+        return
+    if len(sys.argv) > 2 and sys.argv[2] == "scan":
+        hardware_scan(sys.argv[1])
+
+    start = time.perf_counter()
+    metadata, records = load_log(sys.argv[1])
+    print(f"Mapped {len(records)} records in {(time.perf_counter() - start) * 1000:.1f} ms")
+    if len(records) == 0:
+        return  # A single row or even a single point still renders (1-D interpolation)
+
+    # Later passes over the same waypoint replace earlier ones
+    _, last = np.unique(records["waypoint"][::-1], return_index=True)
+    latest = records[len(records) - 1 - last]
+    rf_image = render_rf_map(latest["pan"], latest["tilt"], latest["dbm"], 640, 480)
+    cv2.imshow("RF Power Heatmap (from log)", colorize(rf_image))
+    cv2.waitKey(0)
+    cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    main()
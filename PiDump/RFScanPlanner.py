@@ -0,0 +1,270 @@
+import time
+import numpy as np
+
+from RFBurstSampler import BurstSampler, open_spi
+from RFCalibration import load_calibration
+from RFSettle import SettleDetector, SettleLog
+from RFSweepScan import (
+    CHIP, PRIMARY_SERVO_PIN, MICRO_SERVO_PIN,
+    PRIMARY_START_ANGLE, PRIMARY_END_ANGLE, MICRO_START_ANGLE, MICRO_END_ANGLE,
+)
+from ServoTrajectory import TrajectoryMover, tsp_tour
+
+# Adaptive coarse-to-fine RF scan planner.
+# A coarse pass samples the centre of every cell of a quadtree. Leaves whose value
+# or local dBm gradient exceed a threshold are split into four children and their
+# centres become the next batch of waypoints. Each batch is ordered to minimise
+# servo travel, and refinement stops on a time budget or resolution target.
+
+# Planner settings
+COARSE_STEP = 20.0  # Size of the initial cells in degrees
+MIN_CELL_SIZE = 2.5  # Resolution target, cells are never split below this
+VALUE_THRESHOLD = -45.0  # Split any cell stronger than this (dBm)
+GRADIENT_THRESHOLD = 0.4  # Split any cell whose neighbourhood changes faster than this (dB/deg)
+TIME_BUDGET = 120.0  # Seconds
+PAN_RATE = 300.0  # MG996R slew rate in degrees per second
+TILT_RATE = 400.0  # Micro servo slew rate in degrees per second
+DWELL_TIME = 0.1  # Seconds spent at each waypoint taking the reading, until settle times are logged
+
+
+class QuadCell:
+    """A node of the scan quadtree. Leaves carry the reading taken at their centre."""
+
+    __slots__ = ("pan0", "pan1", "tilt0", "tilt1", "depth", "value", "children")
+
+    def __init__(self, pan0, pan1, tilt0, tilt1, depth=0):
+        self.pan0 = pan0
+        self.pan1 = pan1
+        self.tilt0 = tilt0
+        self.tilt1 = tilt1
+        self.depth = depth
+        self.value = None
+        self.children = None
+
+    @property
+    def center(self):
+        return (self.pan0 + self.pan1) / 2, (self.tilt0 + self.tilt1) / 2
+
+    @property
+    def size(self):
+        return max(self.pan1 - self.pan0, self.tilt1 - self.tilt0)
+
+    def split(self):
+        """Create the four child cells and return them."""
+        pan_mid, tilt_mid = self.center
+        depth = self.depth + 1
+        self.children = [
+            QuadCell(self.pan0, pan_mid, self.tilt0, tilt_mid, depth),
+            QuadCell(pan_mid, self.pan1, self.tilt0, tilt_mid, depth),
+            QuadCell(self.pan0, pan_mid, tilt_mid, self.tilt1, depth),
+            QuadCell(pan_mid, self.pan1, tilt_mid, self.tilt1, depth),
+        ]
+        return self.children
+
+    def leaves(self):
+        if self.children is None:
+            yield self
+            return
+        for child in self.children:
+            yield from child.leaves()
+
+    def nodes(self):
+        yield self
+        if self.children is not None:
+            for child in self.children:
+                yield from child.nodes()
+
+
+class RFQuadTree:
+    """Sparse quadtree of RF readings covering the scan area."""
+
+    def __init__(self, pan_range, tilt_range, coarse_step=COARSE_STEP):
+        self.pan_range = (min(pan_range), max(pan_range))
+        self.tilt_range = (min(tilt_range), max(tilt_range))
+        pan_edges = np.arange(self.pan_range[0], self.pan_range[1], coarse_step)
+        tilt_edges = np.arange(self.tilt_range[0], self.tilt_range[1], coarse_step)
+        self.roots = []
+        for tilt0 in tilt_edges:
+            for pan0 in pan_edges:
+                self.roots.append(QuadCell(float(pan0), float(min(pan0 + coarse_step, self.pan_range[1])),
+                                           float(tilt0), float(min(tilt0 + coarse_step, self.tilt_range[1]))))
+
+    def leaves(self):
+        for root in self.roots:
+            yield from root.leaves()
+
+    def measured_leaves(self):
+        return [leaf for leaf in self.leaves() if leaf.value is not None]
+
+    def samples(self):
+        """Return (pan, tilt, dBm) arrays of every measured leaf centre."""
+        leaves = self.measured_leaves()
+        centers = np.array([leaf.center for leaf in leaves], dtype=np.float64).reshape(-1, 2)
+        values = np.array([leaf.value for leaf in leaves], dtype=np.float64)
+        return centers[:, 0], centers[:, 1], values
+
+    def render(self, resolution=1.0):
+        """
+        Rasterise the tree into a dense heatmap.
+        Each measured node fills its own rectangle, deeper nodes painted over their
+        parents so a refinement cut short by the time budget leaves no holes.
+        Row 0 is the lowest tilt.
+        Returns (heatmap, pan_edges, tilt_edges).
+        """
+        pan_edges = np.arange(self.pan_range[0], self.pan_range[1] + resolution, resolution)
+        tilt_edges = np.arange(self.tilt_range[0], self.tilt_range[1] + resolution, resolution)
+        heatmap = np.full((len(tilt_edges) - 1, len(pan_edges) - 1), np.nan)
+        nodes = [node for root in self.roots for node in root.nodes() if node.value is not None]
+        for node in sorted(nodes, key=lambda cell: cell.depth):
+            c0 = np.searchsorted(pan_edges, node.pan0, side="left")
+            c1 = np.searchsorted(pan_edges, node.pan1, side="left")
+            r0 = np.searchsorted(tilt_edges, node.tilt0, side="left")
+            r1 = np.searchsorted(tilt_edges, node.tilt1, side="left")
+            heatmap[r0:max(r1, r0 + 1), c0:max(c1, c0 + 1)] = node.value
+        return heatmap, pan_edges, tilt_edges
+
+
+def travel_time(a, b, pan_rate=PAN_RATE, tilt_rate=TILT_RATE):
+    """Both servos move at once, so the move takes as long as the slower axis."""
+    return max(abs(a[0] - b[0]) / pan_rate, abs(a[1] - b[1]) / tilt_rate)
+
+
+def order_waypoints(cells, start):
+    """Order cells by servo move time from start (ServoTrajectory's nearest-neighbour + 2-opt tour)."""
+    centers = np.array([cell.center for cell in cells], dtype=np.float64)
+    return [cells[index] for index in tsp_tour(centers, start)]
+
+
+def cells_to_refine(tree, value_threshold=VALUE_THRESHOLD, gradient_threshold=GRADIENT_THRESHOLD,
+                    min_cell_size=MIN_CELL_SIZE):
+    """Measured leaves whose value or local gradient exceed the thresholds."""
+    leaves = tree.measured_leaves()
+    if not leaves:
+        return []
+    pan, tilt, values = tree.samples()
+    sizes = np.array([leaf.size for leaf in leaves])
+
+    # Local gradient: steepest change to any sample within 1.5 cell sizes
+    d_pan = pan[:, None] - pan[None, :]
+    d_tilt = tilt[:, None] - tilt[None, :]
+    distance = np.hypot(d_pan, d_tilt)
+    near = (distance > 0) & (distance <= 1.5 * sizes[:, None])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = np.where(near, np.abs(values[:, None] - values[None, :]) / distance, 0.0)
+    gradient = slope.max(axis=1)
+
+    split = ((values > value_threshold) | (gradient > gradient_threshold)) & (sizes / 2 >= min_cell_size)
+    return [leaf for leaf, flag in zip(leaves, split) if flag]
+
+
+class AdaptiveScanPlanner:
+    """
+    Runs the coarse pass and the refinement passes.
+    move_to(pan, tilt) positions the servos; measure() returns dBm at the current position.
+    """
+
+    def __init__(self, move_to, measure, pan_range=(PRIMARY_START_ANGLE, PRIMARY_END_ANGLE),
+                 tilt_range=(MICRO_END_ANGLE, MICRO_START_ANGLE), coarse_step=COARSE_STEP,
+                 min_cell_size=MIN_CELL_SIZE, value_threshold=VALUE_THRESHOLD,
+                 gradient_threshold=GRADIENT_THRESHOLD, time_budget=TIME_BUDGET, dwell_time=DWELL_TIME,
+                 clock=time.monotonic):
+        self.move_to = move_to
+        self.measure = measure
+        self.tree = RFQuadTree(pan_range, tilt_range, coarse_step)
+        self.min_cell_size = min_cell_size
+        self.value_threshold = value_threshold
+        self.gradient_threshold = gradient_threshold
+        self.time_budget = time_budget
+        self.dwell_time = dwell_time
+        self.clock = clock
+        self.position = (pan_range[0], tilt_range[1])
+        self.estimated_time = 0.0
+        self.samples_taken = 0
+
+    def visit(self, cells, deadline):
+        """Measure cells in travel-optimal order. Returns False when the deadline is hit."""
+        for cell in order_waypoints(cells, self.position):
+            if self.clock() >= deadline:
+                return False
+            target = cell.center
+            self.estimated_time += travel_time(self.position, target) + self.dwell_time
+            self.move_to(*target)
+            cell.value = self.measure()
+            self.position = target
+            self.samples_taken += 1
+        return True
+
+    def run(self):
+        """Scan until the resolution target or the time budget is reached. Returns the tree."""
+        deadline = self.clock() + self.time_budget
+        pending = [leaf for leaf in self.tree.leaves() if leaf.value is None]
+        while pending:
+            if not self.visit(pending, deadline):
+                print("Time budget reached")
+                break
+            pending = []
+            for cell in cells_to_refine(self.tree, self.value_threshold, self.gradient_threshold,
+                                        self.min_cell_size):
+                pending.extend(cell.split())
+            if pending:
+                print(f"Refining {len(pending) // 4} cells -> {len(pending)} new waypoints")
+        print(f"Scan finished: {self.samples_taken} samples, {self.estimated_time:.1f}s estimated move + dwell time")
+        return self.tree
+
+
+def main():
+    import gpiod
+    import cv2
+
+    spi = open_spi()
+
+    sampler = BurstSampler(spi, oversample=8, convert=load_calibration().to_dbm)
+    settle_log = SettleLog()
+    last_move = {"pan": PRIMARY_START_ANGLE, "tilt": MICRO_START_ANGLE, "size": 0.0, "time": 0.0}
+
+    chip = gpiod.Chip(CHIP)
+    primary_servo = chip.get_line(PRIMARY_SERVO_PIN)
+    micro_servo = chip.get_line(MICRO_SERVO_PIN)
+    primary_servo.request(consumer="primary_servo", type=gpiod.LINE_REQ_DIR_OUT)
+    micro_servo.request(consumer="micro_servo", type=gpiod.LINE_REQ_DIR_OUT)
+
+    mover = TrajectoryMover(primary_servo, micro_servo, (PRIMARY_START_ANGLE, MICRO_START_ANGLE))
+    # Each settle reading runs in the low time of a PWM period holding the target, so the
+    # servos never go limp mid-reading
+    settle = SettleDetector(mover.held(lambda: sampler.sample().mean))
+
+    def move_to(pan, tilt):
+        size = max(abs(pan - last_move["pan"]), abs(tilt - last_move["tilt"]))
+        mover.move_to(pan, tilt)
+        last_move.update(pan=pan, tilt=tilt, size=size, time=time.monotonic())
+
+    def measure():
+        result = settle.wait(last_move["time"])
+        settle_log.record(last_move["pan"], last_move["tilt"], last_move["size"], result)
+        return result.value
+
+    try:
+        mover.hold(25)  # Park at the start position, where the first planned move begins
+        dwell_time = settle_log.typical_settle_time(default=DWELL_TIME)
+        tree = AdaptiveScanPlanner(move_to, measure, dwell_time=dwell_time).run()
+    except KeyboardInterrupt:
+        print("Interrupted!")
+        return
+    finally:
+        primary_servo.release()
+        micro_servo.release()
+        spi.close()
+
+    heatmap, _, _ = tree.render(resolution=1.0)
+    rf_matrix = np.flipud(np.nan_to_num(heatmap, nan=-60))
+    min_val, max_val = 0, -60
+    rf_matrix_normalized = np.clip((rf_matrix - min_val) / (max_val - min_val), 0, 1) * 255
+    rf_colormap = cv2.applyColorMap(255 - rf_matrix_normalized.astype(np.uint8), cv2.COLORMAP_JET)
+    rf_colormap_resized = cv2.resize(rf_colormap, None, fx=4, fy=4, interpolation=cv2.INTER_NEAREST)
+    cv2.imshow("RF Power Heatmap (adaptive)", rf_colormap_resized)
+    cv2.waitKey(0)
+    cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import os
+import csv
+import time
+from collections import namedtuple
+import numpy as np
+
+# ADC settle detection.
+# Rather than taking a reading straight after a fixed servo PWM burst, keep
+# streaming readings after a move and declare the servo + AD8318 settled once the
+# last WINDOW readings have a small variance and no remaining trend. The time it
+# took is logged per point so the planners can learn typical dwell times.
+
+# Settle settings
+WINDOW = 12  # Readings in the rolling window
+MAX_STD = 0.6  # dB, standard deviation allowed inside the window
+MAX_SLOPE = 4.0  # dB/s, trend allowed across the window
+MIN_SETTLE = 0.01  # Seconds, never accept a reading earlier than this
+SETTLE_TIMEOUT = 0.5  # Seconds, give up and use the latest window
+
+SETTLE_LOG_FILE = "settle_times.csv"
+
+SettleResult = namedtuple("SettleResult", ["value", "settled", "settle_time", "samples"])
+
+
+class SettleDetector:
+    """
+    Streams read_value() after a move until the window is quiet.
+    read_value returns one (already averaged) reading, e.g. BurstSampler.sample().mean.
+    """
+
+    def __init__(self, read_value, window=WINDOW, max_std=MAX_STD, max_slope=MAX_SLOPE,
+                 min_settle=MIN_SETTLE, timeout=SETTLE_TIMEOUT, clock=time.monotonic):
+        self.read_value = read_value
+        self.window = window
+        self.max_std = max_std
+        self.max_slope = max_slope
+        self.min_settle = min_settle
+        self.timeout = timeout
+        self.clock = clock
+        self.times = np.zeros(window, dtype=np.float64)
+        self.values = np.zeros(window, dtype=np.float64)
+
+    def is_quiet(self, times, values):
+        """True when the window's spread and least-squares slope are under the thresholds."""
+        if values.std() > self.max_std:
+            return False
+        t = times - times.mean()
+        denominator = np.dot(t, t)
+        if denominator == 0:
+            return True
+        slope = np.dot(t, values - values.mean()) / denominator
+        return abs(slope) <= self.max_slope
+
+    def wait(self, start=None):
+        """Read until settled or timed out; start is when the move was commanded."""
+        start = self.clock() if start is None else start
+        count = 0
+        while True:
+            value = self.read_value()
+            now = self.clock()
+            index = count % self.window
+            self.times[index] = now
+            self.values[index] = value
+            count += 1
+            elapsed = now - start
+
+            if count >= self.window and elapsed >= self.min_settle:
+                # Order is irrelevant for std and slope, so the ring needs no unrolling
+                if self.is_quiet(self.times, self.values):
+                    return SettleResult(float(self.values.mean()), True, elapsed, count)
+            if elapsed >= self.timeout:
+                n = min(count, self.window)
+                return SettleResult(float(self.values[:n].mean()), False, elapsed, count)
+
+
+class SettleLog:
+    """Per-point settle times, kept in memory and appended to a CSV file."""
+
+    FIELDS = ["timestamp", "pan", "tilt", "move", "settle_time", "settled", "samples"]
+
+    def __init__(self, path=SETTLE_LOG_FILE):
+        self.path = path
+        self.moves = []
+        self.settle_times = []
+        if path and os.path.exists(path):
+            self.load()
+
+    def load(self):
+        with open(self.path, newline="") as f:
+            for row in csv.DictReader(f):
+                self.moves.append(float(row["move"]))
+                self.settle_times.append(float(row["settle_time"]))
+
+    def record(self, pan, tilt, move, result):
+        self.moves.append(move)
+        self.settle_times.append(result.settle_time)
+        if not self.path:
+            return
+        new_file = not os.path.exists(self.path)
+        with open(self.path, "a", newline="") as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(self.FIELDS)
+            writer.writerow([f"{time.time():.3f}", f"{pan:.2f}", f"{tilt:.2f}", f"{move:.2f}",
+                             f"{result.settle_time:.4f}", int(result.settled), result.samples])
+
+    def typical_settle_time(self, move=None, percentile=90, default=SETTLE_TIMEOUT):
+        """
+        Settle time that covers `percentile` % of logged points.
+        If move is given, only points with a move of similar size (within 50 %) count.
+        """
+        if not self.settle_times:
+            return default
+        moves = np.asarray(self.moves)
+        times = np.asarray(self.settle_times)
+        if move is not None:
+            similar = np.abs(moves - move) <= 0.5 * max(move, 1.0)
+            if similar.any():
+                times = times[similar]
+        return float(np.percentile(times, percentile))
@@ -0,0 +1,296 @@
+import time
+import numpy as np
+
+from RFBurstSampler import BurstSampler, open_spi
+from RFCalibration import load_calibration
+
+# Continuous-sweep RF scanner.
+# Instead of stepping the primary servo 10° at a time and blocking for a single
+# reading, the servo slews at a constant commanded rate and (timestamp, dBm) pairs
+# are read in the low time of every PWM period, on the same thread as the pulses
+# (a sampler thread would compete for the GIL and jitter them). Both servos are
+# pulsed in every period. A motion model turns every timestamp back into
+# (pan, tilt) and the samples are binned into an angular grid of any resolution.
+
+# Constants
+CHIP = "/dev/gpiochip4"  # GPIO chip for Raspberry Pi 5
+
+# Primary Servo (MG996R) on GPIO 12
+PRIMARY_SERVO_PIN = 12
+PRIMARY_START_ANGLE = 0
+PRIMARY_END_ANGLE = 120
+
+# Micro Servo on GPIO 18
+MICRO_SERVO_PIN = 18
+MICRO_START_ANGLE = 160
+MICRO_END_ANGLE = 80
+
+# Servo timing (50Hz)
+MIN_PULSE_WIDTH = 0.5  # milliseconds (0° position)
+MAX_PULSE_WIDTH = 2.5  # milliseconds (180° position)
+PERIOD = 20  # milliseconds (1/Frequency = 20ms for 50Hz)
+
+# Sweep settings
+SWEEP_RATE = 30.0  # Commanded slew rate in degrees per second
+ROW_STEP = 5  # Tilt step between sweep rows in degrees
+SERVO_LAG = 0.06  # Seconds the servo horn trails the commanded angle
+BIN_SIZE = 2.0  # Output grid resolution in degrees
+MAX_PERIOD_JITTER = 0.002  # Seconds a PWM period may run late before the scan warns
+MAX_PULSE_JITTER = BIN_SIZE  # Degrees of pulse-width spread (99th percentile - median) before the scan warns
+
+
+def angle_to_high_time(angle):
+    """Pulse high time in ms for a servo angle."""
+    return MIN_PULSE_WIDTH + (angle / 180.0) * (MAX_PULSE_WIDTH - MIN_PULSE_WIDTH)
+
+
+def start_servo_frame(pulses):
+    """
+    Send the high part of one 20ms software PWM period to several servos at once.
+    pulses is a list of (servo, angle): every line goes high together and each drops
+    at its own pulse width. Returns (end, overrun): the time the period ends, so the
+    caller can use the low time until then (e.g. for ADC reads), and how many seconds
+    the longest-overrunning pulse stayed high past its width.
+    """
+    start = time.monotonic()
+    for servo, _ in pulses:
+        servo.set_value(1)
+    overrun = 0.0
+    for servo, angle in sorted(pulses, key=lambda pulse: pulse[1]):
+        fall = start + angle_to_high_time(angle) / 1000
+        time.sleep(max(fall - time.monotonic(), 0))
+        servo.set_value(0)
+        overrun = max(overrun, time.monotonic() - fall)
+    return start + PERIOD / 1000, overrun
+
+
+def send_servo_frame(pulses):
+    """Send one 20ms software PWM period to several servos at once, so every servo still gets 50Hz."""
+    end, _ = start_servo_frame(pulses)
+    time.sleep(max(end - time.monotonic(), 0))
+
+
+class ServoMotionModel:
+    """
+    Records the commanded trajectory of both axes and maps timestamps back to angles.
+    Each axis is a piecewise-linear list of (time, angle) knots; the servo is assumed
+    to follow the command with a fixed lag.
+    """
+
+    def __init__(self, lag=SERVO_LAG):
+        self.lag = lag
+        self.knots = {"pan": ([], []), "tilt": ([], [])}
+
+    def add_knot(self, axis, timestamp, angle):
+        times, angles = self.knots[axis]
+        times.append(timestamp)
+        angles.append(angle)
+
+    def angles_at(self, timestamps):
+        """Return (pan, tilt) arrays for an array of sample timestamps."""
+        timestamps = np.asarray(timestamps, dtype=np.float64) - self.lag
+        result = []
+        for axis in ("pan", "tilt"):
+            times, angles = self.knots[axis]
+            if not times:
+                result.append(np.full(timestamps.shape, np.nan))
+            else:
+                result.append(np.interp(timestamps, times, angles))
+        return result[0], result[1]
+
+
+class FrameSampler:
+    """
+    Pulses both servos one PWM period at a time and records (timestamp, dBm) readings in
+    the low time of each period, as many as fit judging by how long the last one took.
+    Every period's commanded angles are added to the motion model at the time the period
+    actually started, so a late period does not skew the model.
+    """
+
+    def __init__(self, primary_servo, micro_servo, read_dbm, model, position, capacity=200000):
+        self.primary_servo = primary_servo
+        self.micro_servo = micro_servo
+        self.read_dbm = read_dbm
+        self.model = model
+        self.position = dict(position)  # Commanded {"pan": angle, "tilt": angle}
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros(capacity, dtype=np.float32)
+        self.count = 0
+        self.read_time = 0.0
+        self.frame_starts = []
+        self.pulse_overruns = []
+
+    def frame(self, sample=True):
+        """Send one period at the commanded position, reading the ADC in its low time."""
+        end, overrun = start_servo_frame([(self.primary_servo, self.position["pan"]),
+                                          (self.micro_servo, self.position["tilt"])])
+        start = end - PERIOD / 1000
+        self.frame_starts.append(start)
+        self.pulse_overruns.append(overrun)
+        self.model.add_knot("pan", start, self.position["pan"])
+        self.model.add_knot("tilt", start, self.position["tilt"])
+
+        capacity = len(self.values)
+        while sample and self.count < capacity and time.monotonic() + self.read_time < end:
+            before = time.monotonic()
+            value = self.read_dbm()
+            now = time.monotonic()
+            self.read_time = now - before
+            self.timestamps[self.count] = now
+            self.values[self.count] = value
+            self.count += 1
+        time.sleep(max(end - time.monotonic(), 0))
+
+    def samples(self):
+        """Return views of the recorded timestamps and values."""
+        return self.timestamps[:self.count], self.values[:self.count]
+
+    def period_jitter(self):
+        """How late each PWM period started relative to a steady 20ms, in seconds."""
+        return np.diff(self.frame_starts) - PERIOD / 1000
+
+    def pulse_error(self):
+        """Pulse-width overrun of each period as degrees of servo angle."""
+        return np.array(self.pulse_overruns) * 1000 * 180.0 / (MAX_PULSE_WIDTH - MIN_PULSE_WIDTH)
+
+
+def bin_samples(pan, tilt, dbm, pan_edges, tilt_edges):
+    """
+    Average samples into an angular grid.
+    Returns (mean, count) arrays of shape (len(tilt_edges) - 1, len(pan_edges) - 1);
+    empty bins are NaN in the mean grid.
+    """
+    pan = np.asarray(pan)
+    tilt = np.asarray(tilt)
+    dbm = np.asarray(dbm, dtype=np.float64)
+    n_pan = len(pan_edges) - 1
+    n_tilt = len(tilt_edges) - 1
+
+    col = np.searchsorted(pan_edges, pan, side="right") - 1
+    row = np.searchsorted(tilt_edges, tilt, side="right") - 1
+    # Samples sitting exactly on the last edge belong to the last bin
+    col[pan == pan_edges[-1]] = n_pan - 1
+    row[tilt == tilt_edges[-1]] = n_tilt - 1
+    valid = (col >= 0) & (col < n_pan) & (row >= 0) & (row < n_tilt) & np.isfinite(dbm)
+
+    flat = row[valid] * n_pan + col[valid]
+    count = np.bincount(flat, minlength=n_pan * n_tilt).reshape(n_tilt, n_pan)
+    total = np.bincount(flat, weights=dbm[valid], minlength=n_pan * n_tilt).reshape(n_tilt, n_pan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(count > 0, total / count, np.nan)
+    return mean, count
+
+
+def make_edges(start, end, bin_size=BIN_SIZE):
+    """Bin edges covering start..end (in either direction) at bin_size resolution."""
+    low, high = min(start, end), max(start, end)
+    n_bins = max(int(np.ceil((high - low) / bin_size)), 1)
+    return low + np.arange(n_bins + 1) * bin_size
+
+
+def sweep_axis(sampler, axis, end_angle, rate):
+    """Slew one axis to end_angle at rate deg/s, one PWM period per setpoint; the other axis is held."""
+    start_angle = sampler.position[axis]
+    duration = abs(end_angle - start_angle) / rate
+    t_start = time.monotonic()
+    while True:
+        elapsed = time.monotonic() - t_start
+        if elapsed >= duration:
+            break
+        sampler.position[axis] = start_angle + (end_angle - start_angle) * (elapsed / duration)
+        sampler.frame()
+    sampler.position[axis] = end_angle
+    sampler.frame()
+
+
+def continuous_scan(primary_servo, micro_servo, read_dbm, rate=SWEEP_RATE, row_step=ROW_STEP,
+                    bin_size=BIN_SIZE):
+    """
+    Boustrophedon scan with continuous primary sweeps.
+    Returns (mean, count, pan_edges, tilt_edges).
+    """
+    model = ServoMotionModel()
+    sampler = FrameSampler(primary_servo, micro_servo, read_dbm, model,
+                           {"pan": PRIMARY_START_ANGLE, "tilt": MICRO_START_ANGLE})
+
+    # Park both servos at the start before sampling begins
+    for _ in range(25):
+        sampler.frame(sample=False)
+
+    tilt = MICRO_START_ANGLE
+    direction = 1
+    while tilt >= MICRO_END_ANGLE:
+        end = PRIMARY_END_ANGLE if direction > 0 else PRIMARY_START_ANGLE
+        print(f"Sweeping primary {sampler.position['pan']:.0f}° -> {end}° | Micro {tilt}°")
+        sweep_axis(sampler, "pan", end, rate)
+
+        next_tilt = tilt - row_step
+        if next_tilt < MICRO_END_ANGLE:
+            break
+        sweep_axis(sampler, "tilt", next_tilt, rate)
+        tilt = next_tilt
+        direction = -direction
+
+    # The motion model is only as good as the pulse timing it assumes
+    jitter = sampler.period_jitter()
+    error = sampler.pulse_error()
+    # A steady overrun only offsets the map; the spread around it smears it
+    pulse_jitter = np.percentile(error, 99) - np.median(error)
+    print(f"PWM period jitter: median {np.median(jitter) * 1000:.2f} ms, max {jitter.max() * 1000:.2f} ms | "
+          f"pulse overrun: median {np.median(error):.1f}°, jitter {pulse_jitter:.1f}°")
+    if jitter.max() > MAX_PERIOD_JITTER:
+        late = np.count_nonzero(jitter > MAX_PERIOD_JITTER)
+        print(f"Warning: {late} of {len(jitter)} PWM periods ran more than {MAX_PERIOD_JITTER * 1000:.0f} ms late")
+    if pulse_jitter > MAX_PULSE_JITTER:
+        print(f"Warning: pulse widths vary by more than {MAX_PULSE_JITTER:.0f}°, the sweep map will be smeared")
+
+    timestamps, values = sampler.samples()
+    pan, tilt_angles = model.angles_at(timestamps)
+
+    pan_edges = make_edges(PRIMARY_START_ANGLE, PRIMARY_END_ANGLE, bin_size)
+    tilt_edges = make_edges(MICRO_END_ANGLE, MICRO_START_ANGLE, bin_size)
+    mean, count = bin_samples(pan, tilt_angles, values, pan_edges, tilt_edges)
+    print(f"Collected {len(values)} samples into {np.count_nonzero(count)} bins")
+    return mean, count, pan_edges, tilt_edges
+
+
+def main():
+    import gpiod
+    import cv2
+
+    spi = open_spi()
+
+    sampler = BurstSampler(spi, oversample=4, convert=load_calibration().to_dbm)
+
+    def read_dbm():
+        return sampler.sample().mean
+
+    chip = gpiod.Chip(CHIP)
+    primary_servo = chip.get_line(PRIMARY_SERVO_PIN)
+    micro_servo = chip.get_line(MICRO_SERVO_PIN)
+    primary_servo.request(consumer="primary_servo", type=gpiod.LINE_REQ_DIR_OUT)
+    micro_servo.request(consumer="micro_servo", type=gpiod.LINE_REQ_DIR_OUT)
+
+    try:
+        mean, count, _, _ = continuous_scan(primary_servo, micro_servo, read_dbm)
+    except KeyboardInterrupt:
+        print("Interrupted!")
+        return
+    finally:
+        primary_servo.release()
+        micro_servo.release()
+        spi.close()
+
+    # Row 0 of the grid is the lowest tilt, flip so the highest tilt is at the top
+    rf_matrix = np.flipud(np.nan_to_num(mean, nan=np.nanmin(mean)))
+    min_val, max_val = 0, -60
+    rf_matrix_normalized = np.clip((rf_matrix - min_val) / (max_val - min_val), 0, 1) * 255
+    rf_colormap = cv2.applyColorMap(255 - rf_matrix_normalized.astype(np.uint8), cv2.COLORMAP_JET)
+    rf_colormap_resized = cv2.resize(rf_colormap, None, fx=8, fy=8, interpolation=cv2.INTER_NEAREST)
+    cv2.imshow("RF Power Heatmap (continuous sweep)", rf_colormap_resized)
+    cv2.waitKey(0)
+    cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import time
+from abc import ABC, abstractmethod
+from collections import namedtuple
+import numpy as np
+
+from RFSweepScan import PRIMARY_START_ANGLE, PRIMARY_END_ANGLE, MICRO_START_ANGLE, MICRO_END_ANGLE
+
+# Real-time RF peak tracking (direction finding).
+# Once an emitter has been found, following it does not need a full grid: the
+# servos dither in a small pattern around the current bearing and the readings
+# say which way the peak moved.
+#  - HillClimbTracker measures the centre and +/- a step on each axis, and moves
+#    to the vertex of the parabola through each triple (in dB a Gaussian beam is a
+#    parabola, so this lands on the peak in one step when close).
+#  - ConicalScanTracker measures the centre and N points on a circle; the first
+#    harmonic of the ring gives the direction and the centre/ring difference the
+#    beam curvature, which together give the offset.
+# Each update yields a Bearing; a simulated emitter field measures convergence.
+
+HILL_STEP = 8.0  # Degrees either side of the centre, comparable to the beam width
+CONICAL_RADIUS = 8.0  # Degrees
+CONICAL_POINTS = 6
+MAX_STEP = 10.0  # Largest correction per update, in degrees
+LOOP_GAIN = 0.5  # Fraction of the estimated offset applied per update, averages out noise
+
+Bearing = namedtuple("Bearing", ["timestamp", "pan", "tilt", "dbm", "samples"])
+
+PAN_LIMITS = (PRIMARY_START_ANGLE, PRIMARY_END_ANGLE)
+TILT_LIMITS = (MICRO_END_ANGLE, MICRO_START_ANGLE)
+
+
+def parabolic_offset(y_minus, y_center, y_plus, step):
+    """Offset of the vertex of the parabola through three equally spaced readings."""
+    curvature = y_minus - 2 * y_center + y_plus
+    if curvature >= 0:
+        # Not a maximum: walk towards the stronger side
+        return step if y_plus > y_minus else -step
+    return 0.5 * step * (y_minus - y_plus) / curvature
+
+
+class PeakTracker(ABC):
+    """
+    Base class. measure(pan, tilt) moves the servos, waits for the reading and returns dBm.
+    subscribers are called with every new Bearing.
+    """
+
+    def __init__(self, measure, pan, tilt, clock=time.monotonic, max_step=MAX_STEP, gain=LOOP_GAIN):
+        self.measure = measure
+        self.gain = gain
+        self.pan = float(pan)
+        self.tilt = float(tilt)
+        self.clock = clock
+        self.max_step = max_step
+        self.subscribers = []
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def clamp(self, pan, tilt):
+        return (float(np.clip(pan, *PAN_LIMITS)), float(np.clip(tilt, *TILT_LIMITS)))
+
+    def apply(self, d_pan, d_tilt):
+        d_pan, d_tilt = d_pan * self.gain, d_tilt * self.gain
+        step = np.hypot(d_pan, d_tilt)
+        if step > self.max_step:
+            d_pan, d_tilt = d_pan * self.max_step / step, d_tilt * self.max_step / step
+        self.pan, self.tilt = self.clamp(self.pan + d_pan, self.tilt + d_tilt)
+
+    @abstractmethod
+    def step(self):
+        """Take one tracking update and return its Bearing."""
+
+    def measure_center(self):
+        """Read the current centre; returns (timestamp, pan, tilt, dBm) for its Bearing."""
+        pan, tilt = self.pan, self.tilt
+        dbm = self.measure(pan, tilt)
+        return self.clock(), pan, tilt, dbm
+
+    def publish(self, center, samples):
+        """Publish the centre that was measured (not the corrected bearing, which has no reading yet)."""
+        bearing = Bearing(*center, samples)
+        for callback in self.subscribers:
+            callback(bearing)
+        return bearing
+
+    def run(self, updates=None):
+        """Generator of bearings; runs forever when updates is None."""
+        count = 0
+        while updates is None or count < updates:
+            yield self.step()
+            count += 1
+
+
+class HillClimbTracker(PeakTracker):
+    def __init__(self, measure, pan, tilt, step_size=HILL_STEP, **kwargs):
+        super().__init__(measure, pan, tilt, **kwargs)
+        self.step_size = step_size
+
+    def step(self):
+        d = self.step_size
+        measured = self.measure_center()
+        center = measured[3]
+        left = self.measure(*self.clamp(self.pan - d, self.tilt))
+        right = self.measure(*self.clamp(self.pan + d, self.tilt))
+        down = self.measure(*self.clamp(self.pan, self.tilt - d))
+        up = self.measure(*self.clamp(self.pan, self.tilt + d))
+        self.apply(parabolic_offset(left, center, right, d), parabolic_offset(down, center, up, d))
+        return self.publish(measured, 5)
+
+
+class ConicalScanTracker(PeakTracker):
+    def __init__(self, measure, pan, tilt, radius=CONICAL_RADIUS, points=CONICAL_POINTS, **kwargs):
+        super().__init__(measure, pan, tilt, **kwargs)
+        self.radius = radius
+        angles = np.linspace(0, 2 * np.pi, points, endpoint=False)
+        self.ring = np.column_stack([np.cos(angles), np.sin(angles)])
+
+    def step(self):
+        measured = self.measure_center()
+        center = measured[3]
+        ring = np.array([self.measure(*self.clamp(self.pan + self.radius * u, self.tilt + self.radius * v))
+                         for u, v in self.ring])
+        # First harmonic of the ring readings: g = -2 k r e for a parabolic (in dB) beam
+        gradient = 2.0 / len(ring) * ring @ self.ring
+        curvature = (center - ring.mean()) / self.radius ** 2
+        if curvature > 1e-6:
+            d_pan, d_tilt = gradient / (2 * curvature * self.radius)
+        else:
+            norm = np.hypot(*gradient) or 1.0
+            d_pan, d_tilt = gradient / norm * self.radius
+        self.apply(d_pan, d_tilt)
+        return self.publish(measured, len(ring) + 1)
+
+
+class SimulatedEmitterField:
+    """
+    Gaussian beam around a (possibly moving) emitter with measurement noise.
+    Measuring advances a simulated clock by the servo move and settle time.
+    """
+
+    def __init__(self, pan, tilt, peak_dbm=-20.0, floor_dbm=-60.0, width=12.0, noise=0.3,
+                 velocity=(0.0, 0.0), seconds_per_degree=0.002, settle=0.02, seed=0):
+        self.emitter = np.array([pan, tilt], dtype=np.float64)
+        self.peak_dbm = peak_dbm
+        self.floor_dbm = floor_dbm
+        self.width = width
+        self.noise = noise
+        self.velocity = np.asarray(velocity, dtype=np.float64)
+        self.seconds_per_degree = seconds_per_degree
+        self.settle = settle
+        self.rng = np.random.default_rng(seed)
+        self.now = 0.0
+        self.position = np.array([pan, tilt], dtype=np.float64)
+
+    def clock(self):
+        return self.now
+
+    def emitter_at(self, t):
+        return self.emitter + self.velocity * t
+
+    def measure(self, pan, tilt):
+        target = np.array([pan, tilt])
+        self.now += np.abs(target - self.position).max() * self.seconds_per_degree + self.settle
+        self.position = target
+        error = np.hypot(*(target - self.emitter_at(self.now)))
+        linear = np.exp(-0.5 * (error / self.width) ** 2)
+        power = 10 ** (self.floor_dbm / 10) + (10 ** (self.peak_dbm / 10) - 10 ** (self.floor_dbm / 10)) * linear
+        return 10 * np.log10(power) + self.rng.normal(0, self.noise)
+
+
+def evaluate(tracker_class, start_offset=(12.0, -8.0), updates=60, tolerance=1.0, **field_kwargs):
+    """Run a tracker against a simulated emitter; return (time to converge, RMS error, updates/s)."""
+    field = SimulatedEmitterField(70.0, 120.0, **field_kwargs)
+    tracker = tracker_class(field.measure, 70.0 + start_offset[0], 120.0 + start_offset[1], clock=field.clock)
+    converged = None
+    errors = []
+    for bearing in tracker.run(updates):
+        error = np.hypot(*(np.array([bearing.pan, bearing.tilt]) - field.emitter_at(bearing.timestamp)))
+        errors.append(error)
+        if converged is None and error < tolerance:
+            converged = bearing.timestamp
+    settled = np.array(errors[len(errors) // 2:])
+    return converged, float(np.sqrt(np.mean(settled ** 2))), updates / field.now
+
+
+def main():
+    for tracker_class in (HillClimbTracker, ConicalScanTracker):
+        for velocity in ((0.0, 0.0), (2.0, 1.0)):
+            converged, rms, rate = evaluate(tracker_class, velocity=velocity)
+            converged = f"{converged:.2f} s" if converged is not None else "never"
+            print(f"{tracker_class.__name__:>18} | emitter moving {velocity} deg/s | converged in {converged} | "
+                  f"RMS error {rms:.2f}° | {rate:.1f} updates/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,23 @@
-import spidev
 import time
 import logging
 
+from RFBurstSampler import open_spi
+from RFCalibration import load_calibration
+
 # Constants (matching definitions from the C program)
 RFMETER_FILTER_USEFULL_DATA = 0x1FFE
 RFMETER_ADC_RESOLUTION = 4096
 RFMETER_DEF_VREF = 2.5
-RFMETER_DEF_SLOPE = -0.025
-RFMETER_DEF_INTERCEPT = 20.0
-RFMETER_DEF_LIMIT_HIGH = 2.0
-RFMETER_DEF_LIMIT_LOW = 0.5
 
 class RfMeter:
-    def __init__(self, bus=0, device=0, speed=100000):
+    def __init__(self, config=None):
         """
         Initialize SPI communication with the ADC.
-        :param bus: SPI bus number (usually 0)
-        :param device: SPI device number (chip select, usually 0)
-        :param speed: SPI clock speed in Hz
+        :param config: SPI settings dict (speed_hz, mode); defaults to spi_config.json written by SPIBenchmark.py
         """
-        self.spi = spidev.SpiDev()
-        self.spi.open(bus, device)
-        self.spi.max_speed_hz = speed
-        self.spi.mode = 0  # SPI mode 0
+        self.spi = open_spi(config)
+        # Versioned AD8318 calibration (calibrations/ad8318_v<N>.json) instead of fixed slope/intercept
+        self.calibration = load_calibration()
 
     def read_data(self):
         """
@@ -53,19 +48,11 @@ class RfMeter:
         voltage = (float(reading) * RFMETER_DEF_VREF) / RFMETER_ADC_RESOLUTION
         return voltage
 
-    def get_signal_strength(self, slope, intercept):
+    def get_signal_strength(self):
         """
-        Converts the measured voltage into RF signal strength (in dBm) using a linear transformation.
-        Voltage values outside the defined limits are clamped.
+        Converts the 12-bit ADC reading into RF signal strength (in dBm) through the calibration table.
         """
-        voltage = self.get_voltage()
-        if voltage > RFMETER_DEF_LIMIT_HIGH:
-            result = (RFMETER_DEF_LIMIT_HIGH / slope) + intercept
-        elif voltage < RFMETER_DEF_LIMIT_LOW:
-            result = (RFMETER_DEF_LIMIT_LOW / slope) + intercept
-        else:
-            result = (voltage / slope) + intercept
-        return result
+        return float(self.calibration.to_dbm(self.get_raw_data()))
 
 def main():
     # Setup logging (similar to log_init in C)
@@ -76,7 +63,7 @@ def main():
 
     # Initialize the RF Meter driver using SPI on bus 0, device 0
     try:
-        rfmeter = RfMeter(bus=0, device=0, speed=100000)
+        rfmeter = RfMeter()
     except Exception as e:
         logger.error("Failed to initialize SPI: %s", e)
         return
@@ -87,7 +74,7 @@ def main():
 
     # Main loop: repeatedly measure and log the signal strength
     while True:
-        signal_strength = rfmeter.get_signal_strength(RFMETER_DEF_SLOPE, RFMETER_DEF_INTERCEPT)
+        signal_strength = rfmeter.get_signal_strength()
         logger.info("Signal strength: %.2f dBm", signal_strength)
         time.sleep(0.1)
         logger.info("-----------------------")
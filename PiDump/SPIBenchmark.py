@@ -0,0 +1,175 @@
+import sys
+import json
+import time
+import itertools
+import numpy as np
+
+from RFBurstSampler import (
+    BurstSampler, encode_mcp3201, open_spi, SPI_CONFIG_FILE, RFMETER_FILTER_USEFULL_DATA,
+)
+
+# SPI throughput and configuration benchmark for the RF front end.
+# The scripts disagree on clock speed (10 kHz .. 1 MHz, and 1.6 GHz in Shooter.py),
+# SPI mode and how the 12-bit code is pulled out of the 16-bit frame. This tool
+# sweeps speed, mode and block size (conversions per read), and for each
+# configuration measures the achieved samples/s, the decode error rate against a
+# known input and the CPU share of the process. The fastest configuration with an
+# acceptable error rate is written to spi_config.json, which load_spi_config() and
+# therefore every BurstSampler user picks up.
+#
+# Known input: hold the RF Meter at a steady level (or feed it a reference voltage
+# and pass its code with --reference). Without --reference the median of the
+# slowest mode-0 configuration is taken as the truth. --fake runs against a
+# simulated MCP3201 so the tool can run without hardware.
+
+SPEEDS_HZ = (10000, 100000, 500000, 1000000, 1600000, 2000000)
+MODES = (0, 1, 2, 3)
+BLOCKS = (1, 8, 32, 128)
+DURATION = 0.25  # Seconds per configuration
+TOLERANCE = 8  # Codes from the reference before a sample counts as an error
+MAX_ERROR_RATE = 0.001
+
+# The two bit extractions found in the scripts
+DECODERS = {
+    "mask_1ffe": lambda frames: (frames & RFMETER_FILTER_USEFULL_DATA) >> 1,
+    "shift_3": lambda frames: (frames >> 3) & 0x0FFF,
+}
+
+# MCP3201 limits used by the simulator
+MCP3201_MAX_CLOCK_HZ = 1600000  # At VDD = 5 V
+TRANSFER_OVERHEAD = 20e-6  # Seconds of ioctl overhead per xfer2
+
+
+class SimulatedMCP3201:
+    """
+    spidev.SpiDev stand-in for a MCP3201 held at a constant input.
+    Transfers take 16 clocks plus a fixed overhead, the chip clocks out data on the
+    wrong edge in modes 1 and 2 (every bit arrives one clock late), and above its
+    maximum clock the output bits become unreliable.
+    """
+
+    def __init__(self, code=2048, noise=1.0, seed=0):
+        self.code = code
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+        self.max_speed_hz = MCP3201_MAX_CLOCK_HZ
+        self.mode = 0
+        self.owed = 0.0
+
+    def open(self, bus, device):
+        pass
+
+    def close(self):
+        pass
+
+    def xfer2(self, data):
+        self.owed += 8 * len(data) / self.max_speed_hz + TRANSFER_OVERHEAD
+        if self.owed > 0.001:
+            time.sleep(self.owed)
+            self.owed = 0.0
+
+        code = int(np.clip(round(self.code + self.rng.normal(0, self.noise)), 0, 0x0FFF))
+        frame = int.from_bytes(encode_mcp3201([code]), "big")
+        if self.mode in (1, 2):
+            frame >>= 1
+        if self.max_speed_hz > MCP3201_MAX_CLOCK_HZ:
+            flip_probability = min(0.5, (self.max_speed_hz / MCP3201_MAX_CLOCK_HZ - 1))
+            if self.rng.random() < flip_probability:
+                frame ^= 1 << int(self.rng.integers(1, 13))
+        return list(frame.to_bytes(2, "big"))
+
+
+def read_frames(sampler, count):
+    """Raw 16-bit frames of one block, so every decoder sees the same data."""
+    sampler.read_codes(count)
+    return np.frombuffer(bytes(sampler.buffer), dtype=">u2")
+
+
+def measure(spi, speed_hz, mode, block, duration=DURATION):
+    """Run one configuration for `duration` seconds; return (samples/s, cpu share, frames)."""
+    spi.max_speed_hz = speed_hz
+    spi.mode = mode
+    sampler = BurstSampler(spi, oversample=block)
+    read_frames(sampler, block)  # Let the bus settle on the new settings
+
+    blocks = []
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    while time.perf_counter() - wall_start < duration:
+        blocks.append(read_frames(sampler, block).copy())
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    frames = np.concatenate(blocks)
+    return len(frames) / wall, cpu / wall, frames
+
+
+def error_rate(codes, reference, tolerance=TOLERANCE):
+    return float(np.mean(np.abs(codes.astype(np.int32) - reference) > tolerance))
+
+
+def run_benchmark(spi, reference=None, speeds=SPEEDS_HZ, modes=MODES, blocks=BLOCKS, duration=DURATION):
+    """Sweep every configuration; returns the reference code and a list of result dicts."""
+    if reference is None:
+        _, _, frames = measure(spi, min(speeds), 0, max(blocks), duration)
+        reference = int(np.median(DECODERS["mask_1ffe"](frames)))
+
+    results = []
+    for speed_hz, mode, block in itertools.product(speeds, modes, blocks):
+        rate, cpu, frames = measure(spi, speed_hz, mode, block, duration)
+        errors = {name: error_rate(decode(frames), reference) for name, decode in DECODERS.items()}
+        results.append({"speed_hz": speed_hz, "mode": mode, "block": block, "samples_per_s": rate,
+                        "cpu": cpu, "errors": errors})
+        print(f"{speed_hz / 1000:7.0f} kHz | mode {mode} | block {block:3d} | {rate:8.0f} samples/s | "
+              f"CPU {cpu * 100:5.1f}% | errors " +
+              ", ".join(f"{name} {rate * 100:5.1f}%" for name, rate in errors.items()))
+    return reference, results
+
+
+def best_config(results, max_error_rate=MAX_ERROR_RATE):
+    """Fastest configuration the sampler's decode reads correctly; CPU share breaks ties."""
+    usable = [r for r in results if r["errors"]["mask_1ffe"] <= max_error_rate]
+    if not usable:
+        return None
+    return max(usable, key=lambda r: (round(r["samples_per_s"], -1), -r["cpu"]))
+
+
+def write_config(result, reference, path=SPI_CONFIG_FILE):
+    config = {
+        "speed_hz": result["speed_hz"],
+        "mode": result["mode"],
+        "block": result["block"],
+        "samples_per_s": round(result["samples_per_s"]),
+        "cpu": round(result["cpu"], 3),
+        "error_rate": result["errors"]["mask_1ffe"],
+        "reference_code": reference,
+        "measured": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    with open(path, "w") as f:
+        json.dump(config, f, indent=2)
+    return config
+
+
+def main():
+    args = sys.argv[1:]
+    fake = "--fake" in args
+    reference = int(args[args.index("--reference") + 1]) if "--reference" in args else None
+    duration = float(args[args.index("--duration") + 1]) if "--duration" in args else DURATION
+    path = args[args.index("--output") + 1] if "--output" in args else SPI_CONFIG_FILE
+
+    spi = SimulatedMCP3201() if fake else open_spi()
+    try:
+        reference, results = run_benchmark(spi, reference, duration=duration)
+    finally:
+        spi.close()
+
+    best = best_config(results)
+    if best is None:
+        print(f"No configuration decoded within {MAX_ERROR_RATE * 100:.1f}% errors; config not written.")
+        return
+    config = write_config(best, reference, path)
+    print(f"Reference code {reference}. Best: {config['speed_hz']} Hz, mode {config['mode']}, "
+          f"block {config['block']} ({config['samples_per_s']} samples/s) -> {path}")
+
+
+if __name__ == "__main__":
+    main()
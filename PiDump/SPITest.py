@@ -1,15 +1,10 @@
-import spidev
 import time
 import os
 
-# SPI Configuration
-SPI_BUS = 0
-SPI_DEVICE = 0  # CE0 (GPIO 8)
-SPI_SPEED_HZ = 10000  # Slow speed for testing
-SPI_MODE = 1  # MCP3201 supports SPI Mode 0 or 1
+from RFBurstSampler import SPI_BUS, SPI_CS, SPI_CONFIG_FILE, decode_mcp3201, load_spi_config, open_spi
 
-# Initialize SPI
-spi = spidev.SpiDev()
+# SPI Configuration: the same benchmarked settings the scanners use (spi_config.json)
+SPI_CONFIG = load_spi_config()
 
 def check_spi_enabled():
     """ Check if SPI is enabled on Raspberry Pi. """
@@ -25,10 +20,11 @@ def check_spi_enabled():
 def test_spi_communication():
     """ Send a test byte over SPI and check if it returns a response. """
     print("\n=== SPI Communication Test ===")
+    spi = None
     try:
-        spi.open(SPI_BUS, SPI_DEVICE)
-        spi.max_speed_hz = SPI_SPEED_HZ
-        spi.mode = SPI_MODE
+        spi = open_spi(SPI_CONFIG)
+        print(f"[DEBUG] spidev{SPI_BUS}.{SPI_CS} at {SPI_CONFIG['speed_hz']} Hz, mode {SPI_CONFIG['mode']} "
+              f"({'from ' + SPI_CONFIG_FILE if os.path.exists(SPI_CONFIG_FILE) else 'defaults'})")
 
         print("[DEBUG] Sending SPI test command...")
         response = spi.xfer2([0xAA])  # Send test byte (0xAA = 10101010)
@@ -44,15 +40,15 @@ def test_spi_communication():
         print(f"[✘] SPI Communication Failed: {e}")
 
     finally:
-        spi.close()
+        if spi is not None:
+            spi.close()
 
 def test_mcp3201_adc():
     """ Read raw 12-bit data from MCP3201 ADC. """
     print("\n=== MCP3201 ADC Read Test ===")
+    spi = None
     try:
-        spi.open(SPI_BUS, SPI_DEVICE)
-        spi.max_speed_hz = SPI_SPEED_HZ
-        spi.mode = SPI_MODE
+        spi = open_spi(SPI_CONFIG)
 
         for _ in range(5):  # Read ADC 5 times for consistency
             print("[DEBUG] Attempting SPI read...")  # Debug before xfer2
@@ -61,7 +57,7 @@ def test_mcp3201_adc():
             
             print(f"SPI Raw Response: {response}")  # Print raw byte response
             
-            raw_value = ((response[0] << 8) | response[1]) >> 3  # Extract 12-bit value
+            raw_value = int(decode_mcp3201(response)[0])  # Same decode the sampler uses in this SPI mode
             print(f"Raw ADC Value: {raw_value}")
 
             if raw_value == 0:
@@ -75,8 +71,9 @@ def test_mcp3201_adc():
         print(f"[✘] MCP3201 ADC Read error: {e}")
 
     finally:
-        print("[DEBUG] Closing SPI connection...")
-        spi.close()
+        if spi is not None:
+            print("[DEBUG] Closing SPI connection...")
+            spi.close()
 
 # Run all tests
 if __name__ == "__main__":
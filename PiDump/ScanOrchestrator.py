@@ -0,0 +1,271 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from RFBurstSampler import BurstSampler, open_spi
+from RFCalibration import load_calibration
+from RFSweepScan import (
+    CHIP, PRIMARY_SERVO_PIN, MICRO_SERVO_PIN,
+    PRIMARY_START_ANGLE, PRIMARY_END_ANGLE, MICRO_START_ANGLE, MICRO_END_ANGLE,
+)
+from ServoTrajectory import TrajectoryMover
+
+# Asyncio scan orchestrator.
+# WifiHyperSpec.py runs the thermal capture, the whole servo/RF scan and the camera
+# stills strictly one after another. Here every device gets a coroutine wrapper and
+# its own single-thread executor: calls to one device stay serialised (one bus, one
+# driver), but different devices run at the same time. A scan definition lists the
+# RF waypoints plus the captures to take, and the captures overlap the servo scan.
+# Both servo axes share one executor and one PWM stream, and the RF samples are
+# taken on that executor in the low time of the periods holding the target.
+
+# Scan settings
+PAN_STEP = 10
+TILT_STEP = 10
+SAMPLES_PER_POINT = 16
+THERMAL_FRAMES = 1
+CAMERA_IDS = (0, 1)
+
+
+class ScanDefinition:
+    """What to capture: RF waypoints plus how many thermal frames and which cameras."""
+
+    def __init__(self, waypoints, thermal_frames=THERMAL_FRAMES, cameras=CAMERA_IDS,
+                 samples_per_point=SAMPLES_PER_POINT):
+        self.waypoints = list(waypoints)
+        self.thermal_frames = thermal_frames
+        self.cameras = tuple(cameras)
+        self.samples_per_point = samples_per_point
+
+    @classmethod
+    def boustrophedon(cls, pan_step=PAN_STEP, tilt_step=TILT_STEP, **kwargs):
+        """The RFSweepScan range (pan 0-120°, tilt 160-80°): forward and reverse primary sweeps, stepping tilt down."""
+        pan_angles = list(range(PRIMARY_START_ANGLE, PRIMARY_END_ANGLE + 1, pan_step))
+        waypoints = []
+        for row, tilt in enumerate(range(MICRO_START_ANGLE, MICRO_END_ANGLE - 1, -tilt_step)):
+            angles = pan_angles if row % 2 == 0 else pan_angles[::-1]
+            waypoints.extend((pan, tilt) for pan in angles)
+        return cls(waypoints, **kwargs)
+
+
+class ScanResult:
+    def __init__(self):
+        self.rf_samples = []  # (pan, tilt, dBm)
+        self.thermal_frames = []
+        self.camera_frames = {}
+        self.wall_time = 0.0
+
+
+# -------- Simulated devices --------
+class SimServos:
+    """Blocking pan/tilt head whose move time grows with the larger angle travelled."""
+
+    def __init__(self, position, seconds_per_degree=0.004, settle=0.02):
+        self.position = position
+        self.seconds_per_degree = seconds_per_degree
+        self.settle = settle
+
+    def move_to(self, pan, tilt):
+        travel = max(abs(pan - self.position[0]), abs(tilt - self.position[1]))
+        time.sleep(travel * self.seconds_per_degree + self.settle)
+        self.position = (pan, tilt)
+
+    def read_held(self, read_value):
+        return read_value()
+
+
+class SimAdc:
+    def __init__(self, servos, conversion_time=0.0002):
+        self.servos = servos
+        self.conversion_time = conversion_time
+
+    def read(self, count):
+        time.sleep(count * self.conversion_time)
+        pan, tilt = self.servos.position
+        level = -60 + 40 * np.exp(-((pan - 70) ** 2 + (tilt - 120) ** 2) / 400)
+        return level + np.random.normal(0, 0.5, count)
+
+
+class SimThermal:
+    def __init__(self, frame_time=0.5):
+        self.frame_time = frame_time
+
+    def capture(self):
+        time.sleep(self.frame_time)  # MLX90640 at 2 Hz
+        return np.random.normal(25, 1, (24, 32))
+
+
+class SimCamera:
+    def __init__(self, start_time=0.4, capture_time=0.05):
+        self.start_time = start_time
+        self.capture_time = capture_time
+
+    def capture(self):
+        time.sleep(self.start_time + self.capture_time)  # picam.start() + capture_array() + stop()
+        return np.zeros((480, 640, 3), dtype=np.uint8)
+
+
+def simulated_devices():
+    servos = SimServos((PRIMARY_START_ANGLE, MICRO_START_ANGLE))
+    return {
+        "servos": servos,
+        "adc": SimAdc(servos),
+        "thermal": SimThermal(),
+        "cameras": {camera_id: SimCamera() for camera_id in CAMERA_IDS},
+    }
+
+
+# -------- Hardware devices --------
+class HardwareAdc:
+    def __init__(self, spi):
+        self.sampler = BurstSampler(spi, convert=load_calibration().to_dbm)
+
+    def read(self, count):
+        return self.sampler.read_values(count)
+
+
+class HardwareThermal:
+    def __init__(self, mlx):
+        self.mlx = mlx
+        self.frame = [0] * 768
+
+    def capture(self):
+        self.mlx.getFrame(self.frame)
+        return np.array(self.frame).reshape((24, 32))
+
+
+class HardwareCamera:
+    def __init__(self, picam):
+        self.picam = picam
+
+    def capture(self):
+        self.picam.start()
+        frame = self.picam.capture_array()
+        self.picam.stop()
+        return frame
+
+
+def hardware_servos():
+    """
+    Request both servo lines and return a TrajectoryMover driving them;
+    release them with mover.primary_servo.release() and mover.micro_servo.release().
+    """
+    import gpiod
+
+    chip = gpiod.Chip(CHIP)
+    primary_servo = chip.get_line(PRIMARY_SERVO_PIN)
+    micro_servo = chip.get_line(MICRO_SERVO_PIN)
+    primary_servo.request(consumer="primary_servo", type=gpiod.LINE_REQ_DIR_OUT)
+    micro_servo.request(consumer="micro_servo", type=gpiod.LINE_REQ_DIR_OUT)
+    return TrajectoryMover(primary_servo, micro_servo, (PRIMARY_START_ANGLE, MICRO_START_ANGLE))
+
+
+def hardware_devices():
+    import board
+    import busio
+    import adafruit_mlx90640
+    from picamera2 import Picamera2
+
+    servos = hardware_servos()
+    spi = open_spi()
+
+    i2c = busio.I2C(board.SCL, board.SDA, frequency=400000)
+    mlx = adafruit_mlx90640.MLX90640(i2c)
+    mlx.refresh_rate = adafruit_mlx90640.RefreshRate.REFRESH_2_HZ
+
+    return {
+        "servos": servos,
+        "adc": HardwareAdc(spi),
+        "thermal": HardwareThermal(mlx),
+        "cameras": {camera_id: HardwareCamera(Picamera2(camera_id)) for camera_id in CAMERA_IDS},
+    }
+
+
+# -------- Orchestrator --------
+class ScanOrchestrator:
+    """
+    Runs a ScanDefinition against a device dict shaped like simulated_devices():
+    servos.move_to(pan, tilt), servos.read_held(read_value), adc.read(count) -> array of dBm,
+    thermal.capture() -> array, cameras[id].capture() -> frame.
+    The ADC is only read through servos.read_held, so it runs on the servo executor.
+    """
+
+    def __init__(self, devices):
+        self.devices = devices
+        names = ["servos", "thermal"] + [f"camera{cid}" for cid in devices["cameras"]]
+        self.executors = {name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=name) for name in names}
+
+    def close(self):
+        for executor in self.executors.values():
+            executor.shutdown(wait=True)
+
+    async def call(self, executor_name, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executors[executor_name], func, *args)
+
+    async def move(self, pan, tilt):
+        """Move both axes at once, one synchronised S-curve in a shared PWM stream."""
+        await self.call("servos", self.devices["servos"].move_to, pan, tilt)
+
+    async def sample(self, count):
+        """Read count conversions while the servos stay pulsed at the target."""
+        adc = self.devices["adc"]
+        values = await self.call("servos", self.devices["servos"].read_held, lambda: adc.read(count))
+        return float(np.mean(values))
+
+    async def rf_scan(self, scan, result):
+        for pan, tilt in scan.waypoints:
+            await self.move(pan, tilt)
+            result.rf_samples.append((pan, tilt, await self.sample(scan.samples_per_point)))
+
+    async def thermal_capture(self, scan, result):
+        for _ in range(scan.thermal_frames):
+            result.thermal_frames.append(await self.call("thermal", self.devices["thermal"].capture))
+
+    async def camera_capture(self, camera_id, result):
+        camera = self.devices["cameras"][camera_id]
+        result.camera_frames[camera_id] = await self.call(f"camera{camera_id}", camera.capture)
+
+    async def run(self, scan):
+        """Run the RF scan with thermal and camera captures overlapping it."""
+        result = ScanResult()
+        start = time.perf_counter()
+        tasks = [self.rf_scan(scan, result), self.thermal_capture(scan, result)]
+        tasks += [self.camera_capture(camera_id, result) for camera_id in scan.cameras]
+        await asyncio.gather(*tasks)
+        result.wall_time = time.perf_counter() - start
+        return result
+
+    async def run_serial(self, scan):
+        """The WifiHyperSpec.py order: thermal, then the RF scan, then the cameras."""
+        result = ScanResult()
+        start = time.perf_counter()
+        await self.thermal_capture(scan, result)
+        await self.rf_scan(scan, result)
+        for camera_id in scan.cameras:
+            await self.camera_capture(camera_id, result)
+        result.wall_time = time.perf_counter() - start
+        return result
+
+
+def main():
+    scan = ScanDefinition.boustrophedon(pan_step=20, tilt_step=20)
+    print(f"Simulated scan: {len(scan.waypoints)} RF waypoints, {scan.thermal_frames} thermal frame(s), "
+          f"{len(scan.cameras)} camera(s)")
+
+    orchestrator = ScanOrchestrator(simulated_devices())
+    try:
+        serial = asyncio.run(orchestrator.run_serial(scan))
+        orchestrator.devices["servos"].position = (PRIMARY_START_ANGLE, MICRO_START_ANGLE)
+        concurrent = asyncio.run(orchestrator.run(scan))
+    finally:
+        orchestrator.close()
+
+    print(f"Serial baseline:   {serial.wall_time:.2f} s")
+    print(f"Concurrent:        {concurrent.wall_time:.2f} s")
+    print(f"Speed-up:          {serial.wall_time / concurrent.wall_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+import time
+import numpy as np
+
+from RFSweepScan import (
+    PERIOD, PRIMARY_START_ANGLE, PRIMARY_END_ANGLE, MICRO_START_ANGLE, MICRO_END_ANGLE,
+    send_servo_frame, start_servo_frame,
+)
+
+# Servo trajectory planning.
+# Jumping each servo straight to its target makes the MG996R overshoot and ring
+# and forces long dwells. This module generates jerk-limited S-curve setpoint
+# streams (one setpoint per 20 ms PWM period, both axes pulsed in the same period)
+# and a TrajectoryMover the scanners use for their moves. It also estimates move
+# times from a per-servo speed model, orders waypoints to keep total scan time
+# down, and simulates the expected duration of a plan.
+
+SETPOINT_DT = PERIOD / 1000  # One setpoint per PWM period
+INTEGRATION_DT = 0.0005  # Fine step used to integrate the velocity profile
+ORDERS = ("boustrophedon", "spiral", "tsp")
+
+
+class ServoModel:
+    """Kinematic limits of one servo (degrees, seconds)."""
+
+    def __init__(self, name, max_velocity, max_accel, max_jerk, settle_time):
+        self.name = name
+        self.max_velocity = max_velocity
+        self.max_accel = max_accel
+        self.max_jerk = max_jerk
+        self.settle_time = settle_time
+        # Move time over a table of distances, so cost matrices are a single np.interp
+        self.table_distance = np.linspace(0, 180, 361)
+        self.table_time = np.array([self.profile(d)[3] for d in self.table_distance])
+
+    def accel_time(self, velocity):
+        """Duration of the jerk-limited ramp from rest to velocity."""
+        if velocity * self.max_jerk < self.max_accel ** 2:
+            return 2 * np.sqrt(velocity / self.max_jerk)
+        return velocity / self.max_accel + self.max_accel / self.max_jerk
+
+    def profile(self, distance):
+        """Return (peak_velocity, ramp_time, cruise_time, total_time) for a move."""
+        distance = abs(distance)
+        if distance == 0:
+            return 0.0, 0.0, 0.0, 0.0
+        ramp = self.accel_time(self.max_velocity)
+        if distance >= self.max_velocity * ramp:
+            cruise = (distance - self.max_velocity * ramp) / self.max_velocity
+            return self.max_velocity, ramp, cruise, 2 * ramp + cruise
+        # Short move: never reaches max_velocity, bisect for the peak that covers distance
+        low, high = 0.0, self.max_velocity
+        for _ in range(60):
+            peak = (low + high) / 2
+            if peak * self.accel_time(peak) > distance:
+                high = peak
+            else:
+                low = peak
+        ramp = self.accel_time(low)
+        return low, ramp, 0.0, 2 * ramp
+
+    def move_time(self, distance):
+        """Arrival time including settle, vectorised over distance."""
+        moving = np.interp(np.abs(distance), self.table_distance, self.table_time)
+        return np.where(np.abs(distance) > 0, moving + self.settle_time, 0.0)
+
+
+MG996R = ServoModel("MG996R", max_velocity=300.0, max_accel=2500.0, max_jerk=40000.0, settle_time=0.08)
+MICRO_SERVO = ServoModel("SG90", max_velocity=450.0, max_accel=4000.0, max_jerk=80000.0, settle_time=0.05)
+
+
+def ramp_velocity(t, peak, ramp, model):
+    """Velocity during a jerk-limited ramp from 0 to peak over `ramp` seconds."""
+    t = np.clip(t, 0, ramp)
+    jerk_time = min(model.max_accel / model.max_jerk, ramp / 2)
+    accel = model.max_jerk * jerk_time
+    v = np.where(t < jerk_time, 0.5 * model.max_jerk * t ** 2,
+                 0.5 * model.max_jerk * jerk_time ** 2 + accel * (t - jerk_time))
+    # Final jerk phase mirrors the first one
+    tail = ramp - t
+    v = np.where(t > ramp - jerk_time, peak - 0.5 * model.max_jerk * tail ** 2, v)
+    return np.minimum(v, peak)
+
+
+def s_curve(start, end, model, duration=None, dt=SETPOINT_DT):
+    """
+    Setpoints from start to end every dt seconds following an S-curve profile.
+    If duration is longer than the model's own move time the profile is stretched,
+    so both axes of a move can be made to arrive together.
+    """
+    distance = end - start
+    peak, ramp, cruise, total = model.profile(distance)
+    if total == 0:
+        return np.array([float(end)])
+    fine = np.arange(0, total + INTEGRATION_DT, INTEGRATION_DT)
+    velocity = np.where(fine < ramp, ramp_velocity(fine, peak, ramp, model),
+                        np.where(fine < ramp + cruise, peak, ramp_velocity(total - fine, peak, ramp, model)))
+    position = np.concatenate([[0.0], np.cumsum((velocity[1:] + velocity[:-1]) / 2) * INTEGRATION_DT])
+    position *= abs(distance) / position[-1]  # Remove the integration error
+
+    stretch = max(duration or total, total) / total
+    samples = np.arange(dt, total * stretch, dt) / stretch
+    setpoints = start + np.sign(distance) * np.interp(samples, fine, position)
+    return np.append(setpoints, float(end))
+
+
+def plan_move(start, end, pan_model=MG996R, tilt_model=MICRO_SERVO, dt=SETPOINT_DT):
+    """Synchronised (pan, tilt) setpoint streams for a move; both finish on the same period."""
+    duration = max(pan_model.profile(end[0] - start[0])[3], tilt_model.profile(end[1] - start[1])[3])
+    pan = s_curve(start[0], end[0], pan_model, duration, dt)
+    tilt = s_curve(start[1], end[1], tilt_model, duration, dt)
+    length = max(len(pan), len(tilt))
+    pan = np.pad(pan, (0, length - len(pan)), mode="edge")
+    tilt = np.pad(tilt, (0, length - len(tilt)), mode="edge")
+    return pan, tilt
+
+
+def run_move(primary_servo, micro_servo, pan_setpoints, tilt_setpoints):
+    """Stream setpoints to both servos, one shared PWM period per setpoint pair."""
+    for pan, tilt in zip(pan_setpoints, tilt_setpoints):
+        send_servo_frame([(primary_servo, pan), (micro_servo, tilt)])
+
+
+class TrajectoryMover:
+    """
+    Moves the pan/tilt head between waypoints along synchronised S-curves.
+    Readings taken through held() happen in the low time of the PWM periods that hold
+    the target, on the calling thread, so no second thread competes for the GIL while
+    the pulses are being timed.
+    """
+
+    def __init__(self, primary_servo, micro_servo, position, pan_model=MG996R, tilt_model=MICRO_SERVO):
+        self.primary_servo = primary_servo
+        self.micro_servo = micro_servo
+        self.position = (float(position[0]), float(position[1]))
+        self.pan_model = pan_model
+        self.tilt_model = tilt_model
+        self.frame_end = 0.0  # End of the PWM period started by the last held reading
+        self.read_time = 0.0  # Duration of the last held reading
+
+    def frame(self):
+        return [(self.primary_servo, self.position[0]), (self.micro_servo, self.position[1])]
+
+    def finish_frame(self):
+        """Wait out a period left open by held readings before the next one starts."""
+        time.sleep(max(self.frame_end - time.monotonic(), 0))
+
+    def move_to(self, pan, tilt):
+        """Run the planned move, then hold the target for the slower axis's settle time."""
+        target = (float(pan), float(tilt))
+        pan_setpoints, tilt_setpoints = plan_move(self.position, target, self.pan_model, self.tilt_model)
+        self.finish_frame()
+        run_move(self.primary_servo, self.micro_servo, pan_setpoints, tilt_setpoints)
+        moved = target != self.position
+        self.position = target
+        if moved:
+            settle = max(self.pan_model.settle_time, self.tilt_model.settle_time)
+            self.hold(int(np.ceil(settle / SETPOINT_DT)))
+
+    def hold(self, periods=1):
+        """Keep both servos driven at the current target."""
+        self.finish_frame()
+        frame = self.frame()
+        for _ in range(periods):
+            send_servo_frame(frame)
+
+    def read_held(self, read_value):
+        """
+        Take one reading while holding the target: the reading runs in the low time of the
+        current PWM period, and a new period is started once the time left in it would not
+        fit another reading (judged by how long the last one took).
+        """
+        now = time.monotonic()
+        if now + self.read_time > self.frame_end:
+            time.sleep(max(self.frame_end - now, 0))
+            self.frame_end, _ = start_servo_frame(self.frame())
+        start = time.monotonic()
+        value = read_value()
+        self.read_time = time.monotonic() - start
+        return value
+
+    def held(self, read_value):
+        """Wrap read_value (e.g. for a SettleDetector) so every reading keeps the target held."""
+        return lambda: self.read_held(read_value)
+
+
+def move_cost(a, b, pan_model=MG996R, tilt_model=MICRO_SERVO):
+    """Arrival time from a to b: the slower axis decides. Broadcasts over arrays of points."""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    return np.maximum(pan_model.move_time(b[..., 0] - a[..., 0]),
+                      tilt_model.move_time(b[..., 1] - a[..., 1]))
+
+
+def grid_waypoints(pan_step=10, tilt_step=10):
+    pan = np.arange(PRIMARY_START_ANGLE, PRIMARY_END_ANGLE + 1, pan_step)
+    tilt = np.arange(MICRO_START_ANGLE, MICRO_END_ANGLE - 1, -tilt_step)
+    grid_pan, grid_tilt = np.meshgrid(pan, tilt)
+    return np.column_stack([grid_pan.ravel(), grid_tilt.ravel()]).astype(np.float64)
+
+
+def order_boustrophedon(points):
+    """Rows by descending tilt, alternating pan direction."""
+    points = np.asarray(points, dtype=np.float64)
+    tilts = np.unique(points[:, 1])[::-1]
+    ordered = []
+    for row, tilt in enumerate(tilts):
+        in_row = points[points[:, 1] == tilt]
+        in_row = in_row[np.argsort(in_row[:, 0])]
+        ordered.append(in_row if row % 2 == 0 else in_row[::-1])
+    return np.concatenate(ordered)
+
+
+def order_spiral(points):
+    """Outward spiral from the centre of the scan area, ring by ring."""
+    points = np.asarray(points, dtype=np.float64)
+    center = (points.min(axis=0) + points.max(axis=0)) / 2
+    offset = points - center
+    spacing = np.array([np.diff(np.unique(points[:, 0])).min(initial=1.0),
+                        np.diff(np.unique(points[:, 1])).min(initial=1.0)])
+    ring = np.max(np.abs(np.rint(offset / spacing)), axis=1)
+    angle = np.arctan2(offset[:, 1], offset[:, 0])
+    return points[np.lexsort((angle, ring))]
+
+
+def tsp_tour(points, start=None, pan_model=MG996R, tilt_model=MICRO_SERVO, passes=4):
+    """
+    Visiting order (indices into points) of a nearest-neighbour tour by move time, improved
+    with 2-opt. The tour begins at the point closest to start (the first point if None).
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    n = len(points)
+    if n < 2:
+        return np.arange(n)
+    cost = move_cost(points[:, None, :], points[None, :, :], pan_model, tilt_model)
+
+    first = 0 if start is None else int(np.argmin(move_cost(start, points, pan_model, tilt_model)))
+    tour = [first]
+    visited = np.zeros(n, dtype=bool)
+    visited[first] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, cost[tour[-1]])
+        nxt = int(np.argmin(row))
+        tour.append(nxt)
+        visited[nxt] = True
+    tour = np.array(tour)
+
+    # 2-opt on an open path: reversing tour[i:j+1] swaps edges (i-1, i) and (j, j+1)
+    for _ in range(passes):
+        improved = False
+        for i in range(1, n - 1):
+            a, b = tour[i - 1], tour[i]
+            c = tour[i + 1:]
+            d = np.append(tour[i + 2:], -1)
+            before = cost[a, b] + np.where(d >= 0, cost[c, d], 0.0)
+            after = cost[a, c] + np.where(d >= 0, cost[b, d], 0.0)
+            gain = before - after
+            j = int(np.argmax(gain))
+            if gain[j] > 1e-9:
+                tour[i:i + j + 2] = tour[i:i + j + 2][::-1]
+                improved = True
+        if not improved:
+            break
+    return tour
+
+
+def order_tsp(points, start=None, pan_model=MG996R, tilt_model=MICRO_SERVO, passes=4):
+    """Nearest-neighbour tour by move time, improved with 2-opt."""
+    points = np.asarray(points, dtype=np.float64)
+    return points[tsp_tour(points, start, pan_model, tilt_model, passes)]
+
+
+def order_waypoints(points, order="tsp", start=None):
+    if order not in ORDERS:
+        raise ValueError(f"Unknown waypoint order '{order}', expected one of {ORDERS}")
+    if order == "boustrophedon":
+        return order_boustrophedon(points)
+    if order == "spiral":
+        return order_spiral(points)
+    return order_tsp(points, start)
+
+
+def simulate_plan(waypoints, start=None, dwell=0.05, pan_model=MG996R, tilt_model=MICRO_SERVO):
+    """Expected duration of a plan: per-move arrival times plus a dwell at every waypoint."""
+    waypoints = np.asarray(waypoints, dtype=np.float64)
+    start = waypoints[0] if start is None else np.asarray(start, dtype=np.float64)
+    previous = np.vstack([start, waypoints[:-1]])
+    moves = move_cost(previous, waypoints, pan_model, tilt_model)
+    return float(moves.sum() + dwell * len(waypoints)), moves
+
+
+def main():
+    points = grid_waypoints()
+    start = np.array([PRIMARY_START_ANGLE, MICRO_START_ANGLE], dtype=np.float64)
+    # The previous scanners: 25 PWM periods (0.5 s) per move regardless of distance
+    fixed = 25 * SETPOINT_DT * len(points)
+    print(f"{len(points)} waypoints | fixed 25-period dwell: {fixed:.1f} s")
+    for order in ORDERS:
+        plan = order_waypoints(points, order, start)
+        total, moves = simulate_plan(plan, start)
+        print(f"{order:>14}: {total:6.1f} s (longest move {moves.max() * 1000:.0f} ms)")
+
+    pan, tilt = plan_move((0, 160), (120, 80))
+    print(f"Full-range move: {len(pan)} setpoints ({len(pan) * SETPOINT_DT:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
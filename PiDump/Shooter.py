@@ -1,10 +1,13 @@
 import gpiod
-import spidev
 import time
 import numpy as np
 import cv2
 import os
 
+from RFBurstSampler import BurstSampler, open_spi
+from RFCalibration import load_calibration
+from RFScanGrid import RFScanGrid
+
 os.environ["QT_QPA_PLATFORM"] = "xcb"
 
 # Constants
@@ -25,45 +28,16 @@ MIN_PULSE_WIDTH = 0.5
 MAX_PULSE_WIDTH = 2.5
 PERIOD = 20  # ms
 
-# RF Meter Constants
-RFMETER_FILTER_USEFULL_DATA = 0x1FFE
-RFMETER_ADC_RESOLUTION = 4096
-RFMETER_DEF_VREF = 2.5
-RFMETER_DEF_SLOPE = -0.025
-RFMETER_DEF_INTERCEPT = 20.0
-RFMETER_DEF_LIMIT_HIGH = 2.0
-RFMETER_DEF_LIMIT_LOW = 0.5
-
 # -------- RF Meter Class --------
 class RfMeter:
-    def __init__(self, bus=0, device=0, speed=100000):
-        self.spi = spidev.SpiDev()
-        self.spi.open(bus, device)
-        self.spi.max_speed_hz = speed
-        self.spi.mode = 0
-
-    def read_data(self):
-        time.sleep(0.001)
-        result = self.spi.xfer2([0x00, 0x00])
-        time.sleep(0.001)
-        data = (result[0] << 8) | result[1]
-        return data
-
-    def get_raw_data(self):
-        result = self.read_data()
-        return (result & RFMETER_FILTER_USEFULL_DATA) >> 1
-
-    def get_voltage(self):
-        reading = self.get_raw_data()
-        return (float(reading) * RFMETER_DEF_VREF) / RFMETER_ADC_RESOLUTION
-
-    def get_signal_strength(self, slope, intercept):
-        voltage = self.get_voltage()
-        if voltage > RFMETER_DEF_LIMIT_HIGH:
-            return (RFMETER_DEF_LIMIT_HIGH / slope) + intercept
-        elif voltage < RFMETER_DEF_LIMIT_LOW:
-            return (RFMETER_DEF_LIMIT_LOW / slope) + intercept
-        return (voltage / slope) + intercept
+    def __init__(self, config=None):
+        self.spi = open_spi(config)  # Benchmarked settings from spi_config.json
+        # Versioned AD8318 calibration (calibrations/ad8318_v<N>.json) instead of fixed slope/intercept
+        self.sampler = BurstSampler(self.spi, convert=load_calibration().to_dbm)
+
+    def get_signal_strength(self):
+        """Mean RF power in dBm of one burst of conversions."""
+        return self.sampler.sample().mean
 
     def close(self):
         self.spi.close()
@@ -89,8 +63,8 @@ def set_servo_angle(servo, angle):
 # Initialize RF meter
 rfmeter = RfMeter()
 
-# Initialize RF data matrix
-rf_data = []
+# Initialize RF data grid (rows by tilt angle, columns by pan angle)
+rf_grid = RFScanGrid.for_scan(pan_step=10, tilt_step=5)
 
 try:
     print(f"Initializing micro servo to {MICRO_START_ANGLE}°...")
@@ -101,16 +75,13 @@ try:
 
     while micro_angle >= MICRO_END_ANGLE:
         print(f"Starting new scan cycle. Micro Servo: {micro_angle}°")
-        rf_row = []
 
         print("Moving primary servo from 0° to 120°...")
         for angle in range(PRIMARY_START_ANGLE, PRIMARY_END_ANGLE + 1, 10):
             set_servo_angle(primary_servo, angle)
-            rf_power = rfmeter.get_signal_strength(RFMETER_DEF_SLOPE, RFMETER_DEF_INTERCEPT)
+            rf_power = rfmeter.get_signal_strength()
             print(f"Primary {angle}° | Micro {micro_angle}° | RF Power: {rf_power:.2f} dBm")
-            rf_row.append(rf_power)
-        
-        rf_data.append(rf_row)
+            rf_grid.add(angle, micro_angle, rf_power, time.time())
 
         micro_angle -= 5
         if micro_angle < MICRO_END_ANGLE:
@@ -118,14 +89,11 @@ try:
         set_servo_angle(micro_servo, micro_angle)
 
         print("Moving primary servo from 120° to 0°...")
-        reverse_rf_row = []
         for angle in range(PRIMARY_END_ANGLE, PRIMARY_START_ANGLE - 1, -10):
             set_servo_angle(primary_servo, angle)
-            rf_power = rfmeter.get_signal_strength(RFMETER_DEF_SLOPE, RFMETER_DEF_INTERCEPT)
+            rf_power = rfmeter.get_signal_strength()
             print(f"Primary {angle}° | Micro {micro_angle}° | RF Power: {rf_power:.2f} dBm")
-            reverse_rf_row.append(rf_power)
-        
-        rf_data.append(reverse_rf_row)
+            rf_grid.add(angle, micro_angle, rf_power, time.time())
 
         micro_angle -= 5
         if micro_angle < MICRO_END_ANGLE:
@@ -142,7 +110,8 @@ finally:
     micro_servo.release()
     rfmeter.close()
 
-    rf_matrix = np.array(rf_data)
+    # Highest tilt on top; unvisited cells (interrupted scan) show as the weakest level
+    rf_matrix = rf_grid.values(empty=-60)[::-1]
     min_val, max_val = 0, -60
     rf_matrix_normalized = np.clip((rf_matrix - min_val) / (max_val - min_val), 0, 1) * 255
     rf_matrix_uint8 = rf_matrix_normalized.astype(np.uint8)
@@ -0,0 +1,210 @@
+import os
+import sys
+import time
+from collections import namedtuple
+import numpy as np
+import cv2
+
+from ThermalProbe import MLX_SHAPE
+
+# Per-pixel background model and thermal anomaly detection.
+# A fixed temp_threshold cannot tell a radiator from a fire. This keeps an
+# exponentially weighted mean and variance for each of the 768 pixels with a slow
+# learning rate and scores every frame in z-score units against it, so an alert
+# means "warmer than this pixel normally is". Anomalous pixels learn at a small
+# fraction of the rate, so a passing hotspot is not learned into the background
+# but a lasting scene change (a door left open, a moved object) is absorbed within
+# about a minute at 8 Hz and its event ends. Detections are debounced (a few
+# consecutive frames to start, a few clear frames to end) and emitted as events
+# with a snapshot of the frame. The model is saved to disk periodically and
+# loaded on start, so a restart does not relearn from scratch.
+
+LEARNING_RATE = 0.01  # Per frame; about 12 s of memory at 8 Hz
+ANOMALY_RATE_FACTOR = 0.02  # Learning rate of anomalous pixels relative to the others
+INITIAL_STD = 2.0  # Degrees, until the variance has been learned
+MIN_STD = 0.3  # Degrees, floor so sensor noise on a flat scene doesn't score huge z
+Z_THRESHOLD = 4.0
+MIN_PIXELS = 2  # Anomalous pixels needed in a frame
+ON_FRAMES = 3  # Consecutive anomalous frames to start an event
+OFF_FRAMES = 8  # Consecutive clear frames to end it
+WARMUP_FRAMES = 40  # Frames learned before anything is reported
+SAVE_INTERVAL = 60.0  # Seconds between model saves
+MODEL_PATH = "thermal_background.npz"
+SNAPSHOT_DIR = "anomalies"
+
+# kind is "start" or "end"; peak is the sensor (row, col) of the highest z-score
+AnomalyEvent = namedtuple("AnomalyEvent", ["timestamp", "kind", "max_z", "pixels", "peak", "peak_temp", "snapshot"])
+
+
+class BackgroundModel:
+    """Exponentially weighted per-pixel mean and variance of thermal frames."""
+
+    def __init__(self, shape=MLX_SHAPE, learning_rate=LEARNING_RATE):
+        self.learning_rate = learning_rate
+        self.mean = np.zeros(shape)
+        self.var = np.full(shape, INITIAL_STD ** 2)
+        self.frames = 0
+
+    def score(self, frame):
+        """z-score of every pixel against the background (positive is warmer)."""
+        return (frame - self.mean) / np.sqrt(np.maximum(self.var, MIN_STD ** 2))
+
+    def update(self, frame, exclude=None):
+        """Learn one frame; pixels in the exclude mask learn at ANOMALY_RATE_FACTOR of the rate."""
+        if self.frames == 0:
+            self.mean[:] = frame
+            self.frames = 1
+            return
+        # Learn quickly at first (running average), then settle to the slow rate
+        rate = max(self.learning_rate, 1.0 / (self.frames + 1))
+        rate = np.full(frame.shape, rate) if exclude is None else np.where(exclude, rate * ANOMALY_RATE_FACTOR, rate)
+        delta = frame - self.mean
+        self.mean += rate * delta
+        self.var = (1 - rate) * (self.var + rate * delta ** 2)
+        self.frames += 1
+
+    def save(self, path=MODEL_PATH):
+        """Write atomically so a crash mid-save never leaves a truncated model."""
+        temporary = path + ".tmp.npz"
+        np.savez(temporary, mean=self.mean, var=self.var, frames=self.frames,
+                 learning_rate=self.learning_rate)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path=MODEL_PATH, shape=MLX_SHAPE):
+        """Saved model if there is one with the right shape, otherwise a fresh one."""
+        if not os.path.exists(path):
+            return cls(shape)
+        with np.load(path) as data:
+            if data["mean"].shape != tuple(shape):
+                return cls(shape)
+            model = cls(shape, float(data["learning_rate"]))
+            model.mean[:] = data["mean"]
+            model.var[:] = data["var"]
+            model.frames = int(data["frames"])
+        return model
+
+
+class AnomalyDetector:
+    """Scores frames against a BackgroundModel and emits debounced AnomalyEvents."""
+
+    def __init__(self, model=None, z_threshold=Z_THRESHOLD, min_pixels=MIN_PIXELS, on_frames=ON_FRAMES,
+                 off_frames=OFF_FRAMES, model_path=MODEL_PATH, snapshot_dir=SNAPSHOT_DIR,
+                 save_interval=SAVE_INTERVAL, clock=time.time):
+        self.model = model or BackgroundModel.load(model_path)
+        self.z_threshold = z_threshold
+        self.min_pixels = min_pixels
+        self.on_frames = on_frames
+        self.off_frames = off_frames
+        self.model_path = model_path
+        self.snapshot_dir = snapshot_dir
+        self.save_interval = save_interval
+        self.clock = clock
+        self.active = False
+        self.streak = 0  # Consecutive frames disagreeing with the current state
+        self.last_save = clock()
+        self.z = np.zeros(self.model.mean.shape)
+
+    def process(self, frame):
+        """Score, learn and debounce one frame; returns a list of new events."""
+        frame = np.asarray(frame, dtype=np.float64).reshape(self.model.mean.shape)
+        now = self.clock()
+        self.z = self.model.score(frame)
+        anomalous = self.z > self.z_threshold
+        self.model.update(frame, exclude=anomalous)
+
+        events = []
+        if self.model.frames > WARMUP_FRAMES:
+            detected = int(anomalous.sum()) >= self.min_pixels
+            self.streak = self.streak + 1 if detected != self.active else 0
+            if not self.active and self.streak >= self.on_frames:
+                self.active, self.streak = True, 0
+                events.append(self.event(now, "start", frame, anomalous))
+            elif self.active and self.streak >= self.off_frames:
+                self.active, self.streak = False, 0
+                events.append(self.event(now, "end", frame, anomalous))
+
+        if self.model_path and now - self.last_save >= self.save_interval:
+            self.model.save(self.model_path)
+            self.last_save = now
+        return events
+
+    def event(self, timestamp, kind, frame, anomalous):
+        peak = np.unravel_index(np.argmax(self.z), self.z.shape)
+        snapshot = self.snapshot(timestamp, frame) if kind == "start" and self.snapshot_dir else None
+        return AnomalyEvent(timestamp, kind, float(self.z[peak]), int(anomalous.sum()), tuple(int(i) for i in peak),
+                            float(frame[peak]), snapshot)
+
+    def snapshot(self, timestamp, frame):
+        """Save the frame, z-scores and background plus a colour preview; returns the .npz path."""
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        stem = os.path.join(self.snapshot_dir, time.strftime("%Y%m%d_%H%M%S", time.localtime(timestamp)) +
+                            f"_{int(timestamp * 1000) % 1000:03d}")
+        np.savez_compressed(stem + ".npz", frame=frame, z=self.z, background=self.model.mean)
+        normalized = cv2.normalize(frame, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+        preview = cv2.resize(cv2.applyColorMap(normalized, cv2.COLORMAP_JET), (320, 240),
+                             interpolation=cv2.INTER_NEAREST)
+        cv2.imwrite(stem + ".png", preview)
+        return stem + ".npz"
+
+    def close(self):
+        if self.model_path:
+            self.model.save(self.model_path)
+
+
+def monitor():
+    """Watch the MLX90640 and print anomaly events until Ctrl+C."""
+    import board
+    import busio
+    import adafruit_mlx90640
+
+    i2c = busio.I2C(board.SCL, board.SDA, frequency=1000000)
+    mlx = adafruit_mlx90640.MLX90640(i2c)
+    mlx.refresh_rate = adafruit_mlx90640.RefreshRate.REFRESH_8_HZ
+    frame = [0] * MLX_SHAPE[0] * MLX_SHAPE[1]
+
+    detector = AnomalyDetector()
+    print(f"Background model has {detector.model.frames} frames. Monitoring... Press Ctrl+C to stop.")
+    try:
+        while True:
+            try:
+                mlx.getFrame(frame)
+            except ValueError:
+                continue
+            for event in detector.process(frame):
+                print(f"{time.strftime('%H:%M:%S')} anomaly {event.kind}: z {event.max_z:.1f}, {event.pixels} pixels, "
+                      f"{event.peak_temp:.1f}C at {event.peak} {event.snapshot or ''}")
+    except KeyboardInterrupt:
+        print("Exiting...")
+    finally:
+        detector.close()
+
+
+def main():
+    if "--sensor" in sys.argv:
+        monitor()
+        return
+
+    rng = np.random.default_rng(0)
+    clock = iter(np.arange(0, 1000, 0.125))
+    detector = AnomalyDetector(BackgroundModel(), model_path=None, snapshot_dir=None, clock=lambda: next(clock))
+    # Warm wall on the right, person-sized hotspot appearing for frames 300..340
+    background = 22 + np.linspace(0, 8, MLX_SHAPE[1])[None, :] + np.zeros(MLX_SHAPE)
+    rows, cols = np.mgrid[:MLX_SHAPE[0], :MLX_SHAPE[1]]
+    blob = 8 * np.exp(-((rows - 12) ** 2 + (cols - 8) ** 2) / 6)
+
+    start = time.perf_counter()
+    for i in range(500):
+        frame = background + rng.normal(0, 0.3, MLX_SHAPE)
+        if 300 <= i < 340:
+            frame += blob
+        for event in detector.process(frame):
+            print(f"frame {i}: {event.kind} | z {event.max_z:.1f} | {event.pixels} pixels | "
+                  f"{event.peak_temp:.1f}C at {event.peak}")
+    elapsed = (time.perf_counter() - start) / 500
+    print(f"{elapsed * 1e6:.0f} us per frame; a fixed 28C threshold would flag the wall "
+          f"({int((background > 28).sum())} pixels) every frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import time
+from collections import namedtuple
+import numpy as np
+import cv2
+from scipy.optimize import linear_sum_assignment
+
+from ThermalProbe import MLX_SHAPE, alignment_transform
+
+# Hotspot detection and tracking on thermal frames.
+# Each frame is thresholded at sensor resolution (24x32, not the upscaled 640x480)
+# and split into blobs with cv2.connectedComponentsWithStats. Blobs are associated
+# with the existing tracks by IoU of their boxes using the Hungarian algorithm, so
+# a hotspot keeps its id while it moves. Tracks are drawn in display space through
+# the same AlignmentTransform as the probes. At this resolution detection plus
+# tracking takes a fraction of a millisecond, so it can run on every subpage.
+
+MIN_AREA = 2  # Sensor pixels
+IOU_THRESHOLD = 0.1  # Minimum overlap to continue a track
+MAX_MISSED = 3  # Frames a track survives without a matching blob
+MIN_HITS = 2  # Frames before a track is reported
+
+# box is (x, y, w, h) in sensor pixels; peak is the sensor (row, col) of the hottest pixel
+Hotspot = namedtuple("Hotspot", ["box", "centroid", "area", "max_temp", "peak"])
+
+
+class Track:
+    __slots__ = ("track_id", "hotspot", "hits", "missed", "first_seen", "last_seen")
+
+    def __init__(self, track_id, hotspot, timestamp):
+        self.track_id = track_id
+        self.hotspot = hotspot
+        self.hits = 1
+        self.missed = 0
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+
+
+def detect_hotspots(thermal_array, lower, upper=np.inf, min_area=MIN_AREA):
+    """Connected regions of the sensor frame with lower <= temperature <= upper."""
+    array = np.asarray(thermal_array, dtype=np.float32)
+    mask = ((array >= lower) & (array <= upper)).astype(np.uint8)
+    count, labels, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    if count <= 1:
+        return []
+    # Peak temperature and its pixel per label in one pass
+    flat_labels = labels.ravel()
+    order = np.lexsort((array.ravel(), flat_labels))
+    last = np.flatnonzero(np.r_[flat_labels[order][1:] != flat_labels[order][:-1], True])
+    peak_index = order[last]  # Hottest pixel of label 0, 1, ... count - 1
+
+    hotspots = []
+    for label in range(1, count):
+        x, y, w, h, area = stats[label]
+        if area < min_area:
+            continue
+        peak = divmod(int(peak_index[label]), array.shape[1])
+        hotspots.append(Hotspot((int(x), int(y), int(w), int(h)), tuple(centroids[label]), int(area),
+                                float(array[peak]), peak))
+    return hotspots
+
+
+def box_iou(a, b):
+    """IoU matrix between box arrays a (n, 4) and b (m, 4) of (x, y, w, h)."""
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    x0 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y0 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x1 = np.minimum(a[:, None, 0] + a[:, None, 2], b[None, :, 0] + b[None, :, 2])
+    y1 = np.minimum(a[:, None, 1] + a[:, None, 3], b[None, :, 1] + b[None, :, 3])
+    intersection = np.clip(x1 - x0, 0, None) * np.clip(y1 - y0, 0, None)
+    union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None, :] - intersection
+    return intersection / np.maximum(union, 1e-9)
+
+
+class HotspotTracker:
+    """Associates hotspots across frames by IoU with optimal (Hungarian) assignment."""
+
+    def __init__(self, iou_threshold=IOU_THRESHOLD, max_missed=MAX_MISSED, min_hits=MIN_HITS):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.min_hits = min_hits
+        self.tracks = []
+        self.next_id = 1
+
+    def update(self, hotspots, timestamp=None):
+        """Feed one frame's hotspots; returns the confirmed tracks."""
+        timestamp = time.time() if timestamp is None else timestamp
+        matched_tracks = set()
+        matched_hotspots = set()
+        if self.tracks and hotspots:
+            iou = box_iou([t.hotspot.box for t in self.tracks], [h.box for h in hotspots])
+            rows, cols = linear_sum_assignment(-iou)
+            for row, col in zip(rows, cols):
+                if iou[row, col] >= self.iou_threshold:
+                    track = self.tracks[row]
+                    track.hotspot = hotspots[col]
+                    track.hits += 1
+                    track.missed = 0
+                    track.last_seen = timestamp
+                    matched_tracks.add(row)
+                    matched_hotspots.add(col)
+
+        for i, track in enumerate(self.tracks):
+            if i not in matched_tracks:
+                track.missed += 1
+        self.tracks = [t for t in self.tracks if t.missed <= self.max_missed]
+        for i, hotspot in enumerate(hotspots):
+            if i not in matched_hotspots:
+                self.tracks.append(Track(self.next_id, hotspot, timestamp))
+                self.next_id += 1
+        return self.confirmed()
+
+    def confirmed(self):
+        return [t for t in self.tracks if t.hits >= self.min_hits and t.missed == 0]
+
+
+def display_box(box, transform):
+    """Display rectangle (x0, y0, x1, y1) covering a sensor box's pixels."""
+    x, y, w, h = box
+    # Pixel edges are half a pixel either side of the centres; the flip swaps left and right
+    xs, ys = transform.to_display(np.array([x - 0.5, x + w - 0.5]), np.array([y - 0.5, y + h - 0.5]))
+    return int(xs.min()), int(ys.min()), int(xs.max()), int(ys.max())
+
+
+def draw_tracks(image, tracks, transform=None, color=(0, 0, 255), thickness=2):
+    transform = transform or alignment_transform()
+    for track in tracks:
+        x0, y0, x1, y1 = display_box(track.hotspot.box, transform)
+        cv2.rectangle(image, (x0, y0), (x1, y1), color, thickness)
+        cv2.putText(image, f"#{track.track_id} {track.hotspot.max_temp:.1f}C", (x0, max(y0 - 4, 12)),
+                    cv2.FONT_HERSHEY_PLAIN, 1, color, 1, cv2.LINE_AA)
+    return image
+
+
+def main():
+    rng = np.random.default_rng(0)
+    tracker = HotspotTracker()
+    position = np.array([4.0, 10.0])
+    frames = 200
+    elapsed = 0.0
+    ids = set()
+    for i in range(frames):
+        frame = 24 + rng.normal(0, 0.3, MLX_SHAPE)
+        rows, cols = np.mgrid[:MLX_SHAPE[0], :MLX_SHAPE[1]]
+        position += (0.1, 0.05)
+        frame += 15 * np.exp(-((rows - position[1]) ** 2 + (cols - position[0]) ** 2) / 4)  # Moving hotspot
+        frame += 12 * np.exp(-((rows - 6) ** 2 + (cols - 25) ** 2) / 3)  # Static hotspot
+        start = time.perf_counter()
+        tracks = tracker.update(detect_hotspots(frame, 30), timestamp=i)
+        elapsed += time.perf_counter() - start
+        ids.update(t.track_id for t in tracks)
+    print(f"Detect + track: {elapsed / frames * 1e6:.0f} us per frame | {len(tracks)} tracks, "
+          f"{len(ids)} ids used over {frames} frames")
+
+
+if __name__ == "__main__":
+    main()
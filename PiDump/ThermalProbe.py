@@ -0,0 +1,140 @@
+from functools import lru_cache
+import numpy as np
+
+# Sub-pixel temperature probes at display coordinates.
+# The crosshair read thermal_array[12, 16] on the raw 24x32 grid, ignoring the crop
+# offset and horizontal flip applied by align_and_crop(), so the number shown was
+# not the pixel under the crosshair. AlignmentTransform is the same crop/flip/resize
+# as align_and_crop() expressed as coordinates: display points are mapped back to
+# sensor space with cv2.resize's INTER_LINEAR pixel-centre convention and sampled
+# bilinearly, so a probe reads exactly what the aligned image shows there. Any
+# number of probes (crosshair, spot meters, mouse cursor) are read in one
+# vectorised call per frame.
+
+MLX_SHAPE = (24, 32)
+DISPLAY_SIZE = (640, 480)  # (width, height)
+FOV_RATIO = 50.0 / 150.0  # Thermal FOV covered by the camera
+OFFSET_X = -1  # Sensor columns between the sensor centre and the camera centre
+
+
+class AlignmentTransform:
+    """Mapping between display pixels and sensor pixels for align_and_crop()."""
+
+    __slots__ = ("start_x", "start_y", "end_x", "end_y", "display_size", "scale_x", "scale_y")
+
+    def __init__(self, mlx_shape=MLX_SHAPE, display_size=DISPLAY_SIZE, fov_ratio=FOV_RATIO, offset_x=OFFSET_X):
+        cropped_width = int(mlx_shape[1] * fov_ratio)
+        cropped_height = int(mlx_shape[0] * fov_ratio)
+        center_x = mlx_shape[1] // 2 + offset_x
+        center_y = mlx_shape[0] // 2
+        self.start_x = max(center_x - cropped_width // 2, 0)
+        self.start_y = max(center_y - cropped_height // 2, 0)
+        self.end_x = min(center_x + cropped_width // 2, mlx_shape[1])
+        self.end_y = min(center_y + cropped_height // 2, mlx_shape[0])
+        self.display_size = display_size
+        self.scale_x = (self.end_x - self.start_x) / display_size[0]
+        self.scale_y = (self.end_y - self.start_y) / display_size[1]
+
+    @property
+    def crop(self):
+        """(rows, cols) slices of the sensor array that align_and_crop() keeps."""
+        return slice(self.start_y, self.end_y), slice(self.start_x, self.end_x)
+
+    def to_sensor(self, x, y):
+        """Fractional sensor (col, row) of display point(s), clamped to the cropped region."""
+        width = self.end_x - self.start_x
+        height = self.end_y - self.start_y
+        # cv2.resize INTER_LINEAR: src = (dst + 0.5) * scale - 0.5, clamped at the edges
+        crop_col = np.clip((np.asarray(x, dtype=np.float64) + 0.5) * self.scale_x - 0.5, 0, width - 1)
+        crop_row = np.clip((np.asarray(y, dtype=np.float64) + 0.5) * self.scale_y - 0.5, 0, height - 1)
+        # Undo the horizontal flip
+        return self.start_x + (width - 1) - crop_col, self.start_y + crop_row
+
+    def to_display(self, col, row):
+        """Display (x, y) of fractional sensor (col, row); inverse of to_sensor inside the crop."""
+        width = self.end_x - self.start_x
+        crop_col = (width - 1) - (np.asarray(col, dtype=np.float64) - self.start_x)
+        crop_row = np.asarray(row, dtype=np.float64) - self.start_y
+        return (crop_col + 0.5) / self.scale_x - 0.5, (crop_row + 0.5) / self.scale_y - 0.5
+
+
+@lru_cache(maxsize=8)
+def alignment_transform(mlx_shape=MLX_SHAPE, display_size=DISPLAY_SIZE, fov_ratio=FOV_RATIO, offset_x=OFFSET_X):
+    return AlignmentTransform(mlx_shape, display_size, fov_ratio, offset_x)
+
+
+def bilinear(array, col, row):
+    """Bilinear samples of a 2-D array at fractional (col, row) arrays inside its bounds."""
+    col = np.asarray(col, dtype=np.float64)
+    row = np.asarray(row, dtype=np.float64)
+    c0 = np.clip(np.floor(col).astype(np.intp), 0, array.shape[1] - 2)
+    r0 = np.clip(np.floor(row).astype(np.intp), 0, array.shape[0] - 2)
+    fc = col - c0
+    fr = row - r0
+    top = array[r0, c0] * (1 - fc) + array[r0, c0 + 1] * fc
+    bottom = array[r0 + 1, c0] * (1 - fc) + array[r0 + 1, c0 + 1] * fc
+    return top * (1 - fr) + bottom * fr
+
+
+class ThermalProbes:
+    """Named probe points in display coordinates, all read with one vectorised lookup."""
+
+    def __init__(self, transform=None):
+        self.transform = transform or alignment_transform()
+        self.names = []
+        self.points = np.zeros((0, 2))
+        self.sensor = (np.zeros(0), np.zeros(0))
+
+    def set(self, name, x, y):
+        if name in self.names:
+            self.points[self.names.index(name)] = (x, y)
+        else:
+            self.names.append(name)
+            self.points = np.vstack([self.points, (x, y)])
+        self.sensor = self.transform.to_sensor(self.points[:, 0], self.points[:, 1])
+
+    def remove(self, name):
+        if name in self.names:
+            index = self.names.index(name)
+            del self.names[index]
+            self.points = np.delete(self.points, index, axis=0)
+            self.sensor = self.transform.to_sensor(self.points[:, 0], self.points[:, 1])
+
+    def point(self, name):
+        """Display (x, y) of a probe as ints, for drawing its label."""
+        x, y = self.points[self.names.index(name)]
+        return int(x), int(y)
+
+    def read(self, thermal_array):
+        """Temperature under every probe, as a dict of name -> degrees."""
+        values = bilinear(np.asarray(thermal_array, dtype=np.float64), *self.sensor)
+        return dict(zip(self.names, values.tolist()))
+
+
+def probe(thermal_array, x, y, transform=None):
+    """Temperatures at arbitrary display point(s) in one call."""
+    transform = transform or alignment_transform()
+    return bilinear(np.asarray(thermal_array, dtype=np.float64), *transform.to_sensor(x, y))
+
+
+def main():
+    import cv2
+
+    rng = np.random.default_rng(0)
+    thermal_array = 25 + 10 * rng.random(MLX_SHAPE)
+    transform = alignment_transform()
+
+    # Reference: the aligned array exactly as align_and_crop() produces it
+    rows, cols = transform.crop
+    aligned = cv2.resize(np.flip(thermal_array[rows, cols], axis=1), DISPLAY_SIZE, interpolation=cv2.INTER_LINEAR)
+
+    x = rng.integers(0, DISPLAY_SIZE[0], 1000)
+    y = rng.integers(0, DISPLAY_SIZE[1], 1000)
+    error = np.abs(probe(thermal_array, x, y, transform) - aligned[y, x]).max()
+    center = probe(thermal_array, DISPLAY_SIZE[0] // 2, DISPLAY_SIZE[1] // 2, transform)
+    print(f"Max probe error vs aligned image: {error:.2e} C over 1000 points")
+    print(f"Crosshair: probe {float(center):.2f} C vs raw thermal_array[12, 16] {thermal_array[12, 16]:.2f} C")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import time
+import numpy as np
+import cv2
+
+from ThermalProbe import MLX_SHAPE, alignment_transform
+
+# Multi-ROI thermal statistics.
+# Box and polygon regions with min/max/mean/std and hottest-point readouts. The
+# summed-area tables of the frame and of its square are built once per thermal
+# frame (cv2.integral2), so the mean and standard deviation of any box are four
+# lookups each. Polygon ROIs are rasterised to a sensor-resolution mask that is
+# cached until the ROI changes (its version is bumped). Every frame produces one
+# compact structured array with a row per ROI, which can be appended straight to a
+# binary log at the full sensor rate.
+#
+# ROIs are given in display coordinates and mapped to the sensor grid through the
+# same AlignmentTransform as the temperature probes.
+
+STATS_DTYPE = np.dtype([
+    ("frame", "<u4"),
+    ("timestamp", "<f8"),
+    ("roi", "<u2"),
+    ("mean", "<f4"),
+    ("std", "<f4"),
+    ("min", "<f4"),
+    ("max", "<f4"),
+    ("hot_row", "u1"),  # Sensor pixel of the maximum
+    ("hot_col", "u1"),
+    ("pixels", "<u2"),
+])
+
+POLYGON_SHIFT = 4  # Fractional bits for sub-pixel polygon vertices in cv2.fillPoly
+
+
+class ThermalROI:
+    """A box or polygon region in sensor coordinates; version changes whenever it is edited."""
+
+    __slots__ = ("roi_id", "kind", "points", "version")
+
+    def __init__(self, roi_id, kind, points):
+        self.roi_id = roi_id
+        self.kind = kind  # "box" or "polygon"
+        self.points = np.asarray(points, dtype=np.float64)
+        self.version = 0
+
+
+class ROIEngine:
+    """Per-frame statistics for a set of ROIs on the MLX90640 grid."""
+
+    def __init__(self, shape=MLX_SHAPE, transform=None):
+        self.shape = shape
+        self.transform = transform or alignment_transform(shape)
+        self.rois = {}
+        self.masks = {}  # roi_id -> (version, row slice, col slice, mask)
+        self.next_id = 0
+        self.frame = 0
+
+    def display_to_sensor(self, points):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        col, row = self.transform.to_sensor(points[:, 0], points[:, 1])
+        return np.column_stack([col, row])
+
+    def add_box(self, x0, y0, x1, y1):
+        """Box between two display corners; returns its id."""
+        return self.add("box", self.display_to_sensor([(x0, y0), (x1, y1)]))
+
+    def add_polygon(self, points):
+        """Polygon from display vertices; returns its id."""
+        return self.add("polygon", self.display_to_sensor(points))
+
+    def add(self, kind, sensor_points):
+        roi_id = self.next_id
+        self.next_id += 1
+        self.rois[roi_id] = ThermalROI(roi_id, kind, sensor_points)
+        return roi_id
+
+    def move(self, roi_id, points):
+        """Replace an ROI's display points; invalidates its cached mask."""
+        roi = self.rois[roi_id]
+        roi.points = self.display_to_sensor(points)
+        roi.version += 1
+
+    def remove(self, roi_id):
+        self.rois.pop(roi_id, None)
+        self.masks.pop(roi_id, None)
+
+    def box_bounds(self, points):
+        """(rows, cols) slices of the sensor pixels whose centres lie in the bounding box of points."""
+        low = np.ceil(points.min(axis=0) - 1e-9).astype(int)
+        high = np.floor(points.max(axis=0) + 1e-9).astype(int) + 1
+        low = np.maximum(low, 0)
+        high = np.minimum(high, (self.shape[1], self.shape[0]))
+        return slice(low[1], max(high[1], low[1] + 1)), slice(low[0], max(high[0], low[0] + 1))
+
+    def polygon_mask(self, roi):
+        cached = self.masks.get(roi.roi_id)
+        if cached is not None and cached[0] == roi.version:
+            return cached[1:]
+        rows, cols = self.box_bounds(roi.points)
+        mask = np.zeros((rows.stop - rows.start, cols.stop - cols.start), dtype=np.uint8)
+        vertices = np.rint((roi.points - (cols.start, rows.start)) * (1 << POLYGON_SHIFT)).astype(np.int32)
+        cv2.fillPoly(mask, [vertices], 1, cv2.LINE_8, POLYGON_SHIFT)
+        mask = mask.astype(bool)
+        self.masks[roi.roi_id] = (roi.version, rows, cols, mask)
+        return rows, cols, mask
+
+    def compute(self, thermal_array, timestamp=None):
+        """Statistics of every ROI for one frame, as a STATS_DTYPE array."""
+        array = np.asarray(thermal_array, dtype=np.float64).reshape(self.shape)
+        total, squares = cv2.integral2(array, sdepth=cv2.CV_64F)
+        stats = np.zeros(len(self.rois), dtype=STATS_DTYPE)
+        stats["frame"] = self.frame
+        stats["timestamp"] = time.time() if timestamp is None else timestamp
+
+        for i, roi in enumerate(self.rois.values()):
+            stats["roi"][i] = roi.roi_id
+            if roi.kind == "box":
+                rows, cols = self.box_bounds(roi.points)
+                r0, r1, c0, c1 = rows.start, rows.stop, cols.start, cols.stop
+                n = (r1 - r0) * (c1 - c0)
+                s = total[r1, c1] - total[r0, c1] - total[r1, c0] + total[r0, c0]
+                s2 = squares[r1, c1] - squares[r0, c1] - squares[r1, c0] + squares[r0, c0]
+                values = array[rows, cols]
+                hot = np.unravel_index(np.argmax(values), values.shape)
+                low = values.min()
+            else:
+                rows, cols, mask = self.polygon_mask(roi)
+                values = np.where(mask, array[rows, cols], -np.inf)
+                n = int(mask.sum())
+                if n == 0:
+                    continue
+                inside = array[rows, cols][mask]
+                s = inside.sum()
+                s2 = (inside ** 2).sum()
+                hot = np.unravel_index(np.argmax(values), values.shape)
+                low = inside.min()
+            mean = s / n
+            stats["mean"][i] = mean
+            stats["std"][i] = np.sqrt(max(s2 / n - mean ** 2, 0.0))
+            stats["min"][i] = low
+            stats["max"][i] = values[hot]
+            stats["hot_row"][i] = rows.start + hot[0]
+            stats["hot_col"][i] = cols.start + hot[1]
+            stats["pixels"][i] = n
+
+        self.frame += 1
+        return stats
+
+    def hot_point_display(self, stats):
+        """Display (x, y) of each row's hottest pixel, for drawing markers."""
+        return self.transform.to_display(stats["hot_col"].astype(np.float64), stats["hot_row"].astype(np.float64))
+
+
+def load_stats(path):
+    """Memory-map a log of STATS_DTYPE rows written with stats.tofile()."""
+    return np.memmap(path, dtype=STATS_DTYPE, mode="r")
+
+
+def main():
+    rng = np.random.default_rng(0)
+    engine = ROIEngine()
+    engine.add_box(0, 0, 639, 479)
+    engine.add_box(200, 150, 440, 330)
+    engine.add_polygon([(320, 60), (560, 400), (80, 400)])
+    for _ in range(8):
+        engine.add_box(*rng.integers(0, 320, 2), *rng.integers(320, 640, 2))
+
+    frames = [25 + 10 * rng.random(MLX_SHAPE) for _ in range(200)]
+    start = time.perf_counter()
+    for frame in frames:
+        stats = engine.compute(frame)
+    elapsed = (time.perf_counter() - start) / len(frames)
+
+    # Check the SAT box statistics against a direct computation
+    rows, cols = engine.box_bounds(engine.rois[1].points)
+    direct = frames[-1][rows, cols]
+    print(f"{len(engine.rois)} ROIs: {elapsed * 1e6:.0f} us per frame, {STATS_DTYPE.itemsize} bytes per ROI row")
+    print(f"Box 1: mean {stats['mean'][1]:.3f} (direct {direct.mean():.3f}), std {stats['std'][1]:.3f} "
+          f"(direct {direct.std():.3f}), max {stats['max'][1]:.2f} at sensor "
+          f"({stats['hot_row'][1]}, {stats['hot_col'][1]})")
+    print(f"Polygon: {stats['pixels'][2]} pixels, mean {stats['mean'][2]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
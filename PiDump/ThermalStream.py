@@ -0,0 +1,248 @@
+import sys
+import json
+import time
+import zlib
+import struct
+import socket
+import threading
+import numpy as np
+
+from ThermalProbe import MLX_SHAPE
+
+# Raw radiometric thermal stream over TCP.
+# Remote consumers get real temperatures rather than colour-mapped JPEG pixels.
+# Each thermal_array is sent as int16 centi-degrees (0.01 C steps, -327..327 C)
+# behind a small fixed header (sequence, timestamp, subpage, shape, flags). A
+# client can ask for delta encoding against the previous frame it was sent, zlib
+# compression and decimation (every Nth frame). Like the MJPEG stream, publishing
+# only stores the newest frame, and slow clients skip frames.
+#
+# Protocol: the client connects and sends one line of options, e.g.
+# "decimate=2 delta=1 zlib=1\n"; the server then sends HEADER + payload per frame.
+
+HOST = "0.0.0.0"
+PORT = 8001
+MAGIC = b"TH"
+VERSION = 1
+FLAG_DELTA = 1  # Payload is the difference from the previous frame sent on this connection
+FLAG_ZLIB = 2
+SUBPAGE_BOTH = 2  # Full frame assembled from both subpages (what getFrame returns)
+ZLIB_LEVEL = 1  # Fast; the deltas are mostly small so higher levels gain little
+
+# magic, version, flags, sequence, timestamp, subpage, rows, cols, payload bytes
+HEADER = struct.Struct("<2sBBIdBBBI")
+
+
+def to_centidegrees(thermal_array):
+    return np.clip(np.rint(np.asarray(thermal_array, dtype=np.float64) * 100), -32768, 32767).astype("<i2")
+
+
+def encode_frame(centi, sequence, timestamp, subpage=SUBPAGE_BOTH, previous=None, compress=False):
+    """Header + payload for one int16 frame; delta against previous when given."""
+    flags = 0
+    values = centi
+    if previous is not None:
+        # int16 wrap-around is undone exactly by the decoder's int16 addition
+        values = (centi.astype(np.int32) - previous).astype("<i2")
+        flags |= FLAG_DELTA
+    payload = values.tobytes()
+    if compress:
+        payload = zlib.compress(payload, ZLIB_LEVEL)
+        flags |= FLAG_ZLIB
+    rows, cols = centi.shape
+    return HEADER.pack(MAGIC, VERSION, flags, sequence, timestamp, subpage, rows, cols, len(payload)) + payload
+
+
+class FrameDecoder:
+    """Decodes a connection's frames back to float temperatures, tracking the delta reference."""
+
+    def __init__(self):
+        self.previous = None
+
+    def decode(self, header, payload):
+        magic, version, flags, sequence, timestamp, subpage, rows, cols, _ = header
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a thermal stream frame (magic {magic!r}, version {version})")
+        if flags & FLAG_ZLIB:
+            payload = zlib.decompress(payload)
+        centi = np.frombuffer(payload, dtype="<i2").reshape(rows, cols)
+        if flags & FLAG_DELTA:
+            if self.previous is None:
+                raise ValueError("Delta frame received before a full frame")
+            centi = self.previous + centi  # int16 arithmetic wraps back exactly
+        self.previous = centi
+        return sequence, timestamp, subpage, centi / 100.0
+
+
+def parse_options(line):
+    options = {"decimate": 1, "delta": 0, "zlib": 0}
+    for item in line.split():
+        key, _, value = item.partition("=")
+        if key in options:
+            options[key] = max(int(value), 1 if key == "decimate" else 0)
+    return options
+
+
+class ThermalStreamServer:
+    """TCP server streaming published thermal frames to every connected client."""
+
+    def __init__(self, host=HOST, port=PORT):
+        self.condition = threading.Condition()
+        self.centi = None
+        self.sequence = 0
+        self.timestamp = 0.0
+        self.subpage = SUBPAGE_BOTH
+        self.running = True
+        self.sock = socket.create_server((host, port))
+        self.port = self.sock.getsockname()[1]
+        self.thread = threading.Thread(target=self.accept_loop, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def publish(self, thermal_array, subpage=SUBPAGE_BOTH, timestamp=None):
+        """Hand over a new frame (converted to centi-degrees once, for all clients)."""
+        centi = to_centidegrees(thermal_array)
+        with self.condition:
+            self.centi = centi
+            self.sequence += 1
+            self.timestamp = time.time() if timestamp is None else timestamp
+            self.subpage = subpage
+            self.condition.notify_all()
+
+    def accept_loop(self):
+        while self.running:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self.serve_client, args=(conn,), daemon=True).start()
+
+    def serve_client(self, conn):
+        with conn:
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            options = parse_options(conn.makefile("r").readline())
+            previous = None
+            sent_sequence = 0
+            while self.running:
+                with self.condition:
+                    # Next frame whose sequence is a multiple of the decimation, newest first
+                    ready = lambda: self.sequence > sent_sequence and self.sequence % options["decimate"] == 0
+                    if not self.condition.wait_for(lambda: ready() or not self.running, timeout=5.0):
+                        continue
+                    if not self.running:
+                        return
+                    centi, sequence, timestamp, subpage = self.centi, self.sequence, self.timestamp, self.subpage
+                data = encode_frame(centi, sequence, timestamp, subpage,
+                                    previous if options["delta"] else None, bool(options["zlib"]))
+                try:
+                    conn.sendall(data)
+                except OSError:
+                    return
+                previous = centi
+                sent_sequence = sequence
+
+    def stop(self):
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        self.sock.close()
+
+
+class ThermalStreamClient:
+    """Connects to a ThermalStreamServer and yields (sequence, timestamp, subpage, temperatures)."""
+
+    def __init__(self, host="localhost", port=PORT, decimate=1, delta=True, compress=True):
+        self.sock = socket.create_connection((host, port))
+        self.sock.sendall(f"decimate={decimate} delta={int(delta)} zlib={int(compress)}\n".encode())
+        self.stream = self.sock.makefile("rb")
+        self.decoder = FrameDecoder()
+        self.bytes_received = 0
+
+    def frames(self):
+        while True:
+            raw = self.stream.read(HEADER.size)
+            if len(raw) < HEADER.size:
+                return
+            header = HEADER.unpack(raw)
+            payload = self.stream.read(header[-1])
+            self.bytes_received += HEADER.size + len(payload)
+            yield self.decoder.decode(header, payload)
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+
+def synthetic_frames(count, seed=0):
+    """Slowly drifting scene with a moving hotspot and sensor noise, like MLX90640 output."""
+    rng = np.random.default_rng(seed)
+    rows, cols = np.mgrid[:MLX_SHAPE[0], :MLX_SHAPE[1]]
+    base = 22 + 4 * np.sin(cols / 6.0) + rows * 0.1
+    for i in range(count):
+        hotspot = 12 * np.exp(-((rows - 12) ** 2 + (cols - 8 - 0.1 * i) ** 2) / 8)
+        yield base + hotspot + rng.normal(0, 0.15, MLX_SHAPE)
+
+
+def benchmark(count=200):
+    frames = list(synthetic_frames(count))
+    centis = [to_centidegrees(frame) for frame in frames]  # Delta reference, kept by the server per client
+    formats = {
+        "JSON (2 dp)": lambda i: json.dumps(np.round(frames[i], 2).tolist()).encode(),
+        "float32": lambda i: frames[i].astype("<f4").tobytes(),
+        "int16": lambda i: encode_frame(to_centidegrees(frames[i]), i, 0.0),
+        "int16+zlib": lambda i: encode_frame(to_centidegrees(frames[i]), i, 0.0, compress=True),
+        "int16+delta+zlib": lambda i: encode_frame(to_centidegrees(frames[i]), i, 0.0,
+                                                   previous=centis[i - 1] if i else None, compress=True),
+    }
+    print(f"{'format':>18} | {'bytes/frame':>11} | {'encode us':>9} | kB/s at 8 Hz")
+    for name, encode in formats.items():
+        start = time.perf_counter()
+        sizes = [len(encode(i)) for i in range(count)]
+        elapsed = (time.perf_counter() - start) / count
+        size = np.mean(sizes)
+        print(f"{name:>18} | {size:11.0f} | {elapsed * 1e6:9.1f} | {size * 8 / 1000:.1f}")
+
+
+def demo(count=100):
+    """Loopback: one server, clients with different options, checking the decoded temperatures."""
+    server = ThermalStreamServer(host="localhost", port=0).start()
+    options = [(1, False, False), (1, True, True), (4, True, True)]
+    clients = [ThermalStreamClient("localhost", server.port, *option) for option in options]
+    results = [[] for _ in clients]
+
+    def consume(client, result):
+        for frame in client.frames():
+            result.append(frame)
+
+    threads = [threading.Thread(target=consume, args=(c, r), daemon=True) for c, r in zip(clients, results)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+
+    sent = {}
+    for frame in synthetic_frames(count):
+        server.publish(frame)
+        sent[server.sequence] = frame
+        time.sleep(1 / 64)
+    time.sleep(0.2)
+    server.stop()
+    for client in clients:
+        client.close()
+
+    for (decimate, delta, compress), client, result in zip(options, clients, results):
+        error = max(np.abs(temps - sent[seq]).max() for seq, _, _, temps in result)
+        print(f"decimate {decimate}, delta {delta!s:>5}, zlib {compress!s:>5}: {len(result)} frames, "
+              f"{client.bytes_received / max(len(result), 1):.0f} bytes/frame, max error {error:.3f} C")
+
+
+def main():
+    if "--demo" in sys.argv:
+        demo()
+        return
+    benchmark()
+
+
+if __name__ == "__main__":
+    main()
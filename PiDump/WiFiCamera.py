@@ -1,9 +1,11 @@
 import gpiod
-import spidev
 import time
 import numpy as np
 import cv2
 
+from RFBurstSampler import BurstSampler, open_spi
+from RFCalibration import load_calibration
+
 import os
 os.environ["QT_QPA_PLATFORM"] = "xcb"
 
@@ -26,47 +28,15 @@ MIN_PULSE_WIDTH = 0.5  # milliseconds (0° position)
 MAX_PULSE_WIDTH = 2.5  # milliseconds (180° position)
 PERIOD = 20  # milliseconds (1/Frequency = 20ms for 50Hz)
 
-# RF Power Measurement Constants
-SPI_BUS = 0
-SPI_CS = 0  # Chip Select CE0 (GPIO 8)
-SPI_SPEED_HZ = 100000  # 1 MHz SPI speed
-SPI_MODE = 1  # MCP3201 works in SPI mode 0 or 1
-ADC_RESOLUTION = 4095  # 12-bit ADC
-V_REF = 2.5  # Reference voltage
-DEFAULT_SLOPE = -0.025  # V/dB
-DEFAULT_INTERCEPT = 20.0  # dBm
-
-# Setup SPI for RF Power Measurement
-spi = spidev.SpiDev()
-spi.open(SPI_BUS, SPI_CS)
-spi.max_speed_hz = SPI_SPEED_HZ
-spi.mode = SPI_MODE
-
-def read_adc_mcp3201():
-    """Read raw 12-bit value from MCP3201 ADC via SPI."""
-    time.sleep(0.0012)
-    bytes_in = spi.xfer2([0x00, 0x00])  # Send dummy bytes to receive data
-    time.sleep(0.0012)
-    raw16 = (bytes_in[0] << 8) | bytes_in[1]
-    adc_value = (raw16 >> 3) & 0x1FFE  # Extract the 12-bit ADC result
-    return adc_value
+# Setup SPI for RF Power Measurement (benchmarked settings from spi_config.json)
+spi = open_spi()
+
+# Bursts of ADC codes converted through the versioned AD8318 calibration (calibrations/ad8318_v<N>.json)
+sampler = BurstSampler(spi, convert=load_calibration().to_dbm)
 
 def get_rf_power_dbm():
-    """Convert ADC raw value to RF power in dBm with increased sensitivity for weak signals."""
-    adc_val = read_adc_mcp3201()
-    voltage = (adc_val / ADC_RESOLUTION) * V_REF
-    idle_adc_val = read_adc_mcp3201()
-    idle_voltage = (idle_adc_val / ADC_RESOLUTION) * V_REF
-    adjusted_intercept = - (idle_voltage / DEFAULT_SLOPE)
-    power_dbm = adjusted_intercept + (voltage / DEFAULT_SLOPE)
-    
-    # Increase sensitivity further for weak signals
-    if power_dbm < -40:
-        power_dbm += 8  # Increase sensitivity more aggressively
-    elif power_dbm < -30:
-        power_dbm += 5  # Moderate boost for weak signals
-    
-    return power_dbm
+    """Mean RF power in dBm of one burst of conversions."""
+    return sampler.sample().mean
 
 # Setup GPIO for Servos
 chip = gpiod.Chip(CHIP)
@@ -1,3 +1,5 @@
+from RFProjection import RFOverlay, load_projection
+
 # Initialize MLX90640 sensor
 i2c = busio.I2C(board.SCL, board.SDA, frequency=400000)
 mlx = adafruit_mlx90640.MLX90640(i2c)
@@ -120,8 +122,15 @@ picam1.stop()
 frame0 = cv2.cvtColor(frame0, cv2.COLOR_BGR2RGB)
 frame1 = cv2.cvtColor(frame1, cv2.COLOR_BGR2RGB)
 height, width = frame0.shape[:2]
-rf_matrix_resized = cv2.resize(rf_matrix, (width, height), interpolation=cv2.INTER_LINEAR)
-rf_colormap = cv2.applyColorMap(cv2.convertScaleAbs(rf_matrix_resized, alpha=255/np.max(rf_matrix_resized)), cv2.COLORMAP_JET)
+rf_colormap = cv2.applyColorMap(cv2.convertScaleAbs(rf_matrix, alpha=255/np.max(rf_matrix)), cv2.COLORMAP_JET)
+
+# Place each RF cell where its servo direction lands in the camera image (calibrations/rf_projection.json,
+# fitted with RFProjection.py) instead of stretching the grid over the whole frame
+rows, cols = rf_matrix.shape
+rf_overlay = RFOverlay(load_projection(width, height), width, height,
+                       (PRIMARY_START_ANGLE, PRIMARY_START_ANGLE + 10 * (cols - 1)),
+                       (MICRO_START_ANGLE - 10 * (rows - 1), MICRO_START_ANGLE), (rows, cols))
+rf_colormap = rf_overlay.warp(rf_colormap)  # Black outside the scanned area
 
 # Initialize visibility and opacity controls
 visibility = {'frame0': True, 'frame1': False, 'thermal': False, 'rf': False}
@@ -73,6 +73,10 @@ def draw_crosshair(image, center_x, center_y, gap=10, size=20, color=(0, 255, 25
     # Add transparency
     cv2.addWeighted(overlay, alpha, image, 1 - alpha, 0, image)
 
+# Display window setup, once
+cv2.namedWindow("Camera Output", cv2.WND_PROP_FULLSCREEN)
+cv2.setWindowProperty("Camera Output", cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+
 while True:
     try:
         # Capture the video frame from the Raspberry Pi camera
@@ -150,9 +154,6 @@ while True:
                     cv2.FONT_HERSHEY_DUPLEX, 0.35, (255, 255, 255), 1, cv2.LINE_AA)
 
         # Display the output
-        # Display the output
-        cv2.namedWindow("Camera Output", cv2.WND_PROP_FULLSCREEN)
-        cv2.setWindowProperty("Camera Output", cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
         cv2.imshow("Camera Output", output_image)
 
 
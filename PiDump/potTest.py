@@ -1,31 +1,18 @@
-import RPi.GPIO as GPIO
 import time
 
-# Set up GPIO mode
-GPIO.setmode(GPIO.BCM)
+from PulseMeter import PulseMeterThread
 
 # Define the GPIO pin connected to the analog signal
 analog_pin = 18  # GPIO18 (Physical pin 12)
 
-# Set up the GPIO pin as an input
-GPIO.setup(analog_pin, GPIO.IN)
-
-# Function to measure the time the pin stays HIGH
-def measure_high_time():
-    start_time = time.time()
-    while GPIO.input(analog_pin) == GPIO.LOW:
-        start_time = time.time()  # Wait for HIGH transition
-
-    # Measure how long the signal stays HIGH
-    while GPIO.input(analog_pin) == GPIO.HIGH:
-        pulse_duration = time.time() - start_time
-
-    return pulse_duration
+# Edges are timestamped by the kernel; the meter thread sleeps between them
+meter_thread = PulseMeterThread(pin=analog_pin)
+meter_thread.start()
 
 # Main loop to continuously read the HIGH pulse duration
 try:
     while True:
-        pulse_width = measure_high_time()  # Measure time the signal stays HIGH
+        pulse_width = meter_thread.meter.width  # Time the signal stayed HIGH on the last pulse
         print(f"Pulse Width: {pulse_width:.6f} seconds")
         time.sleep(0.1)
 
@@ -33,4 +20,4 @@ except KeyboardInterrupt:
     print("Exiting...")
 
 finally:
-    GPIO.cleanup()
+    meter_thread.stop()